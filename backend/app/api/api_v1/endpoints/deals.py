@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from typing import Any, Dict, List
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
+from app.services.ai.price_alerts import price_alert_engine
+from app.services.ai.price_analyzer import PriceAnalyzer
+from app.services.ai.price_stats import price_stats_tracker
+from app.services.cache import query_cache
 
 router = APIRouter()
 
@@ -18,10 +22,16 @@ def get_all_deals(
     """
     Get all saved deals for the current user.
     """
-    deals = crud.saved_deal.get_multi_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
+    def load_deals():
+        deals = crud.saved_deal.get_multi_by_user(
+            db=db, user_id=current_user.id, skip=skip, limit=limit
+        )
+        return [schemas.SavedDeal.model_validate(d).model_dump(mode="json") for d in deals]
+    
+    # Cached per user; writes through crud.saved_deal/recommendation/search invalidate it
+    return query_cache.get_or_load(
+        "deals", current_user.id, {"skip": skip, "limit": limit}, load_deals
     )
-    return deals
 
 
 @router.post("/", response_model=schemas.SavedDeal)
@@ -34,7 +44,9 @@ def create_deal(
     Save a new deal.
     """
     # Check if recommendation exists and belongs to the user
-    recommendation = crud.recommendation.get(db=db, id=deal_in.recommendation_id)
+    recommendation = crud.recommendation.get_by_user(
+        db=db, id=deal_in.recommendation_id, user_id=current_user.id
+    )
     
     if not recommendation:
         raise HTTPException(
@@ -42,19 +54,71 @@ def create_deal(
             detail="Recommendation not found"
         )
     
-    search = crud.search.get(db=db, id=recommendation.search_id)
-    
-    if not search or search.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    
     # Create saved deal
     deal = crud.saved_deal.create_with_owner(
         db=db, obj_in=deal_in, owner_id=current_user.id
     )
     
+    # Watch the deal's flight and hotel prices for drops
+    price_alert_engine.watch_saved_deals(db, [deal.id])
+    
     return deal
 
 
+@router.get("/price-trends/flights", response_model=Dict[str, Any])
+def get_route_price_trend(
+    origin: str,
+    destination: str,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+):
+    """
+    Get the running price statistics and trend of a flight route.
+    """
+    key = price_stats_tracker.route_key(origin, destination)
+    return _price_trend(db, "flight", key)
+
+
+@router.get("/price-trends/hotels", response_model=Dict[str, Any])
+def get_property_price_trend(
+    name: str,
+    location: str,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+):
+    """
+    Get the running nightly price statistics and trend of a hotel.
+    """
+    key = price_stats_tracker.property_key(name, location)
+    return _price_trend(db, "hotel", key)
+
+
+def _price_trend(db: Session, kind: str, key: str) -> Dict[str, Any]:
+    """
+    Statistics and trend analysis of one key, read from its stored accumulators,
+    plus the trend model fitted by the last batch job run (None until fitted)
+    """
+    stats = price_stats_tracker.get(db, kind, key)
+    model = crud.price_trend.get_by_key(db, kind=kind, key=key) if key else None
+    if stats is None and model is None:
+        raise HTTPException(status_code=404, detail="No price history for this route or property")
+    return {
+        "key": key,
+        "currency": price_stats_tracker.currency_converter.base_currency,
+        "stats": stats.snapshot() if stats else None,
+        "trend": PriceAnalyzer().analyze_price_stats(stats),
+        "model": {
+            "observations": model.observations,
+            "slope_per_day": model.slope_per_day,
+            "slope_ci": [model.slope_ci_low, model.slope_ci_high],
+            "level": model.level,
+            "forecast": model.forecast,
+            "last_observed_at": model.last_observed_at,
+            "fitted_at": model.fitted_at,
+        } if model else None,
+    }
+
+
 @router.get("/{deal_id}", response_model=schemas.SavedDeal)
 def get_deal(
     deal_id: int,
@@ -64,7 +128,7 @@ def get_deal(
     """
     Get a specific saved deal by ID.
     """
-    deal = crud.saved_deal.get(db=db, id=deal_id)
+    deal = crud.saved_deal.get_by_user(db=db, id=deal_id, user_id=current_user.id)
     
     if not deal:
         raise HTTPException(
@@ -72,9 +136,6 @@ def get_deal(
             detail="Deal not found"
         )
     
-    if deal.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    
     return deal
 
 
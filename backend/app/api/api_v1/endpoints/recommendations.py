@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
+import logging
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.api import deps
+from app.services.cache import query_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.get("/", response_model=List[schemas.Recommendation])
@@ -18,13 +21,17 @@ def get_recommendations(
     """
     Get all recommendations for the current user.
     """
-    print('Recommendations endpoint called')
-    recommendations = crud.recommendation.get_multi_by_user(
-        db=db, user_id=current_user.id, skip=skip, limit=limit
-    )
+    def load_recommendations():
+        recommendations = crud.recommendation.get_multi_by_user(
+            db=db, user_id=current_user.id, skip=skip, limit=limit
+        )
+        logger.debug(f"Loaded {len(recommendations)} recommendations for user {current_user.id}")
+        return [schemas.Recommendation.model_validate(r).model_dump(mode="json") for r in recommendations]
     
-    print(f"Recommendations found: {len(recommendations)}")
-    return recommendations
+    # Cached per user; writes through crud.recommendation/search invalidate it
+    return query_cache.get_or_load(
+        "recommendations", current_user.id, {"skip": skip, "limit": limit}, load_recommendations
+    )
 
 
 @router.get("/{recommendation_id}", response_model=schemas.Recommendation)
@@ -36,7 +43,10 @@ def get_recommendation(
     """
     Get a specific recommendation by ID.
     """
-    recommendation = crud.recommendation.get(db=db, id=recommendation_id)
+    # Only recommendations whose search belongs to the current user are returned
+    recommendation = crud.recommendation.get_by_user(
+        db=db, id=recommendation_id, user_id=current_user.id
+    )
     
     if not recommendation:
         raise HTTPException(
@@ -44,12 +54,6 @@ def get_recommendation(
             detail="Recommendation not found"
         )
     
-    # Check if the recommendation's search belongs to the current user
-    search = crud.search.get(db=db, id=recommendation.search_id)
-    
-    if not search or search.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    
     return recommendation
 
 
@@ -62,7 +66,10 @@ def get_packing_suggestions(
     """
     Get packing suggestions for a specific recommendation.
     """
-    recommendation = crud.recommendation.get(db=db, id=recommendation_id)
+    # Ownership check and packing suggestions are fetched in the same query
+    recommendation = crud.recommendation.get_by_user(
+        db=db, id=recommendation_id, user_id=current_user.id, with_packing_suggestions=True
+    )
     
     if not recommendation:
         raise HTTPException(
@@ -70,14 +77,4 @@ def get_packing_suggestions(
             detail="Recommendation not found"
         )
     
-    # Check if the recommendation's search belongs to the current user
-    search = crud.search.get(db=db, id=recommendation.search_id)
-    
-    if not search or search.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    packing_suggestions = crud.packing_suggestion.get_multi_by_recommendation(
-        db=db, recommendation_id=recommendation_id
-    )
-    
-    return packing_suggestions
+    return recommendation.packing_suggestions
@@ -1,15 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Body, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from typing import List
 from sqlalchemy.orm import Session
 import logging
 import asyncio
+import json
 
 from app import crud, schemas
 from app.api import deps
+from app.core.config import settings
+from app.services.ai.destination_explorer import DestinationExplorer
+from app.services.ai.price_alerts import price_alert_engine
+from app.services.ai.price_stats import price_stats_tracker
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.recommendation_pipeline import generate_search_recommendations
+from app.services.cache import candidate_store
 from app.services.scraper.flight_scraper import FlightScraper
 from app.services.scraper.hotel_scraper import HotelScraper
 from app.services.scraper.weather_scraper import WeatherScraper
 from app.services.scraper.event_scraper import EventScraper
+from app.services.scraper.entity_resolution import deduplicate_events, deduplicate_hotels
+from app.services.scraper.price_filter import filter_flight_prices, filter_hotel_prices
 
 logger = logging.getLogger(__name__)
 
@@ -68,90 +79,59 @@ async def process_search_data(
             flight_task, hotel_task, weather_task, event_task
         )
         
-        # Save flights to database
-        for flight in flights_data:
-            flight_data = schemas.FlightCreate(
-                search_id=search_id,
-                airline=flight.get("airline"),
-                flight_number=flight.get("flight_number"),
-                departure_airport=flight.get("departure_airport"),
-                arrival_airport=flight.get("arrival_airport"),
-                departure_time=flight.get("departure_time"),
-                arrival_time=flight.get("arrival_time"),
-                duration=flight.get("duration"),
-                stops=flight.get("stops"),
-                price=flight.get("price"),
-                currency=flight.get("currency", "USD"),
-                cabin_class=flight.get("cabin_class"),
-                additional_info=flight.get("additional_info", {})
-            )
-            crud.flight.create(db=db, obj_in=flight_data)
+        # Keep mis-parsed prices out of the database, the statistics and the alerts
+        # (before deduplication, so a bad offer cannot replace a valid one of the same hotel)
+        flights_data = filter_flight_prices(flights_data)
+        hotels_data = filter_hotel_prices(hotels_data)
         
-        # Save hotels to database
-        for hotel in hotels_data:
-            hotel_data = schemas.HotelCreate(
-                search_id=search_id,
-                name=hotel.get("name"),
-                address=hotel.get("address"),
-                star_rating=hotel.get("star_rating"),
-                price_per_night=hotel.get("price_per_night"),
-                total_price=hotel.get("total_price"),
-                currency=hotel.get("currency", "USD"),
-                amenities=hotel.get("amenities", []),
-                image_url=hotel.get("image_url"),
-                booking_url=hotel.get("booking_url"),
-                additional_info=hotel.get("additional_info", {})
-            )
-            crud.hotel.create(db=db, obj_in=hotel_data)
+        # The same hotel or event can be listed by several sources
+        hotels_data = deduplicate_hotels(hotels_data)
+        events_data = deduplicate_events(events_data)
         
-        # Save weather data to database
-        for weather in weather_data:
-            weather_obj = schemas.WeatherCreate(
-                search_id=search_id,
-                date=weather.get("date"),
-                temperature_high=weather.get("temperature_high"),
-                temperature_low=weather.get("temperature_low"),
-                condition=weather.get("condition"),
-                humidity=weather.get("humidity"),
-                precipitation_chance=weather.get("precipitation_chance"),
-                wind_speed=weather.get("wind_speed"),
-                additional_info=weather.get("additional_info", {})
+        # Fold this scrape's prices into the running per-route and per-property statistics
+        try:
+            price_stats_tracker.observe_flights(
+                db, flights_data,
+                origin=search_params.departure_location, destination=search_params.destination,
             )
-            crud.weather.create(db=db, obj_in=weather_obj)
+            price_stats_tracker.observe_hotels(db, hotels_data, location=search_params.destination)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not update price statistics for search_id {search_id}: {str(e)}")
         
-        # Save events to database
-        for event in events_data:
-            event_data = schemas.EventCreate(
-                search_id=search_id,
-                name=event.get("name"),
-                date=event.get("date"),
-                location=event.get("location"),
-                description=event.get("description"),
-                category=event.get("category"),
-                price=event.get("price"),
-                currency=event.get("currency", "USD"),
-                booking_url=event.get("booking_url"),
-                image_url=event.get("image_url"),
-                additional_info=event.get("additional_info", {})
+        # Alert users whose saved deals on this route, hotel and date just got cheaper
+        try:
+            price_alert_engine.observe_flights(
+                db, flights_data,
+                origin=search_params.departure_location, destination=search_params.destination,
+                departure_date=search_params.departure_date,
             )
-            crud.event.create(db=db, obj_in=event_data)
+            price_alert_engine.observe_hotels(
+                db, hotels_data, location=search_params.destination, check_in=search_params.departure_date,
+            )
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not check price alerts for search_id {search_id}: {str(e)}")
         
-        # Generate recommendations based on the collected data
-        # This could be implemented in a separate AI service
-        # For now, we'll just log that this would happen here
-        logger.info(f"Would generate recommendations for search_id: {search_id}")
+        # Store the scraped data (only the model columns) in one transaction
+        crud.flight.create_rows_for_search(db=db, search_id=search_id, items=flights_data, commit=False)
+        crud.hotel.create_rows_for_search(db=db, search_id=search_id, items=hotels_data, commit=False)
+        crud.weather.create_rows_for_search(db=db, search_id=search_id, items=weather_data, commit=False)
+        crud.event.create_rows_for_search(db=db, search_id=search_id, items=events_data, commit=False)
+        db.commit()
         
-        # Update search record to mark as completed
-        crud.search.update(db=db, db_obj=crud.search.get(db=db, id=search_id), 
-                           obj_in={"status": "completed"})
+        # Generate recommendations from the stored data; this also marks the
+        # search as completed, in the same transaction as the recommendations
+        await generate_search_recommendations(db=db, search_id=search_id)
         
         logger.info(f"Completed background processing for search_id: {search_id}")
     
     except Exception as e:
         logger.error(f"Error processing search_id {search_id}: {str(e)}")
         # Update search record to mark as failed
-        crud.search.update(db=db, db_obj=crud.search.get(db=db, id=search_id), 
-                           obj_in={"status": "failed", "error_message": str(e)})
+        db.rollback()
+        crud.search.update_by_id(db=db, id=search_id,
+                                 obj_in={"status": "failed", "error_message": str(e)})
 
 
 @router.post("/scrape", response_model=schemas.SearchResponse)
@@ -250,6 +230,135 @@ def delete_search(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     # Delete the search and all associated data
-    crud.search.remove(db=db, id=search_id)
+    crud.search.remove_cascade(db=db, id=search_id)
     
     return {"message": "Search deleted successfully"}
+
+
+@router.post("/purge", response_model=schemas.Message)
+def purge_searches(
+    search_ids: List[int] = Body(..., embed=True),
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+):
+    """
+    Delete many of the current user's searches and all their associated data.
+    Searches that do not exist or belong to another user are skipped.
+    """
+    deleted = crud.search.purge(db=db, ids=search_ids, user_id=current_user.id)
+    
+    return {"message": f"Deleted {deleted} search(es)"}
+
+
+@router.post("/explore")
+async def explore_destinations(
+    explore_in: schemas.ExploreRequest,
+    current_user: schemas.User = Depends(deps.get_current_user),
+    flight_scraper: FlightScraper = Depends(deps.get_flight_scraper_dep),
+    hotel_scraper: HotelScraper = Depends(deps.get_hotel_scraper_dep),
+    weather_scraper: WeatherScraper = Depends(deps.get_weather_scraper_dep),
+):
+    """
+    Compare many destinations from one origin and date window in one request.
+    Results are streamed as newline-delimited JSON: one message per destination
+    as soon as it is scored, then a final ranking of all destinations.
+    """
+    if len(explore_in.destinations) > settings.EXPLORE_MAX_DESTINATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.EXPLORE_MAX_DESTINATIONS} destinations can be explored at once"
+        )
+    if explore_in.return_date < explore_in.departure_date:
+        raise HTTPException(status_code=400, detail="Return date must not be before departure date")
+    
+    explorer = DestinationExplorer(flight_scraper, hotel_scraper, weather_scraper)
+    
+    async def stream():
+        async for message in explorer.explore(
+            origin=explore_in.departure_location,
+            destinations=explore_in.destinations,
+            departure_date=explore_in.departure_date,
+            return_date=explore_in.return_date,
+            adults=explore_in.adults,
+            children=explore_in.children,
+            budget=explore_in.budget,
+        ):
+            yield json.dumps(message, default=str) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/{search_id}/rerank", response_model=List[schemas.RankedCandidate])
+def rerank_search(
+    search_id: int,
+    rerank_in: schemas.RerankRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+):
+    """
+    Re-rank the flight and hotel pairs of a search under new weights and filters.
+    The scored candidate matrix is built once per search and cached, so
+    re-ranking does not scrape or load the search's flights and hotels again.
+    Only completed searches are re-ranked, so a partial candidate set is never cached.
+    """
+    search = crud.search.get_by_user(db=db, id=search_id, user_id=current_user.id)
+    if not search:
+        raise HTTPException(status_code=404, detail="Search not found")
+    if search.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Search is {search.status}, not completed")
+    
+    def build_matrix():
+        flights = crud.flight.get_rows_by_search(db=db, search_id=search_id)
+        hotels = crud.hotel.get_rows_by_search(db=db, search_id=search_id)
+        if not flights or not hotels:
+            return None
+        weather_data = crud.weather.get_rows_by_search(db=db, search_id=search_id)
+        events = crud.event.get_rows_by_search(db=db, search_id=search_id)
+        return RecommendationEngine().build_candidate_matrix(flights, hotels, weather_data, events)
+    
+    matrix = candidate_store.get_or_build(search_id, build_matrix)
+    if matrix is None:
+        return []
+    
+    weights = rerank_in.weights
+    try:
+        return matrix.rank(
+            {
+                "price_score": weights.price,
+                "weather_score": weights.weather,
+                "convenience_score": weights.convenience,
+            },
+            top_k=rerank_in.top_k,
+            max_total_price=rerank_in.max_total_price,
+            max_layovers=rerank_in.max_layovers,
+            max_duration_minutes=rerank_in.max_duration_minutes,
+            min_hotel_rating=rerank_in.min_hotel_rating,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{search_id}/pareto")
+def get_pareto_frontier(
+    search_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.User = Depends(deps.get_current_user),
+):
+    """
+    Get the Pareto-optimal flight and hotel pairs of a search: every pair that
+    no other pair beats on all of price, weather and convenience. Clients can
+    re-weight the frontier locally without asking the server again.
+    Only completed searches have a frontier (409 otherwise).
+    """
+    search = crud.search.get_by_user(db=db, id=search_id, user_id=current_user.id)
+    if not search:
+        raise HTTPException(status_code=404, detail="Search not found")
+    if search.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Search is {search.status}, not completed")
+    
+    return RecommendationEngine().generate_pareto_frontier(
+        crud.flight.get_rows_by_search(db=db, search_id=search_id),
+        crud.hotel.get_rows_by_search(db=db, search_id=search_id),
+        crud.weather.get_rows_by_search(db=db, search_id=search_id),
+        crud.event.get_rows_by_search(db=db, search_id=search_id),
+    )
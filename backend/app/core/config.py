@@ -1,10 +1,15 @@
 # filepath: c:\Users\adeni\Documents\Works\smart_travel\backend\app\core\config.py
 from typing import Optional, Dict, Any
+from pathlib import Path
 import secrets
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+# The backend directory: relative file paths in the settings are resolved against it,
+# so tests, the server and scripts share the same files whatever their working directory
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
@@ -40,6 +45,13 @@ class Settings(BaseSettings):
         "http://localhost:5173",      # Vite default
     ]
     
+    @field_validator("LLM_CACHE_PATH")
+    def resolve_llm_cache_path(cls, v: str) -> str:
+        """
+        Resolve a relative cache path against the backend directory (empty stays empty)
+        """
+        return str(BACKEND_DIR / v) if v else v
+    
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v: str | list[str]) -> list[str]:
         """
@@ -64,9 +76,74 @@ class Settings(BaseSettings):
     BRIGHT_DATA_API_KEY: str = ""
     BRIGHT_DATA_ZONE_USERNAME: str = ""
     BRIGHT_DATA_ZONE_PASSWORD: str = ""
+    # Redis configuration (leave empty to disable the shared cache tier)
+    REDIS_URL: str = ""
+    
+    # Per-user query result cache
+    QUERY_CACHE_ENABLED: bool = True
+    QUERY_CACHE_MAX_ENTRIES: int = 1024
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    
+    # Scored candidate matrices kept for re-ranking
+    CANDIDATE_CACHE_MAX_ENTRIES: int = 32
+    CANDIDATE_CACHE_TTL_SECONDS: int = 3600
+    
+    # Scraper results shared by explore requests for the same destination and dates
+    SCRAPE_CACHE_MAX_ENTRIES: int = 256
+    SCRAPE_CACHE_TTL_SECONDS: int = 900
+    
+    # Explore mode: destinations per request and destinations scraped at once
+    EXPLORE_MAX_DESTINATIONS: int = 25
+    EXPLORE_MAX_CONCURRENCY: int = 4
+    
+    # Currency all prices are converted to before scoring and deal detection,
+    # and a JSON file of FX rates ({"base": ..., "rates": {...}}; empty = base only)
+    BASE_CURRENCY: str = "USD"
+    FX_RATES_PATH: str = ""
+    FX_RATES_REFRESH_SECONDS: int = 3600
+    
+    # Running per-route/per-property price statistics: weight of each new price in the EWMA
+    PRICE_STATS_EWMA_ALPHA: float = 0.2
+    
+    # Batch price trend job: history fitted, days forecast, and how often it runs (0 = never)
+    PRICE_TREND_HISTORY_DAYS: int = 365
+    PRICE_TREND_FORECAST_DAYS: int = 14
+    PRICE_TREND_REFRESH_SECONDS: int = 6 * 3600
+    
+    # Booking lead-time tables: rebuild interval and observations needed per lead-time bucket
+    BOOKING_TABLES_REFRESH_SECONDS: int = 24 * 3600
+    BOOKING_TABLES_MIN_CELL_OBSERVATIONS: int = 5
+    
+    # Price alerts for saved deals: drop below the saved (or last alerted) price that alerts
+    PRICE_ALERT_MIN_DROP_PERCENT: float = 5.0
+    
+    # Scraped price outliers: robust z-score limit, smallest group compared, and "drop", "flag" or "clamp"
+    PRICE_OUTLIER_THRESHOLD: float = 3.5
+    PRICE_OUTLIER_MIN_GROUP_SIZE: int = 5
+    PRICE_OUTLIER_ACTION: str = "drop"
+    
     # LLM configuration
     GEMINI_API_KEY: str = ""
     GEMINI_MODEL: str = "gemini-2.0-flash"
+    # Recommendation summaries: parallel LLM calls, per-call timeout, or one batched prompt
+    LLM_MAX_CONCURRENCY: int = 4
+    LLM_TIMEOUT_SECONDS: float = 20.0
+    LLM_BATCH_SUMMARIES: bool = False
+    # Shared LLM clients: calls in flight per model across the process and per-call timeout,
+    # with optional per-model overrides, e.g. LLM_MODEL_CONCURRENCY='{"gemini-2.0-flash": 16}'
+    LLM_POOL_MAX_CONCURRENCY: int = 8
+    LLM_POOL_TIMEOUT_SECONDS: float = 60.0
+    LLM_MODEL_CONCURRENCY: Dict[str, int] = {}
+    LLM_MODEL_TIMEOUT_SECONDS: Dict[str, float] = {}
+    
+    # LLM response cache (in-process LRU + SQLite file; empty path = memory only,
+    # relative paths are taken from the backend directory)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = str(BACKEND_DIR / ".cache" / "llm_responses.sqlite3")
+    LLM_CACHE_MAX_ENTRIES: int = 512
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Round temperatures and rainy-day counts in packing prompts to raise cache hit rates
+    LLM_CACHE_BUCKET_INPUTS: bool = True
       # JWT settings
     JWT_ALGORITHM: str = "HS256"
       # Application settings
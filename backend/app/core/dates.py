@@ -0,0 +1,31 @@
+import datetime
+from typing import Any, Optional
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def parse_datetime(value: Any) -> Optional[datetime.datetime]:
+    """
+    Parse an ISO datetime string; dates become midnight and datetimes are returned unchanged
+    """
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+def days_since_epoch(value: datetime.datetime) -> float:
+    """
+    Days since the Unix epoch as a float (naive timestamps are taken as UTC)
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) / datetime.timedelta(days=1)
+
+
+def from_days_since_epoch(days: float) -> datetime.datetime:
+    """
+    Naive UTC timestamp of a float number of days since the Unix epoch
+    """
+    return _EPOCH + datetime.timedelta(days=float(days))
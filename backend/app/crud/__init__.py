@@ -5,6 +5,9 @@ from .event import event
 from .recommendation import recommendation
 from .user import user
 from .packing_suggestion import packing_suggestion
+from .price_stat import price_stat
+from .price_trend import price_trend
+from .price_watch import price_watch
 from .saved_deal import saved_deal
 from .notification import notification
 from .search import search
@@ -1,10 +1,13 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, List, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import DateTime, insert, inspect, select, update as sql_update
 from sqlalchemy.orm import Session
 
 from app.db.base_class import Base
+from app.core.dates import parse_datetime
+from app.services.cache import query_cache
 
 # Define generic type T as a TypeVar bound to SQLAlchemy Base
 ModelType = TypeVar("ModelType", bound=Base)
@@ -20,7 +23,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     Attributes:
         model: A SQLAlchemy model class
+        cache_namespaces: Query cache namespaces invalidated by writes through this object
     """
+    cache_namespaces: Tuple[str, ...] = ()
+
     def __init__(self, model: Type[ModelType]):
         """
         Initialize CRUD object with model class
@@ -29,6 +35,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             model: A SQLAlchemy model class
         """
         self.model = model
+        # Column attribute names, used to drop unknown keys from update payloads
+        self._column_keys = frozenset(attr.key for attr in inspect(model).column_attrs)
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         """
@@ -64,6 +72,43 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             .all()
         )
 
+    def get_multi_by_search(self, db: Session, *, search_id: int) -> List[ModelType]:
+        """
+        Get all records belonging to a search
+        
+        Args:
+            db: Database session
+            search_id: ID of the search
+            
+        Returns:
+            List of records, ordered by ID
+        """
+        return (
+            db.query(self.model)
+            .filter(self.model.search_id == search_id)
+            .order_by(self.model.id)
+            .all()
+        )
+
+    def get_rows_by_search(self, db: Session, *, search_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the column values of all records belonging to a search as plain dicts
+        
+        Skips building ORM objects, for bulk read-only processing.
+        
+        Args:
+            db: Database session
+            search_id: ID of the search
+            
+        Returns:
+            List of dictionaries keyed by column name, ordered by ID
+        """
+        table = self.model.__table__
+        result = db.execute(
+            select(table).where(table.c.search_id == search_id).order_by(table.c.id)
+        )
+        return [dict(row) for row in result.mappings()]
+
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
@@ -96,8 +141,50 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._invalidate_cache(db, [db_obj.id])
         return db_obj
 
+    def create_rows_for_search(
+        self,
+        db: Session,
+        *,
+        search_id: int,
+        items: Sequence[Any],
+        commit: bool = True
+    ) -> int:
+        """
+        Bulk-insert scraped items of a search in one executemany batch
+        
+        Only keys that are columns of the model are stored (the record's own
+        id, search_id and created_at are ignored), and ISO strings in DateTime
+        columns are parsed, so scraper dicts can be passed as they are.
+        
+        Args:
+            db: Database session
+            search_id: ID of the search the items belong to
+            items: Scraper dicts or records
+            commit: Commit the transaction (False to let the caller commit)
+            
+        Returns:
+            Number of rows inserted
+        """
+        table = self.model.__table__
+        columns = [column for column in table.columns if column.name not in ("id", "search_id", "created_at")]
+        datetime_columns = {column.name for column in columns if isinstance(column.type, DateTime)}
+        rows = []
+        for item in items:
+            data = item.to_dict() if hasattr(item, "to_dict") else item
+            row = {column.name: data[column.name] for column in columns if column.name in data}
+            for name in datetime_columns.intersection(row):
+                row[name] = parse_datetime(row[name])
+            row["search_id"] = search_id
+            rows.append(row)
+        if rows:
+            db.execute(insert(table), rows)
+        if commit:
+            db.commit()
+        return len(rows)
+
     def update(
         self,
         db: Session,
@@ -106,7 +193,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """
-        Update a record
+        Update a record with a single UPDATE statement
+        
+        Only the columns that actually change are written. When the database
+        supports RETURNING, the new row state is read back in the same
+        statement instead of a separate refresh.
         
         Args:
             db: Database session
@@ -116,18 +207,129 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Updated record
         """
-        obj_data = jsonable_encoder(db_obj)
+        update_data = self._changed_values(db_obj, self._update_data(obj_in))
+        if not update_data:
+            return db_obj
+        
+        stmt = (
+            sql_update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(**update_data)
+        )
+        if db.get_bind().dialect.update_returning:
+            # Identity-map objects are populated from the RETURNING row
+            updated = db.scalars(stmt.returning(self.model)).first()
+        else:
+            db.execute(stmt, execution_options={"synchronize_session": "evaluate"})
+            updated = db_obj
+        db.commit()
+        self._invalidate_cache(db, [db_obj.id])
+        return updated if updated is not None else db_obj
+
+    def update_by_id(
+        self,
+        db: Session,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> int:
+        """
+        Update a record by ID without loading it first
+        
+        Args:
+            db: Database session
+            id: ID of the record
+            obj_in: Schema for updating a record or a dictionary
+            
+        Returns:
+            Number of rows updated
+        """
+        return self.update_multi(db, ids=[id], obj_in=obj_in)
+
+    def update_multi(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> int:
+        """
+        Apply the same values to many records in one UPDATE ... WHERE id IN (...)
+        
+        Args:
+            db: Database session
+            ids: IDs of the records to update
+            obj_in: Schema for updating a record or a dictionary
+            
+        Returns:
+            Number of rows updated
+        """
+        update_data = self._update_data(obj_in)
+        if not ids or not update_data:
+            return 0
+        
+        result = db.execute(
+            sql_update(self.model)
+            .where(self.model.id.in_(list(ids)))
+            .values(**update_data),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        self._invalidate_cache(db, ids)
+        return result.rowcount
+
+    def bulk_update(self, db: Session, *, rows: Sequence[Dict[str, Any]]) -> int:
+        """
+        Update many records with per-row values in one executemany batch
+        
+        Args:
+            db: Database session
+            rows: Dictionaries of column values, each including the record "id"
+            
+        Returns:
+            Number of rows submitted for update
+        """
+        mappings = []
+        for row in rows:
+            values = {key: value for key, value in row.items() if key in self._column_keys}
+            if "id" not in values:
+                raise ValueError("bulk_update rows must include an 'id' key")
+            if len(values) > 1:
+                mappings.append(values)
+        if not mappings:
+            return 0
+        
+        # ORM bulk UPDATE by primary key (emits UPDATE ... WHERE id = ? as executemany)
+        db.execute(sql_update(self.model), mappings)
+        db.commit()
+        self._invalidate_cache(db, [values["id"] for values in mappings])
+        return len(mappings)
+
+    def _update_data(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Normalize an update payload to a dict restricted to the model's columns
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return {
+            key: value for key, value in update_data.items()
+            if key in self._column_keys and key != "id"
+        }
+
+    @staticmethod
+    def _changed_values(db_obj: ModelType, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop values equal to what is already loaded on the object
+        
+        Attributes that are not loaded are kept, so this never triggers a lazy load.
+        """
+        loaded = inspect(db_obj).dict
+        return {
+            key: value for key, value in update_data.items()
+            if key not in loaded or loaded[key] != value
+        }
 
     def remove(self, db: Session, *, id: int) -> ModelType:
         """
@@ -140,7 +342,25 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Removed record
         """
-        obj = db.query(self.model).get(id)
+        obj = db.get(self.model, id)
+        # Owners must be resolved before the row is gone
+        user_ids = self._affected_user_ids(db, [id]) if self.cache_namespaces else set()
         db.delete(obj)
         db.commit()
+        query_cache.invalidate(self.cache_namespaces, user_ids)
         return obj
+
+    def _affected_user_ids(self, db: Session, ids: Iterable[Any]) -> Set[int]:
+        """
+        Get the users whose cached query results depend on the given records
+        
+        Subclasses that set cache_namespaces override this.
+        """
+        return set()
+
+    def _invalidate_cache(self, db: Session, ids: Iterable[Any]) -> None:
+        """
+        Invalidate cached query results that depend on the given records
+        """
+        if self.cache_namespaces:
+            query_cache.invalidate(self.cache_namespaces, self._affected_user_ids(db, ids))
@@ -1,10 +1,55 @@
+import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
 from app.models.flight import Flight
+from app.models.search import Search
 from app.schemas.base_schema import DefaultCreate, DefaultUpdate
 
 
 class CRUDFlight(CRUDBase[Flight, DefaultCreate, DefaultUpdate]):
-    pass
+    """
+    CRUD operations for Flight
+    """
+
+    def get_price_history(self, db: Session, *, since: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Get the route, price and scrape time of every flight scraped since a time
+        
+        Flights without their own origin or destination fall back to their search's.
+        
+        Args:
+            db: Database session
+            since: Earliest scrape time
+            
+        Returns:
+            List of dicts with origin, destination, search_destination, departure_date,
+            price, currency and observed_at
+        """
+        result = db.execute(
+            select(
+                Flight.origin, Flight.destination, Search.departure_location, Search.destination.label("search_destination"),
+                Search.departure_date, Flight.price, Flight.currency, Flight.created_at.label("observed_at"),
+            )
+            .join(Search, Flight.search_id == Search.id)
+            .where(Flight.created_at >= since, Flight.price.is_not(None))
+            .order_by(Flight.created_at, Flight.id)
+        )
+        return [
+            {
+                "origin": row["origin"] or row["departure_location"],
+                "destination": row["destination"] or row["search_destination"],
+                "search_destination": row["search_destination"],
+                "departure_date": row["departure_date"],
+                "price": row["price"],
+                "currency": row["currency"],
+                "observed_at": row["observed_at"],
+            }
+            for row in result.mappings()
+        ]
 
 
 flight = CRUDFlight(Flight)
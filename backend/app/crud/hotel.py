@@ -1,10 +1,42 @@
+import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
 from app.models.hotel import Hotel
+from app.models.search import Search
 from app.schemas.base_schema import DefaultCreate, DefaultUpdate
 
 
 class CRUDHotel(CRUDBase[Hotel, DefaultCreate, DefaultUpdate]):
-    pass
+    """
+    CRUD operations for Hotel
+    """
+
+    def get_price_history(self, db: Session, *, since: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Get the name, search destination, nightly price and scrape time of every hotel scraped since a time
+        
+        Args:
+            db: Database session
+            since: Earliest scrape time
+            
+        Returns:
+            List of dicts with name, location (the search destination), departure_date
+            (the check-in date), price_per_night, currency and observed_at
+        """
+        result = db.execute(
+            select(
+                Hotel.name, Search.destination.label("location"), Search.departure_date, Hotel.price_per_night,
+                Hotel.currency, Hotel.created_at.label("observed_at"),
+            )
+            .join(Search, Hotel.search_id == Search.id)
+            .where(Hotel.created_at >= since, Hotel.price_per_night.is_not(None))
+            .order_by(Hotel.created_at, Hotel.id)
+        )
+        return [dict(row) for row in result.mappings()]
 
 
 hotel = CRUDHotel(Hotel)
@@ -1,3 +1,8 @@
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
 from app.models.notification import Notification
 from app.schemas.base_schema import DefaultCreate, DefaultUpdate
@@ -7,7 +12,24 @@ class CRUDNotification(CRUDBase[Notification, DefaultCreate, DefaultUpdate]):
     """
     CRUD operations for Notification
     """
-    pass
+
+    def create_multi(self, db: Session, *, rows: Sequence[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Insert many notifications in one executemany batch
+        
+        Args:
+            db: Database session
+            rows: Column values of each notification
+            commit: Commit the transaction (False to let the caller commit)
+            
+        Returns:
+            Number of notifications created
+        """
+        if rows:
+            db.execute(insert(Notification), list(rows))
+        if commit:
+            db.commit()
+        return len(rows)
 
 
 notification = CRUDNotification(Notification)
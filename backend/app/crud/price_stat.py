@@ -0,0 +1,90 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, update as sql_update
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.price_stat import PriceStat
+from app.schemas.base_schema import DefaultCreate, DefaultUpdate
+
+
+class CRUDPriceStat(CRUDBase[PriceStat, DefaultCreate, DefaultUpdate]):
+    """
+    CRUD operations for PriceStat
+    """
+
+    def get_by_key(self, db: Session, *, kind: str, key: str) -> Optional[PriceStat]:
+        """
+        Get the statistics of one route or property
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            key: Route or property key
+            
+        Returns:
+            Statistics row if the key has been observed, None otherwise
+        """
+        return db.query(PriceStat).filter(PriceStat.kind == kind, PriceStat.key == key).first()
+
+    def get_rows_by_keys(self,
+                         db: Session,
+                         *,
+                         kind: str,
+                         keys: Iterable[str],
+                         for_update: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the column values of many keys' statistics in one query
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            keys: Route or property keys
+            for_update: Lock the rows (SELECT ... FOR UPDATE) until the transaction ends,
+                so other processes cannot merge into them in between
+            
+        Returns:
+            Dictionary mapping each observed key to its column values
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        table = PriceStat.__table__
+        query = select(table).where(table.c.kind == kind, table.c.key.in_(keys))
+        if for_update:
+            query = query.with_for_update()
+        result = db.execute(query)
+        return {row["key"]: dict(row) for row in result.mappings()}
+
+    def save_rows(self, db: Session, *, kind: str, rows: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Insert or update the statistics of many keys in one batch per statement
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            rows: Column values by key; rows with an "id" update that row
+            
+        Returns:
+            Number of keys saved
+
+        Raises:
+            IntegrityError: If another transaction inserted one of the new keys first
+        """
+        new_rows: List[Dict[str, Any]] = []
+        changed_rows: List[Dict[str, Any]] = []
+        for key, row in rows.items():
+            values = {name: value for name, value in row.items() if name in self._column_keys}
+            values.update(kind=kind, key=key)
+            (changed_rows if values.get("id") is not None else new_rows).append(values)
+
+        if new_rows:
+            db.execute(insert(PriceStat), [{k: v for k, v in row.items() if k != "id"} for row in new_rows])
+        if changed_rows:
+            # ORM bulk UPDATE by primary key (executemany)
+            db.execute(sql_update(PriceStat), changed_rows)
+        db.commit()
+        return len(rows)
+
+
+price_stat = CRUDPriceStat(PriceStat)
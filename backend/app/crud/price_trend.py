@@ -0,0 +1,54 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.price_trend import PriceTrend
+from app.schemas.base_schema import DefaultCreate, DefaultUpdate
+
+
+class CRUDPriceTrend(CRUDBase[PriceTrend, DefaultCreate, DefaultUpdate]):
+    """
+    CRUD operations for PriceTrend
+    """
+
+    def get_by_key(self, db: Session, *, kind: str, key: str) -> Optional[PriceTrend]:
+        """
+        Get the fitted trend of one route or property
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            key: Route or property key
+            
+        Returns:
+            Trend row if the key was fitted by the last job run, None otherwise
+        """
+        return db.query(PriceTrend).filter(PriceTrend.kind == kind, PriceTrend.key == key).first()
+
+    def replace_kind(self, db: Session, *, kind: str, rows: Sequence[Dict[str, Any]]) -> int:
+        """
+        Replace all trends of a kind with a new job run's results, in one transaction
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            rows: Column values of each fitted key
+            
+        Returns:
+            Number of trends stored
+        """
+        values: List[Dict[str, Any]] = [
+            {**{name: value for name, value in row.items() if name in self._column_keys and name != "id"},
+             "kind": kind}
+            for row in rows
+        ]
+        db.execute(delete(PriceTrend).where(PriceTrend.kind == kind))
+        if values:
+            db.execute(insert(PriceTrend), values)
+        db.commit()
+        return len(values)
+
+
+price_trend = CRUDPriceTrend(PriceTrend)
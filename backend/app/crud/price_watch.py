@@ -0,0 +1,129 @@
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, insert, or_, select, update as sql_update
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.flight import Flight
+from app.models.hotel import Hotel
+from app.models.price_watch import PriceWatch
+from app.models.recommendation import Recommendation
+from app.models.saved_deal import SavedDeal
+from app.models.search import Search
+from app.schemas.base_schema import DefaultCreate, DefaultUpdate
+
+
+class CRUDPriceWatch(CRUDBase[PriceWatch, DefaultCreate, DefaultUpdate]):
+    """
+    CRUD operations for PriceWatch
+    """
+    # (key, travel date, price) groups per lookup query
+    LOOKUP_BATCH_SIZE = 100
+
+    def get_watch_sources(
+        self, db: Session, *, saved_deal_ids: Optional[Sequence[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get what price watches are built from: each saved deal's flight, hotel and search
+        
+        Args:
+            db: Database session
+            saved_deal_ids: Saved deals to get (None for every saved deal without watches)
+            
+        Returns:
+            List of dicts with the saved deal, its owner and recommendation, the
+            flight's route and price, the hotel's name and price, and the search's
+            locations and departure date
+        """
+        query = (
+            select(
+                SavedDeal.id.label("saved_deal_id"), SavedDeal.user_id, Recommendation.id.label("recommendation_id"),
+                Flight.origin, Flight.destination.label("flight_destination"),
+                Flight.price.label("flight_price"), Flight.currency.label("flight_currency"),
+                Hotel.name.label("hotel_name"), Hotel.price_per_night.label("hotel_price"),
+                Hotel.currency.label("hotel_currency"),
+                Search.departure_location, Search.destination, Search.departure_date,
+            )
+            .join(Recommendation, SavedDeal.recommendation_id == Recommendation.id)
+            .join(Search, Recommendation.search_id == Search.id)
+            .outerjoin(Flight, Recommendation.flight_id == Flight.id)
+            .outerjoin(Hotel, Recommendation.hotel_id == Hotel.id)
+            .order_by(SavedDeal.id)
+        )
+        if saved_deal_ids is None:
+            query = query.where(~SavedDeal.id.in_(select(PriceWatch.saved_deal_id)))
+        else:
+            query = query.where(SavedDeal.id.in_(list(saved_deal_ids)))
+        return [dict(row) for row in db.execute(query).mappings()]
+
+    def create_multi(self, db: Session, *, rows: Sequence[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Insert many watches in one executemany batch
+        
+        Args:
+            db: Database session
+            rows: Column values of each watch
+            commit: Commit the transaction (False to let the caller commit)
+            
+        Returns:
+            Number of watches created
+        """
+        if rows:
+            db.execute(insert(PriceWatch), list(rows))
+        if commit:
+            db.commit()
+        return len(rows)
+
+    def get_triggered(
+        self, db: Session, *, kind: str, groups: Sequence[Tuple[str, datetime.date, float]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the watches undercut by new prices, using the (kind, key, travel_date, threshold) index
+        
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            groups: (key, travel date, lowest new price) of each route/property and date observed
+            
+        Returns:
+            Column values of each triggered watch, with the group's "observed_price"
+        """
+        triggered = []
+        table = PriceWatch.__table__
+        for start in range(0, len(groups), self.LOOKUP_BATCH_SIZE):
+            batch = groups[start:start + self.LOOKUP_BATCH_SIZE]
+            prices = {(key, travel_date): price for key, travel_date, price in batch}
+            result = db.execute(
+                select(table).where(
+                    table.c.kind == kind,
+                    or_(*[
+                        and_(table.c.key == key, table.c.travel_date == travel_date, table.c.threshold >= price)
+                        for key, travel_date, price in batch
+                    ]),
+                )
+            )
+            for row in result.mappings():
+                triggered.append({**row, "observed_price": prices[(row["key"], row["travel_date"])]})
+        return triggered
+
+    def record_alerts(self, db: Session, *, rows: Sequence[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Store new reference prices and thresholds of alerted watches in one executemany batch
+        
+        Args:
+            db: Database session
+            rows: Dicts with the watch "id" and the columns to update
+            commit: Commit the transaction (False to let the caller commit)
+            
+        Returns:
+            Number of watches updated
+        """
+        if rows:
+            db.execute(sql_update(PriceWatch), list(rows))
+        if commit:
+            db.commit()
+        return len(rows)
+
+
+price_watch = CRUDPriceWatch(PriceWatch)
@@ -1,7 +1,11 @@
-from typing import List
+import datetime
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
 
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session, joinedload
 from app.crud.base import CRUDBase
+from app.models.packing_suggestion import PackingSuggestion
 from app.models.recommendation import Recommendation
 from app.models.search import Search
 from app.schemas.recommendation import RecommendationCreate, RecommendationUpdate
@@ -11,11 +15,40 @@ class CRUDRecommendation(CRUDBase[Recommendation, RecommendationCreate, Recommen
     """
     CRUD operations for Recommendation
     """
+    # Saved deals embed their recommendation, so both lists depend on it
+    cache_namespaces = ("recommendations", "deals")
+    
+    def get_by_user(
+        self, db: Session, *, id: int, user_id: int, with_packing_suggestions: bool = False
+    ) -> Optional[Recommendation]:
+        """
+        Get a recommendation only if its search belongs to the user, in one query
+        
+        Args:
+            db: Database session
+            id: ID of the recommendation
+            user_id: ID of the user that must own the recommendation's search
+            with_packing_suggestions: Also eager-load the packing suggestions
+            
+        Returns:
+            Recommendation if found and owned by the user, None otherwise
+        """
+        query = (
+            db.query(Recommendation)
+            .join(Search, Recommendation.search_id == Search.id)
+            .filter(Recommendation.id == id, Search.user_id == user_id)
+            .options(joinedload(Recommendation.flight), joinedload(Recommendation.hotel))
+        )
+        if with_packing_suggestions:
+            query = query.options(joinedload(Recommendation.packing_suggestions))
+        return query.first()
     
     def get_multi_by_user(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100) -> List[Recommendation]:
         """
         Get recommendations for a specific user by joining with the search table
         
+        The related flight and hotel are loaded in the same query.
+        
         Args:
             db: Database session
             user_id: ID of the user
@@ -29,10 +62,75 @@ class CRUDRecommendation(CRUDBase[Recommendation, RecommendationCreate, Recommen
             db.query(Recommendation)
             .join(Search, Recommendation.search_id == Search.id)
             .filter(Search.user_id == user_id)
+            .options(joinedload(Recommendation.flight), joinedload(Recommendation.hotel))
+            .order_by(Recommendation.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def create_multi_for_search(
+        self,
+        db: Session,
+        *,
+        search_id: int,
+        rows: Sequence[Dict[str, Any]],
+        packing_suggestions: Optional[Sequence[Dict[str, List[str]]]] = None,
+        commit: bool = True
+    ) -> List[int]:
+        """
+        Bulk-insert a search's recommendations and their packing suggestions
+        
+        Recommendations are inserted with one multi-row INSERT ... RETURNING and
+        packing suggestions with one executemany, without building ORM objects.
+        
+        Args:
+            db: Database session
+            search_id: ID of the search
+            rows: Recommendation column values (search_id is filled in)
+            packing_suggestions: Per recommendation, a mapping of category to items
+            commit: Commit the transaction and invalidate cached lists; pass False to
+                commit together with later writes, which then own the invalidation
+            
+        Returns:
+            IDs of the new recommendations, in the order of rows
+        """
+        if not rows:
+            return []
+        
+        now = datetime.datetime.now(datetime.timezone.utc)
+        ids = list(db.scalars(
+            insert(Recommendation).returning(Recommendation.id, sort_by_parameter_order=True),
+            [{**row, "search_id": search_id, "created_at": now} for row in rows],
+        ))
+        
+        suggestion_rows = [
+            {
+                "recommendation_id": recommendation_id,
+                "category": category,
+                "items": json.dumps(items),
+                "created_at": now,
+            }
+            for recommendation_id, suggestions in zip(ids, packing_suggestions or [])
+            for category, items in (suggestions or {}).items()
+        ]
+        if suggestion_rows:
+            db.execute(insert(PackingSuggestion), suggestion_rows)
+        
+        if commit:
+            db.commit()
+            self._invalidate_cache(db, ids)
+        return ids
+    
+    def _affected_user_ids(self, db: Session, ids: Iterable[Any]) -> Set[int]:
+        """
+        Recommendations are cached per user owning their search
+        """
+        return set(db.scalars(
+            select(Search.user_id)
+            .join(Recommendation, Recommendation.search_id == Search.id)
+            .where(Recommendation.id.in_(list(ids)))
+        ))
+
 
 recommendation = CRUDRecommendation(Recommendation)
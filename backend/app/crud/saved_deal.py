@@ -1,4 +1,11 @@
+from typing import Any, Iterable, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
 from app.crud.base import CRUDBase
+from app.models.recommendation import Recommendation
 from app.models.saved_deal import SavedDeal
 from app.schemas.deal import SavedDealCreate, SavedDealUpdate
 
@@ -7,7 +14,86 @@ class CRUDSavedDeal(CRUDBase[SavedDeal, SavedDealCreate, SavedDealUpdate]):
     """
     CRUD operations for SavedDeal
     """
-    pass
+    cache_namespaces = ("deals",)
+    
+    @staticmethod
+    def _with_recommendation():
+        """
+        Loader options that fetch the recommendation, flight and hotel in the same query
+        """
+        recommendation = joinedload(SavedDeal.recommendation)
+        return (
+            recommendation.joinedload(Recommendation.flight),
+            recommendation.joinedload(Recommendation.hotel),
+        )
+    
+    def create_with_owner(self, db: Session, *, obj_in: SavedDealCreate, owner_id: int) -> SavedDeal:
+        """
+        Save a deal for a user
+        
+        Args:
+            db: Database session
+            obj_in: Schema with the recommendation to save and optional notes
+            owner_id: ID of the user saving the deal
+            
+        Returns:
+            Created saved deal
+        """
+        db_obj = SavedDeal(**jsonable_encoder(obj_in), user_id=owner_id)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        self._invalidate_cache(db, [db_obj.id])
+        return db_obj
+    
+    def get_by_user(self, db: Session, *, id: int, user_id: int) -> Optional[SavedDeal]:
+        """
+        Get a saved deal only if it belongs to the user
+        
+        Args:
+            db: Database session
+            id: ID of the saved deal
+            user_id: ID of the user that must own the deal
+            
+        Returns:
+            Saved deal with its recommendation loaded, None if not found or not owned
+        """
+        return (
+            db.query(SavedDeal)
+            .filter(SavedDeal.id == id, SavedDeal.user_id == user_id)
+            .options(*self._with_recommendation())
+            .first()
+        )
+    
+    def get_multi_by_user(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100) -> List[SavedDeal]:
+        """
+        Get saved deals for a user with their recommendation, flight and hotel
+        
+        Args:
+            db: Database session
+            user_id: ID of the user
+            skip: Number of records to skip
+            limit: Maximum number of records to return
+            
+        Returns:
+            List of saved deals for the user
+        """
+        return (
+            db.query(SavedDeal)
+            .filter(SavedDeal.user_id == user_id)
+            .options(*self._with_recommendation())
+            .order_by(SavedDeal.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    
+    def _affected_user_ids(self, db: Session, ids: Iterable[Any]) -> Set[int]:
+        """
+        Saved deals are cached per owning user
+        """
+        return set(db.scalars(select(SavedDeal.user_id).where(SavedDeal.id.in_(list(ids)))))
 
 
 saved_deal = CRUDSavedDeal(SavedDeal)
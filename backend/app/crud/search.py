@@ -1,13 +1,151 @@
+from typing import Any, Iterable, Optional, Sequence, Set
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
 from app.crud.base import CRUDBase
+from app.models.event import Event
+from app.models.flight import Flight
+from app.models.hotel import Hotel
+from app.models.notification import Notification
+from app.models.packing_suggestion import PackingSuggestion
+from app.models.price_watch import PriceWatch
+from app.models.recommendation import Recommendation
+from app.models.saved_deal import SavedDeal
 from app.models.search import Search
+from app.models.weather import Weather
 from app.schemas.search import SearchCreate, SearchUpdate
+from app.services.cache import candidate_store, query_cache
 
 
 class CRUDSearch(CRUDBase[Search, SearchCreate, SearchUpdate]):
     """
     CRUD operations for Search
     """
-    pass
+    # Deleting a search removes its recommendations and the deals saved from them
+    cache_namespaces = ("recommendations", "deals")
+
+    def get_by_user(self, db: Session, *, id: int, user_id: int) -> Optional[Search]:
+        """
+        Get a search by ID if it belongs to the given user
+
+        Args:
+            db: Database session
+            id: ID of the search
+            user_id: ID of the user who must own the search
+
+        Returns:
+            Search if found and owned by the user, None otherwise
+        """
+        return (
+            db.query(Search)
+            .filter(Search.id == id, Search.user_id == user_id)
+            .first()
+        )
+
+    def remove_cascade(self, db: Session, *, id: int) -> int:
+        """
+        Delete a search and all of its dependent rows without loading them
+
+        Args:
+            db: Database session
+            id: ID of the search
+
+        Returns:
+            Number of searches deleted (0 or 1)
+        """
+        user_ids = self._affected_user_ids(db, [id])
+        deleted = self._delete_searches(db, [id])
+        db.commit()
+        query_cache.invalidate(self.cache_namespaces, user_ids)
+        candidate_store.invalidate([id])
+        return deleted
+
+    def purge(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[int],
+        user_id: Optional[int] = None,
+        batch_size: int = 500
+    ) -> int:
+        """
+        Delete many searches and their dependent rows in batches
+
+        Each batch runs as a handful of set-based DELETE statements and is
+        committed on its own, so a large purge never holds one huge transaction.
+
+        Args:
+            db: Database session
+            ids: IDs of the searches to delete
+            user_id: If given, only searches owned by this user are deleted
+            batch_size: Number of searches deleted per transaction
+
+        Returns:
+            Number of searches deleted
+        """
+        ids = list(dict.fromkeys(ids))
+        if user_id is not None and ids:
+            ids = list(db.scalars(
+                select(Search.id).where(Search.id.in_(ids), Search.user_id == user_id)
+            ))
+
+        user_ids = {user_id} if user_id is not None else self._affected_user_ids(db, ids)
+        deleted = 0
+        for start in range(0, len(ids), batch_size):
+            deleted += self._delete_searches(db, ids[start:start + batch_size])
+            db.commit()
+        query_cache.invalidate(self.cache_namespaces, user_ids)
+        candidate_store.invalidate(ids)
+        return deleted
+
+    def _affected_user_ids(self, db: Session, ids: Iterable[Any]) -> Set[int]:
+        """
+        Search-derived results are cached per owning user
+        """
+        return set(db.scalars(select(Search.user_id).where(Search.id.in_(list(ids)))))
+
+    def _delete_searches(self, db: Session, ids: Sequence[int]) -> int:
+        """
+        Issue the DELETE statements for one batch of searches
+
+        The statements are ordered leaf-first, so this also works on databases
+        created before the ON DELETE CASCADE constraints existed.
+        """
+        if not ids:
+            return 0
+        recommendation_ids = (
+            select(Recommendation.id)
+            .where(Recommendation.search_id.in_(ids))
+            .scalar_subquery()
+        )
+        no_sync = {"synchronize_session": False}
+
+        db.execute(
+            update(Notification)
+            .where(Notification.recommendation_id.in_(recommendation_ids))
+            .values(recommendation_id=None),
+            execution_options=no_sync,
+        )
+        db.execute(
+            delete(PackingSuggestion).where(PackingSuggestion.recommendation_id.in_(recommendation_ids)),
+            execution_options=no_sync,
+        )
+        db.execute(
+            delete(PriceWatch).where(PriceWatch.saved_deal_id.in_(
+                select(SavedDeal.id).where(SavedDeal.recommendation_id.in_(recommendation_ids))
+            )),
+            execution_options=no_sync,
+        )
+        db.execute(
+            delete(SavedDeal).where(SavedDeal.recommendation_id.in_(recommendation_ids)),
+            execution_options=no_sync,
+        )
+        for child in (Recommendation, Flight, Hotel, Weather, Event):
+            db.execute(delete(child).where(child.search_id.in_(ids)), execution_options=no_sync)
+
+        result = db.execute(delete(Search).where(Search.id.in_(ids)), execution_options=no_sync)
+        return result.rowcount
 
 
 search = CRUDSearch(Search)
@@ -1,11 +1,15 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
+from app.api import deps
 from app.api.api_v1.api import api_router
 from app.core.config import settings
 from app.services import init_services
+from app.services.ai.packing_rules import packing_list_rules, recommendation_packing_rules
+from app.services.cache import llm_cache, query_cache, scrape_cache
+from app.services.scraper.price_filter import flight_price_filter, hotel_price_filter
 from app.core.logging_config import configure_logging
 from app.middleware.cors_logger import CORSLoggerMiddleware
 
@@ -84,4 +88,33 @@ def test_cors():
     return {
         "cors_configured": True,
         "allowed_origins": settings.BACKEND_CORS_ORIGINS
+    }
+
+
+@app.get("/cache-stats")
+def cache_stats(current_user=Depends(deps.get_current_active_superuser)):
+    """
+    Hit/miss counters and hit ratios of the per-user query cache, the LLM
+    response cache, the scrape cache and the packing rule memos (superusers only)
+    """
+    return {
+        "query_cache": query_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "scrape_cache": scrape_cache.stats(),
+        "packing_rules": {
+            "packing_list": packing_list_rules.stats(),
+            "recommendations": recommendation_packing_rules.stats()
+        }
+    }
+
+
+@app.get("/price-filter-stats")
+def price_filter_stats(current_user=Depends(deps.get_current_active_superuser)):
+    """
+    Counters of checked, invalid and outlier scraped prices and of the
+    actions taken, for flights and hotels (superusers only)
+    """
+    return {
+        "flights": flight_price_filter.stats(),
+        "hotels": hotel_price_filter.stats()
     }
\ No newline at end of file
@@ -5,6 +5,9 @@ from .flight import Flight
 from .hotel import Hotel
 from .notification import Notification
 from .packing_suggestion import PackingSuggestion
+from .price_stat import PriceStat
+from .price_trend import PriceTrend
+from .price_watch import PriceWatch
 from .recommendation import Recommendation
 from .saved_deal import SavedDeal
 from .user import User
@@ -17,6 +20,9 @@ __all_models = [
     Hotel,
     Notification,
     PackingSuggestion,
+    PriceStat,
+    PriceTrend,
+    PriceWatch,
     Recommendation,
     SavedDeal,
     User,
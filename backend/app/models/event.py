@@ -7,7 +7,7 @@ from app.db.base_class import Base
 
 class Event(Base):
     id = Column(Integer, primary_key=True, index=True)
-    search_id = Column(Integer, ForeignKey("search.id"))
+    search_id = Column(Integer, ForeignKey("search.id", ondelete="CASCADE"), index=True)
     title = Column(String)
     description = Column(Text, nullable=True)
     location = Column(String)
@@ -23,7 +23,7 @@ class Event(Base):
     source_url = Column(String)
     image_url = Column(String, nullable=True)
     details = Column(JSON, nullable=True)  # Additional event details
-    created_at = Column(DateTime, default= (datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     search = relationship("Search", back_populates="events")
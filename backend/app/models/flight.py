@@ -7,7 +7,7 @@ from app.db.base_class import Base
 
 class Flight(Base):
     id = Column(Integer, primary_key=True, index=True)
-    search_id = Column(Integer, ForeignKey("search.id"))
+    search_id = Column(Integer, ForeignKey("search.id", ondelete="CASCADE"), index=True)
     airline = Column(String)
     flight_number = Column(String)
     origin = Column(String)
@@ -21,7 +21,7 @@ class Flight(Base):
     source_website = Column(String)  # Skyscanner, Google Flights, Expedia
     source_url = Column(String)
     details = Column(JSON, nullable=True)  # Additional flight details
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     search = relationship("Search", back_populates="flights")
@@ -7,7 +7,7 @@ from app.db.base_class import Base
 
 class Hotel(Base):
     id = Column(Integer, primary_key=True, index=True)
-    search_id = Column(Integer, ForeignKey("search.id"))
+    search_id = Column(Integer, ForeignKey("search.id", ondelete="CASCADE"), index=True)
     name = Column(String)
     location = Column(String)
     latitude = Column(Float, nullable=True)
@@ -21,7 +21,7 @@ class Hotel(Base):
     source_url = Column(String)
     image_url = Column(String, nullable=True)
     details = Column(JSON, nullable=True)  # Additional hotel details
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     search = relationship("Search", back_populates="hotels")
@@ -11,9 +11,9 @@ class Notification(Base):
     title = Column(String)
     message = Column(Text)
     type = Column(String)  # price_alert, weather_alert, deal_alert
-    recommendation_id = Column(Integer, ForeignKey("recommendation.id"), nullable=True)
+    recommendation_id = Column(Integer, ForeignKey("recommendation.id", ondelete="SET NULL"), nullable=True)
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     user = relationship("User", back_populates="notifications")
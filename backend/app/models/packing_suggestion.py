@@ -7,10 +7,10 @@ from app.db.base_class import Base
 
 class PackingSuggestion(Base):
     id = Column(Integer, primary_key=True, index=True)
-    recommendation_id = Column(Integer, ForeignKey("recommendation.id"))
+    recommendation_id = Column(Integer, ForeignKey("recommendation.id", ondelete="CASCADE"), index=True)
     category = Column(String)  # clothing, accessories, documents, etc.
     items = Column(Text)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     recommendation = relationship("Recommendation", back_populates="packing_suggestions")
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, UniqueConstraint
+
+from app.db.base_class import Base
+
+
+class PriceStat(Base):
+    """
+    Running price statistics of one route or property, updated as scrapes arrive
+    
+    One fixed-size row per key, whatever the length of the price history.
+    """
+    __table_args__ = (UniqueConstraint("kind", "key"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)  # flight, hotel
+    key = Column(String, index=True)  # Route ("JFK-LAX") or property ("paris|grand hotel")
+    currency = Column(String, default="USD")
+    count = Column(Integer, default=0)
+    mean = Column(Float, default=0.0)  # Welford mean and sum of squared deviations of price
+    m2 = Column(Float, default=0.0)
+    ewma = Column(Float, nullable=True)  # Exponentially weighted moving average of price
+    min_price = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    time_mean = Column(Float, default=0.0)  # Mean and squared deviations of observation time (days)
+    time_m2 = Column(Float, default=0.0)
+    co_moment = Column(Float, default=0.0)  # Sum of time x price deviation products (trend slope)
+    first_observed_at = Column(DateTime, nullable=True)
+    last_observed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, UniqueConstraint
+
+from app.db.base_class import Base
+
+
+class PriceTrend(Base):
+    """
+    Fitted price trend of one route or property, refreshed by the batch trend job
+    """
+    __table_args__ = (UniqueConstraint("kind", "key"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, index=True)  # flight, hotel
+    key = Column(String, index=True)  # Same keys as PriceStat
+    currency = Column(String, default="USD")
+    observations = Column(Integer)
+    slope_per_day = Column(Float)  # Linear trend with its 95% confidence interval
+    slope_ci_low = Column(Float, nullable=True)
+    slope_ci_high = Column(Float, nullable=True)
+    level = Column(Float)  # Fitted price at the last observation
+    forecast = Column(JSON)  # [{"date": ..., "price": ...}] for the following days
+    last_observed_at = Column(DateTime)
+    fitted_at = Column(DateTime)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Float, Index
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+
+
+class PriceWatch(Base):
+    """
+    Price threshold of a saved deal's flight or hotel, checked against new scrapes
+    
+    Indexed by (kind, key, travel_date, threshold) so a new price only has to
+    look up the watches of its own route/property and date that it undercuts.
+    """
+    __table_args__ = (Index("ix_pricewatch_lookup", "kind", "key", "travel_date", "threshold"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    saved_deal_id = Column(Integer, ForeignKey("saveddeal.id", ondelete="CASCADE"), index=True)
+    user_id = Column(Integer, ForeignKey("user.id"))
+    recommendation_id = Column(Integer, ForeignKey("recommendation.id", ondelete="SET NULL"), nullable=True)
+    kind = Column(String)  # flight, hotel
+    key = Column(String)  # Same keys as PriceStat
+    travel_date = Column(Date)  # Departure or check-in date
+    reference_price = Column(Float)  # Price when saved, or at the last alert (base currency)
+    threshold = Column(Float)  # Prices at or below this trigger an alert
+    last_alert_price = Column(Float, nullable=True)
+    last_alerted_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    saved_deal = relationship("SavedDeal", back_populates="price_watches")
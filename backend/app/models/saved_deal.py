@@ -8,10 +8,11 @@ from app.db.base_class import Base
 class SavedDeal(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("user.id"))
-    recommendation_id = Column(Integer, ForeignKey("recommendation.id"))
+    recommendation_id = Column(Integer, ForeignKey("recommendation.id", ondelete="CASCADE"))
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     user = relationship("User", back_populates="saved_deals")
     recommendation = relationship("Recommendation")
+    price_watches = relationship("PriceWatch", back_populates="saved_deal", cascade="all, delete-orphan")
@@ -18,14 +18,15 @@ class Search(Base):
     preferences = Column(JSON, nullable=True)  # Store user preferences like weather, activities, etc.   
     status = Column(String, default="processing")  # processing, completed, failed
     error_message = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
-    updated_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc), onupdate=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), onupdate=lambda: datetime.datetime.now(datetime.timezone.utc))
     is_active = Column(Boolean, default=True)
     
     # Relationships
     user = relationship("User", back_populates="searches")
-    flights = relationship("Flight", back_populates="search")
-    hotels = relationship("Hotel", back_populates="search")
-    weather_data = relationship("Weather", back_populates="search")
-    events = relationship("Event", back_populates="search")
-    recommendations = relationship("Recommendation", back_populates="search")
+    # Children are removed by ON DELETE CASCADE; passive_deletes keeps the ORM from loading them
+    flights = relationship("Flight", back_populates="search", cascade="all, delete-orphan", passive_deletes=True)
+    hotels = relationship("Hotel", back_populates="search", cascade="all, delete-orphan", passive_deletes=True)
+    weather_data = relationship("Weather", back_populates="search", cascade="all, delete-orphan", passive_deletes=True)
+    events = relationship("Event", back_populates="search", cascade="all, delete-orphan", passive_deletes=True)
+    recommendations = relationship("Recommendation", back_populates="search", cascade="all, delete-orphan", passive_deletes=True)
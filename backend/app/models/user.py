@@ -15,8 +15,8 @@ class User(Base):
     email_verified = Column(Boolean(), default=False)
     verification_token = Column(String, nullable=True)
     verification_token_expires = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
-    updated_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc), onupdate=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc), onupdate=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     searches = relationship("Search", back_populates="user")
@@ -7,7 +7,7 @@ from app.db.base_class import Base
 
 class Weather(Base):
     id = Column(Integer, primary_key=True, index=True)
-    search_id = Column(Integer, ForeignKey("search.id"))
+    search_id = Column(Integer, ForeignKey("search.id", ondelete="CASCADE"), index=True)
     location = Column(String)
     date = Column(DateTime)
     temperature_high = Column(Float)
@@ -18,7 +18,7 @@ class Weather(Base):
     wind_speed = Column(Float, nullable=True)
     source_website = Column(String)  # Weather.com, AccuWeather
     details = Column(JSON, nullable=True)  # Additional weather details
-    created_at = Column(DateTime, default=datetime.datetime.now(datetime.timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.timezone.utc))
     
     # Relationships
     search = relationship("Search", back_populates="weather_data")
@@ -1,42 +1,28 @@
-from typing import Optional, Dict, Any
+from typing import Optional
 from pydantic import BaseModel
 import datetime
 
 
 class SavedDealBase(BaseModel):
-    """Base saved deal schema"""
-    user_id: int
-    search_id: Optional[int] = None
-    type: str  # 'flight', 'hotel', 'package', etc.
-    provider: str
-    title: str
-    description: Optional[str] = None
-    price: float
-    currency: str = "USD"
-    url: str
-    details: Dict[str, Any] = {}
-    image_url: Optional[str] = None
+    """Base saved deal schema: a recommendation the user kept"""
+    recommendation_id: int
+    notes: Optional[str] = None
 
 
 class SavedDealCreate(SavedDealBase):
-    """Schema for saved deal creation"""
+    """Schema for saved deal creation (the owner is the current user)"""
     pass
 
 
 class SavedDealUpdate(BaseModel):
     """Schema for saved deal update"""
-    title: Optional[str] = None
-    description: Optional[str] = None
-    price: Optional[float] = None
-    currency: Optional[str] = None
-    url: Optional[str] = None
-    details: Optional[Dict[str, Any]] = None
-    image_url: Optional[str] = None
+    notes: Optional[str] = None
 
 
 class SavedDeal(SavedDealBase):
     """API schema for saved deal data"""
     id: int
+    user_id: int
     created_at: datetime.datetime
     
     model_config = {
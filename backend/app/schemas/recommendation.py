@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
@@ -36,3 +36,31 @@ class Recommendation(RecommendationBase):
     model_config = {
         "from_attributes": True
     }
+
+
+class RerankWeights(BaseModel):
+    """Weights of the component scores; normalized to sum to 1"""
+    price: float = Field(0.4, ge=0)
+    weather: float = Field(0.4, ge=0)
+    convenience: float = Field(0.2, ge=0)
+
+
+class RerankRequest(BaseModel):
+    """Schema for re-ranking the scored candidates of a search"""
+    weights: RerankWeights = RerankWeights()
+    top_k: int = Field(5, ge=1, le=100)
+    max_total_price: Optional[float] = None
+    max_layovers: Optional[int] = None
+    max_duration_minutes: Optional[float] = None
+    min_hotel_rating: Optional[float] = None
+
+
+class RankedCandidate(BaseModel):
+    """A flight and hotel pair with its re-ranked score"""
+    flight_id: int
+    hotel_id: int
+    score: float
+    price_score: float
+    weather_score: float
+    convenience_score: float
+    total_price: float
@@ -47,6 +47,17 @@ class SearchWithResults(Search):
     events: Optional[List[Any]] = None
     
     
+class ExploreRequest(BaseModel):
+    """Request body for comparing many destinations from one origin"""
+    departure_location: str
+    destinations: List[str] = Field(..., min_length=1)
+    departure_date: date
+    return_date: date
+    adults: int = 1
+    children: int = 0
+    budget: Optional[float] = None
+
+
 class SearchResponse(BaseModel):
     """Response model for search API endpoints"""
     search_id: Optional[int] = None
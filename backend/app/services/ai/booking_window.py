@@ -0,0 +1,319 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.ai.price_stats import PriceStatsTracker
+from app.services.ai.records import days_since_epoch, parse_datetime
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+from app.services.scraper.entity_resolution import hotel_resolver
+
+logger = logging.getLogger(__name__)
+
+# Lead-time buckets (days before departure): [0, 7), [7, 14), ... [270, 366)
+LEAD_BUCKET_EDGES = (0, 7, 14, 21, 30, 45, 60, 90, 120, 180, 270, 366)
+MAX_LEAD_DAYS = LEAD_BUCKET_EDGES[-1]
+_LEAD_BUCKETS = len(LEAD_BUCKET_EDGES) - 1
+_BUCKET_OF_LEAD = np.searchsorted(LEAD_BUCKET_EDGES, np.arange(MAX_LEAD_DAYS), side="right") - 1
+
+KINDS = ("flight", "hotel")
+
+# Table rows tried for a lookup, most specific first: (destination?, month?)
+_FALLBACKS = ((True, True), (True, False), (False, True), (False, False))
+_SOURCES = {
+    (True, True): "destination and month",
+    (True, False): "destination",
+    (False, True): "all destinations in this month",
+    (False, False): "all destinations",
+}
+
+
+@dataclass(frozen=True)
+class _Tables:
+    """
+    One built set of lookup tables; replaced as a whole on every rebuild
+    """
+    clusters: Dict[str, int]  # Normalized destination -> row; the last row is all destinations
+    curve: np.ndarray  # (kind, cluster, month 0..12, bucket) expected price / route-month average; NaN if unknown
+    counts: np.ndarray  # Observations behind each curve cell
+    best_upto: np.ndarray  # (kind, cluster, month, bucket) cheapest known bucket at or below each bucket
+    known: np.ndarray  # (kind, cluster, month) number of known buckets
+    built_at: datetime.datetime
+
+
+class BookingWindowTables:
+    """
+    Data-driven booking lead-time tables, rebuilt by a scheduled batch job
+
+    From the stored price history (scrape time versus departure date) the
+    job computes, per destination cluster, departure month and lead-time
+    bucket, the expected price relative to the average price of the same
+    route and month: the price curve over lead time. Clusters are normalized
+    destinations, with an all-destinations cluster and an all-months row as
+    fallbacks for sparse data. The cheapest bucket reachable from every
+    bucket (a trip can only be booked later, at a shorter lead time) is
+    precomputed, so a prediction is a handful of array lookups. The tables
+    are small NumPy arrays held in process and swapped atomically.
+    """
+
+    def __init__(self,
+                 history_days: int = settings.PRICE_TREND_HISTORY_DAYS,
+                 min_cell_observations: int = settings.BOOKING_TABLES_MIN_CELL_OBSERVATIONS,
+                 refresh_seconds: int = settings.BOOKING_TABLES_REFRESH_SECONDS,
+                 currency_converter: Optional[CurrencyConverter] = None):
+        """
+        Initialize the tables (empty until built)
+
+        Args:
+            history_days: Days of scraped price history used
+            min_cell_observations: Observations a bucket needs before its price is used
+            refresh_seconds: Time between rebuilds of the periodic job
+            currency_converter: Converts prices to the base currency (the shared converter if None)
+        """
+        self.history_days = history_days
+        self.min_cell_observations = min_cell_observations
+        self.refresh_seconds = refresh_seconds
+        self.currency_converter = currency_converter or default_currency_converter
+        self._tables: Optional[_Tables] = None
+
+    @staticmethod
+    def cluster_of(destination: Optional[str]) -> str:
+        """
+        Destination cluster of a destination name
+        """
+        return hotel_resolver.normalize_name(destination)[0]
+
+    def build(self, db: Session, now: Optional[datetime.datetime] = None) -> int:
+        """
+        Rebuild the tables from the stored flight and hotel price history
+
+        Args:
+            db: Database session
+            now: Time of the build (now if None)
+
+        Returns:
+            Number of observations used
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        since = now - datetime.timedelta(days=self.history_days)
+        flights = crud.flight.get_price_history(db, since=since)
+        hotels = crud.hotel.get_price_history(db, since=since)
+
+        return self.build_from_history(
+            kinds=["flight"] * len(flights) + ["hotel"] * len(hotels),
+            destinations=[f["search_destination"] for f in flights] + [h["location"] for h in hotels],
+            series=[PriceStatsTracker.route_key(f["origin"], f["destination"]) for f in flights]
+            + [PriceStatsTracker.property_key(h["name"], h["location"]) for h in hotels],
+            departure_dates=[f["departure_date"] for f in flights] + [h["departure_date"] for h in hotels],
+            observed_at=[f["observed_at"] for f in flights] + [h["observed_at"] for h in hotels],
+            prices=[f["price"] for f in flights] + [h["price_per_night"] for h in hotels],
+            currencies=[f["currency"] for f in flights] + [h["currency"] for h in hotels],
+            now=now,
+        )
+
+    def build_from_history(self,
+                           kinds: Sequence[str],
+                           destinations: Sequence[Optional[str]],
+                           series: Sequence[Optional[str]],
+                           departure_dates: Sequence[Any],
+                           observed_at: Sequence[Any],
+                           prices: Sequence[Optional[float]],
+                           currencies: Sequence[Optional[str]],
+                           now: Optional[datetime.datetime] = None) -> int:
+        """
+        Rebuild the tables from price observations
+
+        Args:
+            kinds: "flight" or "hotel" per observation
+            destinations: Search destination per observation
+            series: Route or property key per observation; prices are compared
+                with the average of the same key and departure month
+            departure_dates: Departure (check-in) date per observation
+            observed_at: Scrape time per observation
+            prices: Observed prices
+            currencies: Currency code per price
+            now: Time of the build (now if None)
+
+        Returns:
+            Number of observations used
+        """
+        prices = self.currency_converter.to_base(
+            np.array([np.nan if p is None else p for p in prices], dtype=np.float64), currencies
+        )
+        departure_days = np.array([_day_number(d) for d in departure_dates], dtype=np.float64)
+        observed_days = np.array([_day_number(d) for d in observed_at], dtype=np.float64)
+        lead = departure_days - observed_days
+        usable = (~np.isnan(prices) & (prices > 0) & ~np.isnan(lead) & (lead >= 0) & (lead < MAX_LEAD_DAYS)
+                  & np.array([s is not None and d is not None for s, d in zip(series, destinations)], dtype=bool))
+        rows = np.flatnonzero(usable)
+
+        cluster_names = [self.cluster_of(destinations[i]) for i in rows]
+        clusters = {name: index for index, name in enumerate(sorted(set(cluster_names)))}
+        all_clusters = len(clusters)
+        kind = np.array([KINDS.index(kinds[i]) for i in rows], dtype=np.intp)
+        cluster = np.array([clusters[name] for name in cluster_names], dtype=np.intp)
+        month = _month_of_day(departure_days[rows])
+        bucket = _BUCKET_OF_LEAD[lead[rows].astype(np.intp)]
+        prices = prices[rows]
+
+        # Price relative to the average of the same route/property and departure month
+        labels = np.array([f"{kinds[i]}|{series[i]}|{m}" for i, m in zip(rows.tolist(), month.tolist())],
+                          dtype=object).astype(str)
+        group = np.unique(labels, return_inverse=True)[1].reshape(-1)
+        group_counts = np.bincount(group)
+        group_means = np.bincount(group, weights=prices) / np.maximum(group_counts, 1)
+        comparable = group_counts[group] >= 2
+        ratio = prices / group_means[group]
+
+        # Accumulate every observation into its (cluster, month) cell and the fallback rows
+        shape = (len(KINDS), all_clusters + 1, 13, _LEAD_BUCKETS)
+        sums = np.zeros(int(np.prod(shape)))
+        counts = np.zeros(int(np.prod(shape)))
+        for cluster_index, month_index in ((cluster, month), (cluster, 0), (all_clusters, month), (all_clusters, 0)):
+            flat = np.ravel_multi_index(
+                np.broadcast_arrays(kind, cluster_index, month_index, bucket), shape
+            )[comparable]
+            sums += np.bincount(flat, weights=ratio[comparable], minlength=sums.size)
+            counts += np.bincount(flat, minlength=counts.size)
+        sums, counts = sums.reshape(shape), counts.reshape(shape)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            curve = np.where(counts >= self.min_cell_observations, sums / counts, np.nan)
+
+        # Cheapest known bucket at or below each bucket (bookable from there by waiting)
+        best_upto = np.full(shape, -1, dtype=np.intp)
+        best_value = np.full(shape[:3], np.inf)
+        best_index = np.full(shape[:3], -1, dtype=np.intp)
+        for b in range(_LEAD_BUCKETS):
+            better = curve[..., b] < best_value
+            best_value = np.where(better, curve[..., b], best_value)
+            best_index = np.where(better, b, best_index)
+            best_upto[..., b] = best_index
+
+        self._tables = _Tables(
+            clusters=clusters,
+            curve=curve,
+            counts=counts,
+            best_upto=best_upto,
+            known=(~np.isnan(curve)).sum(axis=-1),
+            built_at=now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None),
+        )
+        used = int(comparable.sum())
+        logger.info(f"Built booking window tables from {used} prices, {all_clusters} destinations")
+        return used
+
+    def lookup(self,
+               kind: str,
+               destination: Optional[str],
+               departure_date: Any,
+               today: Optional[datetime.date] = None) -> Optional[Dict[str, Any]]:
+        """
+        Expected price curve and best booking window for a trip
+
+        Args:
+            kind: "flight" or "hotel"
+            destination: Trip destination
+            departure_date: Departure (check-in) date
+            today: Booking date (today if None)
+
+        Returns:
+            Dict with "lead_days", the current bucket's "expected_price_index"
+            (1.0 = the route's average price), the "best_window" reachable by
+            waiting (lead days range and expected savings versus booking now),
+            the full "curve" and the table row used as "source"; None when
+            there is no usable data for this trip
+        """
+        tables = self._tables
+        if tables is None or kind not in KINDS:
+            return None
+        departure_day = _day_number(departure_date)
+        today_day = _day_number(today or datetime.date.today())
+        if np.isnan(departure_day):
+            return None
+        lead = int(departure_day - today_day)
+        if not 0 <= lead < MAX_LEAD_DAYS:
+            return None
+
+        k = KINDS.index(kind)
+        bucket = int(_BUCKET_OF_LEAD[lead])
+        month = int(_month_of_day(departure_day))
+        cluster = tables.clusters.get(self.cluster_of(destination))
+        for use_cluster, use_month in _FALLBACKS:
+            if use_cluster and cluster is None:
+                continue
+            c = cluster if use_cluster else len(tables.clusters)
+            m = month if use_month else 0
+            current = tables.curve[k, c, m, bucket]
+            best = tables.best_upto[k, c, m, bucket]
+            if tables.known[k, c, m] >= 2 and not np.isnan(current) and best >= 0:
+                break
+        else:
+            return None
+
+        best_index = tables.curve[k, c, m, best]
+        return {
+            "lead_days": lead,
+            "expected_price_index": float(current),
+            "best_window": {
+                "lead_days_from": LEAD_BUCKET_EDGES[best],
+                "lead_days_to": LEAD_BUCKET_EDGES[best + 1] - 1,
+                "expected_price_index": float(best_index),
+                "expected_savings_percent": float((1 - best_index / current) * 100),
+                "book_now": bool(best == bucket),
+            },
+            "curve": [
+                {"lead_days_from": LEAD_BUCKET_EDGES[b], "lead_days_to": LEAD_BUCKET_EDGES[b + 1] - 1,
+                 "expected_price_index": float(value)}
+                for b, value in enumerate(tables.curve[k, c, m].tolist()) if not np.isnan(value)
+            ],
+            "source": _SOURCES[(use_cluster, use_month)],
+        }
+
+    def build_with_new_session(self) -> int:
+        """
+        Rebuild the tables with their own database session (for the background task)
+        """
+        db = SessionLocal()
+        try:
+            return self.build(db)
+        finally:
+            db.close()
+
+    async def run_periodically(self) -> None:
+        """
+        Rebuild the tables now and every refresh_seconds; run as a background task for the life of the app
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.build_with_new_session)
+            except Exception as e:
+                logger.error(f"Booking window tables build failed: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+def _day_number(value: Any) -> float:
+    """
+    Whole days since the epoch of a date, datetime or ISO string (NaN if missing)
+    """
+    value = parse_datetime(value)
+    if value is None:
+        return np.nan
+    return float(np.floor(days_since_epoch(value)))
+
+
+def _month_of_day(days: Any) -> np.ndarray:
+    """
+    Calendar month (1-12) of day numbers
+    """
+    months = np.asarray(days).astype(np.int64).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return (months % 12 + 1).astype(np.intp)
+
+
+# Global booking window tables
+booking_window_tables = BookingWindowTables()
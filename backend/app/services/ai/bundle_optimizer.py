@@ -0,0 +1,363 @@
+import bisect
+import heapq
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.ai.records import EventRecord, datetime_array, to_records
+from app.services.ai.weather_index import WeatherIndex
+
+logger = logging.getLogger(__name__)
+
+
+class _EventWindow:
+    """
+    Events available during one trip, prepared for knapsack bounds
+
+    Free events are always taken. Paid events are sorted by value density
+    (value per unit of price); prefix sums over that order give the
+    fractional-knapsack upper bound for any budget in O(log n).
+    """
+
+    def __init__(self, indices: np.ndarray, values: np.ndarray, prices: np.ndarray):
+        free = prices <= 0
+        self.free_indices = indices[free].tolist()
+        self.free_value = float(values[free].sum())
+
+        paid_values = values[~free]
+        paid_prices = prices[~free]
+        order = np.argsort(-(paid_values / paid_prices), kind="stable")
+        self.indices = indices[~free][order]
+        self.values = paid_values[order]
+        self.prices = paid_prices[order]
+        self.density = self.values / self.prices
+        self.cum_values = np.concatenate([[0.0], np.cumsum(self.values)])
+        self.cum_prices = np.concatenate([[0.0], np.cumsum(self.prices)])
+
+        # Solved knapsacks: (budget, value, cost, chosen indices)
+        self.solutions: List[Tuple[float, float, float, List[int]]] = []
+
+    def bound(self, budgets: np.ndarray, start: int = 0) -> np.ndarray:
+        """
+        Fractional-knapsack upper bound on the paid-event value from item `start` on
+        """
+        budgets = np.maximum(np.asarray(budgets, dtype=np.float64), 0.0)
+        n = len(self.prices)
+        targets = budgets + self.cum_prices[start]
+        # Number of whole items (from the start of the order) that fit
+        whole = np.searchsorted(self.cum_prices, targets, side="right") - 1
+        whole = np.clip(whole, start, n)
+        value = self.cum_values[whole] - self.cum_values[start]
+        partial = whole < n
+        leftover = targets - self.cum_prices[whole]
+        value[partial] += leftover[partial] * self.density[whole[partial]]
+        return value
+
+    def solve(self, budget: float, max_nodes: int) -> Tuple[float, float, List[int]]:
+        """
+        Exact 0/1 knapsack over the paid events by branch-and-bound
+
+        Returns:
+            Tuple of (total value including free events, cost, chosen event indices)
+        """
+        # An optimum found for a larger budget is still optimal if it fits
+        for solved_budget, value, cost, chosen in self.solutions:
+            if cost <= budget <= solved_budget:
+                return value, cost, chosen
+
+        value, cost, chosen = self._branch_and_bound(budget, max_nodes)
+        result = (self.free_value + value, cost, self.free_indices + chosen)
+        self.solutions.append((budget,) + result)
+        return result
+
+    def _branch_and_bound(self, budget: float, max_nodes: int) -> Tuple[float, float, List[int]]:
+        # Events with the same value and price are interchangeable: branch on how
+        # many of each group to take instead of on every single event
+        groups: List[Tuple[float, float, int, int]] = []  # (value, price, first item, count)
+        values = self.values.tolist()
+        prices = self.prices.tolist()
+        for i, (value, price) in enumerate(zip(values, prices)):
+            if groups and groups[-1][0] == value and groups[-1][1] == price:
+                groups[-1] = groups[-1][:3] + (groups[-1][3] + 1,)
+            else:
+                groups.append((value, price, i, 1))
+
+        density = self.density.tolist()
+        cum_prices = self.cum_prices.tolist()
+        cum_values = self.cum_values.tolist()
+        n = len(prices)
+
+        def bound(i: int, remaining: float) -> float:
+            # Scalar version of bound() from item i on; this runs once per search node
+            target = remaining + cum_prices[i]
+            whole = max(i, min(n, bisect.bisect_right(cum_prices, target) - 1))
+            value = cum_values[whole] - cum_values[i]
+            if whole < n:
+                value += (target - cum_prices[whole]) * density[whole]
+            return value
+
+        def most(group: Tuple[float, float, int, int], remaining: float) -> int:
+            if remaining == float("inf"):
+                return group[3]
+            return min(group[3], int(remaining // group[1]))
+
+        # Greedy solution in density order as the initial incumbent
+        best_value, best_cost, best_items = 0.0, 0.0, None
+        for g, group in enumerate(groups):
+            taken = most(group, budget - best_cost)
+            if taken:
+                best_cost += taken * group[1]
+                best_value += taken * group[0]
+                best_items = (g, taken, best_items)
+
+        # Depth-first search over groups; choices are kept as a linked list of (group, taken, parent)
+        stack = [(0, budget, 0.0, None)]
+        nodes = 0
+        while stack:
+            g, remaining, value, items = stack.pop()
+            if value > best_value + 1e-12:
+                best_value, best_cost, best_items = value, budget - remaining, items
+            if g == len(groups):
+                continue
+            nodes += 1
+            if nodes > max_nodes:
+                logger.debug(f"Event knapsack stopped after {max_nodes} nodes")
+                break
+            group_value, group_price, first, _ = groups[g]
+            if value + bound(first, remaining) <= best_value + 1e-9:
+                continue
+            # Pushed in increasing order so that taking the most is explored first
+            for taken in range(most(groups[g], remaining) + 1):
+                stack.append((
+                    g + 1,
+                    remaining - taken * group_price,
+                    value + taken * group_value,
+                    (g, taken, items) if taken else items,
+                ))
+
+        chosen = []
+        while best_items is not None:
+            g, taken, best_items = best_items
+            first = groups[g][2]
+            chosen.extend(int(index) for index in self.indices[first:first + taken])
+        return best_value, best_cost, sorted(chosen)
+
+
+class BundleOptimizer:
+    """
+    Picks the best flight + hotel + events bundle under a total budget
+
+    A bundle scores its flight and hotel pair like the recommendation engine
+    does (hotel proximity to the events included), plus EVENT_WEIGHT for
+    every unit of event value. The search is
+    branch-and-bound at two levels:
+
+    - Flights are visited by an upper bound on their best bundle, and the
+      search stops once no remaining flight can beat the current top bundles.
+    - For each flight only hotels whose stay fits the remaining budget are
+      scored (a prefix of the hotels sorted by nightly price), so over-budget
+      pairs are never built. Pairs are visited by an upper bound too.
+    - Events are chosen by an exact 0/1 knapsack (branch-and-bound with a
+      fractional bound) over the events during the trip.
+    """
+
+    # Score added per unit of event value
+    EVENT_WEIGHT = 0.05
+
+    # Value of an event, and of an event in one of the preferred categories
+    EVENT_VALUE = 1.0
+    PREFERRED_EVENT_VALUE = 1.5
+
+    # Node limit of one event knapsack search; the best bundle found so far is kept
+    MAX_KNAPSACK_NODES = 50000
+
+    def __init__(self, engine):
+        """
+        Initialize with the RecommendationEngine whose scoring is used
+        """
+        self.engine = engine
+
+    def optimize(self,
+                 flights: List[Dict[str, Any]],
+                 hotels: List[Dict[str, Any]],
+                 weather_data: List[Dict[str, Any]],
+                 events: Optional[List[Dict[str, Any]]] = None,
+                 budget: Optional[float] = None,
+                 preferred_categories: Optional[Sequence[str]] = None,
+                 top_k: int = 1,
+                 chosen_event_ids: Optional[List[int]] = None,
+                 weather_index: Optional[WeatherIndex] = None) -> List[Dict[str, Any]]:
+        """
+        Find the best bundles within the budget
+
+        Args:
+            flights: List of flight data
+            hotels: List of hotel data
+            weather_data: List of weather data
+            events: List of event data (optional)
+            budget: Maximum total price of flight, hotel stay and events in the base
+                currency (None = unlimited)
+            preferred_categories: Event categories worth PREFERRED_EVENT_VALUE
+            top_k: Number of bundles to return (each with a different flight and hotel pair)
+            chosen_event_ids: Events whose distance scores hotel proximity (see
+                RecommendationEngine._proximity_scores)
+            weather_index: Parsed weather_data (built if None)
+
+        Returns:
+            Bundles sorted by bundle_score (descending), each with the component
+            scores of its flight and hotel pair
+        """
+        if not flights or not hotels or top_k <= 0:
+            return []
+        budget = float("inf") if budget is None else float(budget)
+        events = events or []
+
+        engine = self.engine
+        flight_arrays = engine._flight_arrays(flights)
+        hotel_arrays = engine._hotel_arrays(hotels, events, chosen_event_ids)
+        flight_weather = (weather_index or WeatherIndex(weather_data)).mean_scores(
+            flight_arrays["departure"].astype("datetime64[D]").astype(np.int64),
+            flight_arrays["arrival"].astype("datetime64[D]").astype(np.int64),
+        )
+
+        # Hotels sorted by nightly price: the affordable ones are always a prefix
+        hotel_order = np.argsort(hotel_arrays["price_per_night"], kind="stable")
+        sorted_hotels = {key: values[hotel_order] for key, values in hotel_arrays.items()}
+        nightly = sorted_hotels["price_per_night"]
+
+        event_starts, event_values, event_prices = self._event_arrays(events, preferred_categories)
+        event_order = np.argsort(event_starts, kind="stable")
+        sorted_starts = event_starts[event_order]
+        windows: Dict[Tuple[int, int], _EventWindow] = {}
+
+        def event_window(f: int) -> _EventWindow:
+            lo = int(np.searchsorted(sorted_starts, flight_arrays["departure"][f], side="left"))
+            hi = int(np.searchsorted(sorted_starts, flight_arrays["arrival"][f], side="right"))
+            if (lo, hi) not in windows:
+                indices = event_order[lo:hi]
+                windows[(lo, hi)] = _EventWindow(indices, event_values[indices], event_prices[indices])
+            return windows[(lo, hi)]
+
+        # Upper bound per flight: cheapest hotel price, most convenient hotel, most event value.
+        # The hotel's share of the convenience score does not depend on the flight, so the
+        # most convenient hotel for one flight is the most convenient for all of them.
+        stay_budget = budget - flight_arrays["price"]
+        cheapest_cost = flight_arrays["price"] + nightly[0] * flight_arrays["nights"]
+        first_flight = {key: values[:1] for key, values in flight_arrays.items()}
+        best_hotel = int(np.argmax(engine._convenience_scores(first_flight, sorted_hotels)[0]))
+        best_convenience = engine._convenience_scores(
+            flight_arrays, {key: values[best_hotel:best_hotel + 1] for key, values in sorted_hotels.items()}
+        )[:, 0]
+        flight_bounds = (
+            engine.PRICE_WEIGHT * engine._price_scores(cheapest_cost)
+            + engine.WEATHER_WEIGHT * flight_weather
+            + engine.CONVENIENCE_WEIGHT * best_convenience
+        )
+
+        # Add the most event value each flight's trip could buy with the rest of the budget
+        for f in range(len(flights)):
+            if cheapest_cost[f] > budget:
+                flight_bounds[f] = -np.inf
+                continue
+            window = event_window(f)
+            flight_bounds[f] += self.EVENT_WEIGHT * (
+                window.free_value + float(window.bound([budget - cheapest_cost[f]])[0])
+            )
+
+        top: List[Tuple[float, int, Dict[str, Any]]] = []  # min-heap of (score, tiebreak, bundle)
+        tiebreak = itertools.count()
+        for f in np.argsort(-flight_bounds, kind="stable").tolist():
+            if flight_bounds[f] == -np.inf:
+                break
+            if len(top) == top_k and flight_bounds[f] <= top[0][0]:
+                # Flights are visited by bound, so no later flight can do better
+                break
+            window = event_window(f)
+
+            # Budget pushed into candidate generation: only affordable hotels are scored
+            nights = flight_arrays["nights"][f]
+            affordable = int(np.searchsorted(nightly, stay_budget[f] / nights, side="right"))
+            costs = flight_arrays["price"][f] + nightly[:affordable] * nights
+            affordable = int(np.count_nonzero(costs <= budget))
+            if affordable == 0:
+                continue
+            costs = costs[:affordable]
+            flight_row = {key: values[f:f + 1] for key, values in flight_arrays.items()}
+            hotel_slice = {key: values[:affordable] for key, values in sorted_hotels.items()}
+            price_scores = engine._price_scores(costs)
+            convenience_scores = engine._convenience_scores(flight_row, hotel_slice)[0]
+            pair_scores = (
+                engine.PRICE_WEIGHT * price_scores
+                + engine.WEATHER_WEIGHT * flight_weather[f]
+                + engine.CONVENIENCE_WEIGHT * convenience_scores
+            )
+            pair_bounds = pair_scores + self.EVENT_WEIGHT * (window.free_value + window.bound(budget - costs))
+
+            for h in np.argsort(-pair_bounds, kind="stable").tolist():
+                if len(top) == top_k and pair_bounds[h] <= top[0][0]:
+                    break
+                event_value, event_cost, chosen = window.solve(
+                    budget - float(costs[h]), self.MAX_KNAPSACK_NODES
+                )
+                score = float(pair_scores[h]) + self.EVENT_WEIGHT * event_value
+                if len(top) < top_k or score > top[0][0]:
+                    bundle = self._bundle(
+                        flights, hotels, events, f, int(hotel_order[h]), float(costs[h]),
+                        {
+                            "price_score": float(price_scores[h]),
+                            "weather_score": float(flight_weather[f]),
+                            "convenience_score": float(convenience_scores[h]),
+                        },
+                        float(pair_scores[h]), score, event_cost, chosen, budget,
+                    )
+                    entry = (score, -next(tiebreak), bundle)
+                    if len(top) < top_k:
+                        heapq.heappush(top, entry)
+                    else:
+                        heapq.heapreplace(top, entry)
+
+        return [bundle for _, _, bundle in sorted(top, key=lambda entry: entry[0], reverse=True)]
+
+    def _event_arrays(self, events: List[Dict[str, Any]],
+                      preferred_categories: Optional[Sequence[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Start times, values and prices of the events that have a start time
+        """
+        preferred = set(preferred_categories or ())
+        events = to_records(events, EventRecord)
+        # Missing start times become NaT
+        starts = datetime_array([event.start_date for event in events])
+        values = [self.PREFERRED_EVENT_VALUE if event.category in preferred else self.EVENT_VALUE
+                  for event in events]
+        prices = self.engine.currency_converter.to_base(
+            [0.0 if event.is_free else float(event.price or 0.0) for event in events],
+            [event.currency for event in events],
+        )
+
+        values = np.array(values, dtype=np.float64)
+        # Events without a start time never fall inside a trip
+        values[np.isnat(starts)] = 0.0
+        return starts, values, np.array(prices, dtype=np.float64)
+
+    def _bundle(self, flights, hotels, events, f: int, h: int, pair_cost: float,
+                component_scores: Dict[str, float], pair_score: float, score: float,
+                event_cost: float, chosen: List[int], budget: float) -> Dict[str, Any]:
+        """
+        Build the result dict for one bundle
+        """
+        total_price = pair_cost + event_cost
+        return {
+            "flight": flights[f],
+            "hotel": hotels[h],
+            "events": [events[i] for i in chosen],
+            **component_scores,
+            "score": pair_score,
+            "bundle_score": score,
+            "total_price": pair_cost,
+            "events_price": event_cost,
+            "bundle_price": total_price,
+            "remaining_budget": None if budget == float("inf") else budget - total_price,
+            "currency": self.engine.currency_converter.base_currency
+        }
@@ -0,0 +1,144 @@
+import io
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Component score matrices, in the order the weights are given
+SCORE_COMPONENTS = ("price_score", "weather_score", "convenience_score")
+
+
+def top_k_indices(scores: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+    """
+    Indices of the top_k highest scores, sorted descending (all indices if top_k is None)
+    """
+    if top_k is None or top_k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    if top_k <= 0:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class CandidateMatrix:
+    """
+    Scored flight x hotel candidates of one search, ready for re-ranking
+
+    Holds the component scores and total price of every pair as float32
+    matrices, plus the flight and hotel fields that filters need, so new
+    weights and filters can be applied without touching the scraped rows.
+    Serializes to a compact binary blob (uncompressed .npz) for caching.
+    """
+
+    def __init__(self,
+                 flight_ids: np.ndarray,
+                 hotel_ids: np.ndarray,
+                 price_score: np.ndarray,
+                 weather_score: np.ndarray,
+                 convenience_score: np.ndarray,
+                 total_price: np.ndarray,
+                 layovers: np.ndarray,
+                 duration_minutes: np.ndarray,
+                 hotel_rating: np.ndarray):
+        """
+        Initialize from per-pair matrices (flights x hotels) and per-flight/per-hotel arrays
+        """
+        self.flight_ids = np.asarray(flight_ids, dtype=np.int64)
+        self.hotel_ids = np.asarray(hotel_ids, dtype=np.int64)
+        self.price_score = np.ascontiguousarray(price_score, dtype=np.float32)
+        self.weather_score = np.ascontiguousarray(weather_score, dtype=np.float32)
+        self.convenience_score = np.ascontiguousarray(convenience_score, dtype=np.float32)
+        self.total_price = np.ascontiguousarray(total_price, dtype=np.float32)
+        self.layovers = np.asarray(layovers, dtype=np.int16)
+        self.duration_minutes = np.asarray(duration_minutes, dtype=np.float32)
+        self.hotel_rating = np.asarray(hotel_rating, dtype=np.float32)
+
+    @property
+    def shape(self):
+        return self.price_score.shape
+
+    def rank(self,
+             weights: Dict[str, float],
+             top_k: int = 5,
+             max_total_price: Optional[float] = None,
+             max_layovers: Optional[int] = None,
+             max_duration_minutes: Optional[float] = None,
+             min_hotel_rating: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Rank the candidates under new weights and filters
+
+        Args:
+            weights: Weight per score component (price_score, weather_score,
+                convenience_score); missing components weigh 0. Weights are
+                normalized to sum to 1.
+            top_k: Number of candidates to return
+            max_total_price: Drop pairs whose total price is higher
+            max_layovers: Drop flights with more layovers
+            max_duration_minutes: Drop longer flights
+            min_hotel_rating: Drop hotels rated lower (unrated hotels count as 3)
+
+        Returns:
+            Top candidates with flight_id, hotel_id, score, component scores and total_price
+        """
+        weight_values = np.array([float(weights.get(name, 0.0)) for name in SCORE_COMPONENTS])
+        if (weight_values < 0).any() or weight_values.sum() <= 0:
+            raise ValueError("Weights must be non-negative and not all zero")
+        weight_values /= weight_values.sum()
+
+        scores = (
+            weight_values[0] * self.price_score
+            + weight_values[1] * self.weather_score
+            + weight_values[2] * self.convenience_score
+        )
+
+        # Filters on flights and hotels select rows and columns; price filters single pairs
+        flight_ok = np.ones(len(self.flight_ids), dtype=bool)
+        if max_layovers is not None:
+            flight_ok &= self.layovers <= max_layovers
+        if max_duration_minutes is not None:
+            flight_ok &= self.duration_minutes <= max_duration_minutes
+        hotel_ok = np.ones(len(self.hotel_ids), dtype=bool)
+        if min_hotel_rating is not None:
+            hotel_ok &= self.hotel_rating >= min_hotel_rating
+
+        allowed = flight_ok[:, None] & hotel_ok[None, :]
+        if max_total_price is not None:
+            allowed &= self.total_price <= max_total_price
+        scores = np.where(allowed, scores, -np.inf).ravel()
+
+        best = top_k_indices(scores, min(top_k, int(allowed.sum())))
+        flight_indices, hotel_indices = np.unravel_index(best, self.shape)
+
+        return [
+            {
+                "flight_id": int(self.flight_ids[f]),
+                "hotel_id": int(self.hotel_ids[h]),
+                "score": float(scores[i]),
+                "price_score": float(self.price_score[f, h]),
+                "weather_score": float(self.weather_score[f, h]),
+                "convenience_score": float(self.convenience_score[f, h]),
+                "total_price": float(self.total_price[f, h]),
+            }
+            for i, f, h in zip(best.tolist(), flight_indices.tolist(), hotel_indices.tolist())
+        ]
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize to an uncompressed .npz blob (no pickling)
+        """
+        buffer = io.BytesIO()
+        np.savez(buffer, **{name: getattr(self, name) for name in self._fields()})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CandidateMatrix":
+        """
+        Load a matrix serialized with to_bytes
+        """
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in cls._fields()})
+
+    @staticmethod
+    def _fields():
+        return ("flight_ids", "hotel_ids") + SCORE_COMPONENTS + (
+            "total_price", "layovers", "duration_minutes", "hotel_rating"
+        )
@@ -0,0 +1,177 @@
+import asyncio
+import datetime
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.records import FlightRecord, HotelRecord, WeatherDay, to_records
+from app.services.cache.scrape_cache import ScrapeCache, scrape_cache
+from app.services.scraper.entity_resolution import deduplicate_hotels
+from app.services.scraper.price_filter import filter_flight_prices, filter_hotel_prices
+
+logger = logging.getLogger(__name__)
+
+
+class DestinationExplorer:
+    """
+    Rank many destinations for one origin and date window
+
+    Each destination is scraped for flights, hotels and weather, with at most
+    max_concurrency destinations in flight at once. Scrapes go through the
+    shared scrape cache, so destinations already explored or searched for the
+    same dates are not scraped again. Every destination is reduced to its best
+    flight and hotel combination as soon as its data arrives; engine scores
+    are on an absolute scale, so these can be ranked against each other.
+    """
+
+    def __init__(self,
+                 flight_scraper,
+                 hotel_scraper,
+                 weather_scraper,
+                 engine: Optional[RecommendationEngine] = None,
+                 max_concurrency: Optional[int] = None,
+                 cache: ScrapeCache = scrape_cache):
+        """
+        Initialize the explorer
+
+        Args:
+            flight_scraper: Scraper for flights
+            hotel_scraper: Scraper for hotels
+            weather_scraper: Scraper for weather forecasts
+            engine: Recommendation engine used for scoring (a default engine if None)
+            max_concurrency: Maximum number of destinations scraped at once
+            cache: Scrape cache shared with other requests
+        """
+        self.flight_scraper = flight_scraper
+        self.hotel_scraper = hotel_scraper
+        self.weather_scraper = weather_scraper
+        self.engine = engine or RecommendationEngine()
+        self.max_concurrency = max_concurrency or settings.EXPLORE_MAX_CONCURRENCY
+        self.cache = cache
+
+    async def explore(self,
+                      origin: str,
+                      destinations: List[str],
+                      departure_date: datetime.date,
+                      return_date: datetime.date,
+                      adults: int = 1,
+                      children: int = 0,
+                      budget: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Explore destinations, yielding results as destinations finish
+
+        Yields one message per destination in completion order: a "destination"
+        message with the best combination and its rank among the destinations
+        finished so far, or an "error" message if the destination could not be
+        scraped or has no combination within the budget. A final "ranking"
+        message lists all ranked destinations, best first.
+
+        Args:
+            origin: Departure location
+            destinations: Destinations to compare (duplicates are explored once)
+            departure_date: Departure date
+            return_date: Return date
+            adults: Number of adults
+            children: Number of children
+            budget: Maximum total trip price
+
+        Returns:
+            Async iterator of result messages
+        """
+        unique = list(dict.fromkeys(d.strip() for d in destinations if d and d.strip()))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(destination: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._explore_destination(
+                    origin, destination, departure_date, return_date, adults, children, budget
+                )
+
+        tasks = [asyncio.create_task(bounded(destination)) for destination in unique]
+        ranked: List[Dict[str, Any]] = []
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                if result["type"] == "destination":
+                    ranked.append(result)
+                    ranked.sort(key=lambda r: r["score"], reverse=True)
+                    result["rank"] = ranked.index(result) + 1
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for rank, result in enumerate(ranked, start=1):
+            result["rank"] = rank
+        yield {"type": "ranking", "destinations": ranked}
+
+    async def _explore_destination(self,
+                                   origin: str,
+                                   destination: str,
+                                   departure_date: datetime.date,
+                                   return_date: datetime.date,
+                                   adults: int,
+                                   children: int,
+                                   budget: Optional[float]) -> Dict[str, Any]:
+        """
+        Scrape one destination and reduce it to its best combination
+        """
+        start, end = departure_date.isoformat(), return_date.isoformat()
+        flight_params = {
+            "origin": origin, "destination": destination,
+            "departure_date": start, "return_date": end, "adults": adults,
+        }
+        hotel_params = {
+            "location": destination, "check_in": start, "check_out": end, "guests": adults + children,
+        }
+        weather_params = {"location": destination, "start_date": start, "end_date": end}
+
+        try:
+            flights, hotels, weather_data = await asyncio.gather(
+                self.cache.get_or_scrape(
+                    "flights", flight_params,
+                    lambda: self._scrape(self.flight_scraper, flight_params, FlightRecord, filter_flight_prices),
+                ),
+                self.cache.get_or_scrape(
+                    "hotels", hotel_params,
+                    lambda: self._scrape(self.hotel_scraper, hotel_params, HotelRecord,
+                                         lambda records: deduplicate_hotels(filter_hotel_prices(records))),
+                ),
+                self.cache.get_or_scrape(
+                    "weather", weather_params,
+                    lambda: self._scrape(self.weather_scraper, weather_params, WeatherDay),
+                ),
+            )
+            best = self.engine.best_combination(flights, hotels, weather_data, max_total_price=budget)
+        except Exception as e:
+            logger.error(f"Error exploring destination {destination}: {str(e)}")
+            return {"type": "error", "destination": destination, "message": str(e)}
+
+        if best is None:
+            return {"type": "error", "destination": destination,
+                    "message": "No flight and hotel combination within budget"}
+
+        return {
+            "type": "destination",
+            "destination": destination,
+            "score": best["score"],
+            "price_score": best["price_score"],
+            "weather_score": best["weather_score"],
+            "convenience_score": best["convenience_score"],
+            "total_price": best["total_price"],
+            "currency": best["currency"],
+            "flight": best["flight"].to_dict(),
+            "hotel": best["hotel"].to_dict(),
+        }
+
+    @staticmethod
+    async def _scrape(scraper, params: Dict[str, Any], record_type,
+                      clean: Optional[Callable[[List[Any]], List[Any]]] = None) -> List[Any]:
+        """
+        Run a scraper and convert its results to records, so cached results are compact
+
+        clean (deduplication, price filtering) runs before the results are cached.
+        """
+        records = to_records(await scraper.scrape(params), record_type)
+        return clean(records) if clean else records
@@ -0,0 +1,230 @@
+import operator
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+_OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+Suggestions = Dict[str, List[str]]
+
+
+@dataclass(frozen=True)
+class PackingRule:
+    """
+    Items added to a packing list when all of the rule's tests hold
+
+    Tests are comparisons of a weather summary field, e.g.
+    ("min_temp", "<", 50), or keyword tests: ("condition", "Rain", "Thunderstorm")
+    holds if any of the words is in the predominant condition, and
+    ("activity", "beach", "swimming") if any of the keywords is among the
+    planned activities (case-insensitive).
+    """
+
+    when: Tuple[Tuple[Any, ...], ...]
+    items: Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+def rule(*when: Tuple[Any, ...], **items: Sequence[str]) -> PackingRule:
+    """
+    Build a rule: rule(("max_temp", ">", 75), accessories=["Sunglasses", "Hat"])
+    """
+    return PackingRule(when=tuple(when), items=tuple((category, tuple(names)) for category, names in items.items()))
+
+
+class PackingRuleTable:
+    """
+    Packing rules compiled into a lookup from weather/activity signature to items
+
+    The distinct tests of all rules are numbered once when the table is
+    built. A trip's signature is the bitmask of the tests it passes, i.e. its
+    temperatures and precipitation bucketed by the rule thresholds plus the
+    condition and activity keywords it matches, so two trips with the same
+    signature get the same list. Lists are assembled once per signature and
+    memoized; the number of signatures is bounded by the rules, not by the
+    trips, so the memo needs no eviction. Items keep rule order within a
+    category and appear once.
+    """
+
+    def __init__(self, base: Mapping[str, Sequence[str]], rules: Sequence[PackingRule]):
+        """
+        Compile the rule table
+
+        Args:
+            base: Items every list starts with, per category (also fixes the categories and their order)
+            rules: Rules applied in order on top of the base items
+        """
+        self.base = {category: tuple(items) for category, items in base.items()}
+        self.rules = tuple(rules)
+
+        self._tests: List[Tuple[Any, ...]] = []
+        numbers: Dict[Tuple[Any, ...], int] = {}
+        self._rule_masks: List[int] = []
+        for packing_rule in self.rules:
+            unknown = [category for category, _ in packing_rule.items if category not in self.base]
+            if unknown:
+                raise ValueError(f"Packing rule adds to unknown categories {unknown}")
+            mask = 0
+            for test in packing_rule.when:
+                if test[0] not in ("condition", "activity") and test[1] not in _OPERATORS:
+                    raise ValueError(f"Unknown comparison in packing rule test {test}")
+                if test not in numbers:
+                    numbers[test] = len(self._tests)
+                    self._tests.append(test)
+                mask |= 1 << numbers[test]
+            self._rule_masks.append(mask)
+
+        self._lock = threading.Lock()
+        self._memo: Dict[int, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def signature(self, weather: Mapping[str, Any], activities: Optional[Sequence[str]] = None) -> int:
+        """
+        Bitmask of the tests a trip passes
+
+        Args:
+            weather: Weather summary (min_temp, max_temp, precipitation_days, predominant_condition, ...)
+            activities: Planned activities
+
+        Returns:
+            The trip's signature
+        """
+        return self._signature(weather, _activity_text(activities))
+
+    def suggest(self, weather: Mapping[str, Any], activities: Optional[Sequence[str]] = None) -> Suggestions:
+        """
+        Packing list for one trip
+
+        Args:
+            weather: Weather summary of the trip
+            activities: Planned activities
+
+        Returns:
+            Dictionary with packing categories and item lists
+        """
+        return self.suggest_many([weather], activities)[0]
+
+    def suggest_many(self,
+                     weather_summaries: Sequence[Mapping[str, Any]],
+                     activities: Optional[Sequence[str]] = None) -> List[Suggestions]:
+        """
+        Packing lists for many trips with the same planned activities
+
+        Args:
+            weather_summaries: Weather summary of each trip
+            activities: Planned activities
+
+        Returns:
+            One dictionary of packing categories and item lists per trip (each
+            a fresh copy the caller may change)
+        """
+        activity_text = _activity_text(activities)
+        signatures = [self._signature(weather, activity_text) for weather in weather_summaries]
+        lists = {signature: self._lookup(signature) for signature in set(signatures)}
+        return [{category: list(items) for category, items in lists[signature]} for signature in signatures]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Memo size and hit/miss counters
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "signatures": len(self._memo),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / total if total else 0.0,
+            }
+
+    def _signature(self, weather: Mapping[str, Any], activity_text: str) -> int:
+        condition = weather.get("predominant_condition") or ""
+        signature = 0
+        for number, test in enumerate(self._tests):
+            kind = test[0]
+            if kind == "condition":
+                passed = any(word in condition for word in test[1:])
+            elif kind == "activity":
+                passed = any(keyword in activity_text for keyword in test[1:])
+            else:
+                value = weather.get(kind)
+                passed = value is not None and _OPERATORS[test[1]](value, test[2])
+            if passed:
+                signature |= 1 << number
+        return signature
+
+    def _lookup(self, signature: int) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        with self._lock:
+            items = self._memo.get(signature)
+            if items is not None:
+                self._hits += 1
+                return items
+            self._misses += 1
+
+        lists = {category: dict.fromkeys(items) for category, items in self.base.items()}
+        for packing_rule, mask in zip(self.rules, self._rule_masks):
+            if signature & mask == mask:
+                for category, names in packing_rule.items:
+                    lists[category].update(dict.fromkeys(names))
+        items = tuple((category, tuple(names)) for category, names in lists.items())
+
+        with self._lock:
+            return self._memo.setdefault(signature, items)
+
+
+def _activity_text(activities: Optional[Sequence[str]]) -> str:
+    return " ".join(activities).lower() if activities else ""
+
+
+# Full packing list of the packing suggestion generator (used without an LLM)
+packing_list_rules = PackingRuleTable(
+    base={
+        "clothing": ["Underwear", "Socks", "Pajamas"],
+        "accessories": [],
+        "toiletries": ["Toothbrush", "Toothpaste", "Shampoo", "Conditioner", "Body wash", "Deodorant"],
+        "documents": ["Passport", "Travel insurance", "Boarding passes", "Hotel reservations"],
+        "electronics": ["Phone", "Charger", "Power bank"],
+        "miscellaneous": ["Medications", "Hand sanitizer"],
+    },
+    rules=[
+        rule(("min_temp", "<", 50),
+             clothing=["Winter coat", "Sweaters", "Long-sleeve shirts", "Warm socks", "Jeans/pants"],
+             accessories=["Gloves", "Scarf", "Winter hat"]),
+        rule(("min_temp", ">=", 50), ("min_temp", "<", 65),
+             clothing=["Light jacket", "Long-sleeve shirts", "Sweatshirts", "Jeans/pants"],
+             accessories=["Light scarf"]),
+        rule(("min_temp", ">=", 65), clothing=["T-shirts", "Light shirts"]),
+        rule(("max_temp", ">", 75),
+             clothing=["Shorts", "T-shirts", "Light clothing"],
+             accessories=["Sunglasses", "Hat"],
+             toiletries=["Sunscreen"]),
+        rule(("precipitation_days", ">", 0), accessories=["Umbrella", "Rain jacket"]),
+        rule(("precipitation_days", ">", 3), clothing=["Waterproof shoes"]),
+        rule(("activity", "beach", "swimming"),
+             clothing=["Swimsuit", "Beach cover-up"],
+             accessories=["Beach towel", "Flip flops"]),
+        rule(("activity", "hiking", "trekking"),
+             clothing=["Hiking pants", "Moisture-wicking shirts"],
+             accessories=["Hiking boots", "Backpack", "Water bottle"]),
+        rule(("activity", "business", "meeting"),
+             clothing=["Business attire", "Formal shoes"],
+             accessories=["Portfolio/briefcase"]),
+    ],
+)
+
+# Short packing list attached to each recommendation
+recommendation_packing_rules = PackingRuleTable(
+    base={
+        "clothing": ["Comfortable walking shoes"],
+        "accessories": ["Smartphone charger", "Travel adapter"],
+        "documents": ["Passport", "ID", "Hotel confirmation", "Travel insurance"],
+    },
+    rules=[
+        rule(("min_temp", "<", 50), clothing=["Winter coat", "Sweaters", "Long pants", "Warm socks"]),
+        rule(("min_temp", ">=", 50), ("min_temp", "<", 65),
+             clothing=["Light jacket", "Long-sleeve shirts", "Pants"]),
+        rule(("min_temp", ">=", 65), clothing=["T-shirts", "Shorts/skirts"]),
+        rule(("max_temp", ">", 80), clothing=["Light, breathable clothing"], accessories=["Hat"]),
+        rule(("condition", "Rain", "Thunderstorm"), accessories=["Umbrella", "Raincoat"]),
+        rule(("condition", "Sunny", "Clear"), accessories=["Sunglasses", "Sunscreen"]),
+    ],
+)
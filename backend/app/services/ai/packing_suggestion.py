@@ -1,19 +1,14 @@
 import logging
 from typing import Dict, Any, List, Optional
-try:
-    # Try importing from new location (langchain_community)
-    from langchain_community.llms import GoogleGenerativeAI
-except ImportError:
-    try:
-        # Fallback to old location (deprecated)
-        from langchain.llms import GoogleGenerativeAI
-    except ImportError:
-        # Define a placeholder to avoid import errors
-        GoogleGenerativeAI = None
-        logging.warning("GoogleGenerativeAI could not be imported. LLM features will be disabled.")
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 
+from app.core.config import settings
+from app.services.ai.packing_rules import packing_list_rules
+from app.services.ai.weather_index import WeatherIndex
+from app.services.cache.llm_cache import bucket, llm_cache, llm_model_name
+from app.services.llm import llm_client_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,23 +20,19 @@ class PackingSuggestionGenerator:
     def __init__(self, llm_client=None):
         """
         Initialize with Gemini or another LLM client
+        
+        Args:
+            llm_client: LangChain LLM for the suggestions (the shared Gemini
+                client from the LLM client pool if None)
         """
-        self.llm_client = llm_client
-        if not self.llm_client and GoogleGenerativeAI is not None:
-            try:
-                # Initialize Gemini client using settings from environment
-                from app.core.config import settings
-                
-                self.llm_client = GoogleGenerativeAI(
-                    model=settings.GEMINI_MODEL,
-                    google_api_key=settings.GEMINI_API_KEY,
-                    temperature=0.7
-                )
-                logger.info(f"Initialized Gemini client with model: {settings.GEMINI_MODEL}")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Gemini client: {e}")
-        elif not self.llm_client:
-            logger.warning("GoogleGenerativeAI is not available, LLM functionality will be disabled")
+        self._llm_client = llm_client
+    
+    @property
+    def llm_client(self):
+        """
+        LLM client in use, None if no LLM is available
+        """
+        return self._llm_client if self._llm_client is not None else llm_client_pool.get()
     
     async def generate_packing_suggestions(self, 
                                         destination: str,
@@ -82,7 +73,8 @@ class PackingSuggestionGenerator:
         """
         Analyze weather data to extract key insights for packing
         """
-        if not weather_data:
+        weather_summary = WeatherIndex(weather_data).summary()
+        if weather_summary is None:
             return {
                 "min_temp": 60,
                 "max_temp": 75,
@@ -90,33 +82,9 @@ class PackingSuggestionGenerator:
                 "precipitation_days": 0,
                 "predominant_condition": "Unknown"
             }
-            
-        # Extract temperatures
-        temps = []
-        precipitation_days = 0
-        conditions = []
         
-        for day in weather_data:
-            temps.append(day["temperature_high"])
-            temps.append(day["temperature_low"])
-            
-            if day["precipitation_chance"] > 30:
-                precipitation_days += 1
-                
-            conditions.append(day["condition"])
-        
-        # Find predominant condition
-        from collections import Counter
-        condition_counter = Counter(conditions)
-        predominant_condition = condition_counter.most_common(1)[0][0]
-        
-        return {
-            "min_temp": min(temps),
-            "max_temp": max(temps),
-            "avg_temp": sum(temps) / len(temps),
-            "precipitation_days": precipitation_days,
-            "predominant_condition": predominant_condition
-        }
+        del weather_summary["days"]
+        return weather_summary
     
     async def _generate_llm_suggestions(self, 
                                      destination: str,
@@ -164,17 +132,35 @@ class PackingSuggestionGenerator:
         # Create LangChain chain
         chain = LLMChain(llm=self.llm_client, prompt=prompt)
         
-        # Generate result
-        result = await chain.arun(
-            destination=destination,
-            start_date=start_date,
-            end_date=end_date,
-            min_temp=weather_insights["min_temp"],
-            max_temp=weather_insights["max_temp"],
-            avg_temp=weather_insights["avg_temp"],
-            precipitation_days=weather_insights["precipitation_days"],
-            predominant_condition=weather_insights["predominant_condition"],
-            activities=activities_str
+        if settings.LLM_CACHE_BUCKET_INPUTS:
+            # Nearby weather gives the same packing list, so round it to share cached answers
+            weather_insights = {
+                **weather_insights,
+                "min_temp": bucket(weather_insights["min_temp"], 5),
+                "max_temp": bucket(weather_insights["max_temp"], 5),
+                "avg_temp": bucket(weather_insights["avg_temp"], 5),
+                "precipitation_days": bucket(weather_insights["precipitation_days"], 2),
+            }
+        
+        prompt_values = {
+            "destination": destination,
+            "start_date": start_date,
+            "end_date": end_date,
+            "min_temp": weather_insights["min_temp"],
+            "max_temp": weather_insights["max_temp"],
+            "avg_temp": weather_insights["avg_temp"],
+            "precipitation_days": weather_insights["precipitation_days"],
+            "predominant_condition": weather_insights["predominant_condition"],
+            "activities": activities_str
+        }
+        
+        # Generate result (identical prompts are answered from the LLM response cache)
+        llm_client = self.llm_client
+        result = await llm_cache.get_or_call(
+            llm_model_name(llm_client),
+            prompt.format(**prompt_values),
+            {"temperature": getattr(llm_client, "temperature", None)},
+            lambda: llm_client_pool.run(llm_client, lambda: chain.arun(**prompt_values)),
         )
         
         # Parse result into categories
@@ -234,61 +220,9 @@ class PackingSuggestionGenerator:
                                         weather_insights: Dict[str, Any],
                                         activities: Optional[List[str]] = None) -> Dict[str, List[str]]:
         """
-        Generate packing suggestions using rule-based approach
+        Generate packing suggestions using the compiled packing rule table
         """
-        suggestions = {
-            "clothing": [],
-            "accessories": [],
-            "toiletries": ["Toothbrush", "Toothpaste", "Shampoo", "Conditioner", "Body wash", "Deodorant"],
-            "documents": ["Passport", "Travel insurance", "Boarding passes", "Hotel reservations"],
-            "electronics": ["Phone", "Charger", "Power bank"],
-            "miscellaneous": ["Medications", "Hand sanitizer"]
-        }
-        
-        # Add clothing based on temperature
-        min_temp = weather_insights["min_temp"]
-        max_temp = weather_insights["max_temp"]
-        precipitation_days = weather_insights["precipitation_days"]
-        
-        # Basic clothing
-        suggestions["clothing"].extend(["Underwear", "Socks", "Pajamas"])
-        
-        # Temperature-specific clothing
-        if min_temp < 50:
-            suggestions["clothing"].extend(["Winter coat", "Sweaters", "Long-sleeve shirts", "Warm socks", "Jeans/pants"])
-            suggestions["accessories"].extend(["Gloves", "Scarf", "Winter hat"])
-        elif min_temp < 65:
-            suggestions["clothing"].extend(["Light jacket", "Long-sleeve shirts", "Sweatshirts", "Jeans/pants"])
-            suggestions["accessories"].append("Light scarf")
-        else:
-            suggestions["clothing"].extend(["T-shirts", "Light shirts"])
-            
-        if max_temp > 75:
-            suggestions["clothing"].extend(["Shorts", "T-shirts", "Light clothing"])
-            suggestions["accessories"].extend(["Sunglasses", "Hat"])
-            suggestions["toiletries"].append("Sunscreen")
-        
-        # Rain gear if needed
-        if precipitation_days > 0:
-            suggestions["accessories"].extend(["Umbrella", "Rain jacket"])
-            if precipitation_days > 3:
-                suggestions["clothing"].append("Waterproof shoes")
-        
-        # Activity-specific items
-        if activities:
-            if "beach" in " ".join(activities).lower() or "swimming" in " ".join(activities).lower():
-                suggestions["clothing"].extend(["Swimsuit", "Beach cover-up"])
-                suggestions["accessories"].extend(["Beach towel", "Flip flops"])
-            
-            if "hiking" in " ".join(activities).lower() or "trekking" in " ".join(activities).lower():
-                suggestions["clothing"].extend(["Hiking pants", "Moisture-wicking shirts"])
-                suggestions["accessories"].extend(["Hiking boots", "Backpack", "Water bottle"])
-            
-            if "business" in " ".join(activities).lower() or "meeting" in " ".join(activities).lower():
-                suggestions["clothing"].extend(["Business attire", "Formal shoes"])
-                suggestions["accessories"].append("Portfolio/briefcase")
-        
-        return suggestions
+        return packing_list_rules.suggest(weather_insights, activities)
     
     def _generate_basic_suggestions(self) -> Dict[str, List[str]]:
         """
@@ -0,0 +1,110 @@
+from typing import Optional
+
+import numpy as np
+
+# Upper bound on the number of point pairs compared in a single NumPy operation
+PAIRS_PER_CHUNK = 1 << 20
+
+# Number of top-sum points used to discard dominated points before the skyline pass
+PIVOTS = 4
+
+
+def pareto_frontier(points: np.ndarray, block_size: int = 1024) -> np.ndarray:
+    """
+    Find the Pareto-optimal (non-dominated) points, all dimensions maximized
+
+    Sort-filter-skyline: points are visited in descending order of their
+    coordinate sum, so a point can only be dominated by points visited before
+    it. The skyline of each block is found with a vectorized pairwise
+    comparison and then used to discard every remaining point it dominates, so
+    the candidate set shrinks quickly. A few strong pivot points first discard
+    most dominated points in one pass over the whole set.
+
+    Args:
+        points: Array of shape (n, d) with the score vectors
+        block_size: Number of points processed per block
+
+    Returns:
+        Indices of the frontier points, ordered by descending coordinate sum
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    sums = points.sum(axis=1)
+
+    # Pivots: the best points by sum and the best point in each dimension
+    top = np.argpartition(-sums, PIVOTS - 1)[:PIVOTS] if len(points) > PIVOTS else np.arange(len(points))
+    pivots = np.unique(np.concatenate([top, np.argmax(points, axis=0)]))
+    candidates = np.flatnonzero(~dominated_mask(points, points[pivots]))
+    candidates = candidates[np.argsort(-sums[candidates], kind="stable")]
+
+    blocks = []
+    while len(candidates):
+        block, candidates = candidates[:block_size], candidates[block_size:]
+        # Earlier blocks already removed everything they dominate from the block
+        block = block[~dominated_mask(points[block], points[block])]
+        blocks.append(block)
+        candidates = candidates[~dominated_mask(points[candidates], points[block])]
+
+    return np.concatenate(blocks)
+
+
+def dominated_mask(points: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """
+    Flag the points dominated by at least one point of `by`
+
+    A point q is dominated by p if p >= q in every dimension and p > q in at
+    least one. A point never dominates itself, so `by` may overlap `points`.
+
+    Args:
+        points: Array of shape (n, d)
+        by: Array of shape (m, d)
+
+    Returns:
+        Boolean array of shape (n,)
+    """
+    mask = np.zeros(len(points), dtype=bool)
+    if len(points) == 0 or len(by) == 0:
+        return mask
+    rows = max(1, PAIRS_PER_CHUNK // len(by))
+    for start in range(0, len(points), rows):
+        mask[start:start + rows] = _dominates(by, points[start:start + rows]).any(axis=0)
+    return mask
+
+
+def dominance_counts(points: np.ndarray, frontier: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Count how many points each frontier point dominates
+
+    Args:
+        points: Array of shape (n, d)
+        frontier: Indices of the points to count for (all points if None)
+
+    Returns:
+        Integer array with one count per frontier point
+    """
+    points = np.asarray(points, dtype=np.float64)
+    leaders = points if frontier is None else points[frontier]
+    counts = np.zeros(len(leaders), dtype=np.int64)
+    if len(leaders) == 0:
+        return counts
+    columns = max(1, PAIRS_PER_CHUNK // len(leaders))
+    for start in range(0, len(points), columns):
+        counts += _dominates(leaders, points[start:start + columns]).sum(axis=1)
+    return counts
+
+
+def _dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise dominance matrix: result[i, j] is True if a[i] dominates b[j]
+    """
+    # One 2-D comparison per dimension is much faster than reducing a 3-D array
+    ge = np.ones((len(a), len(b)), dtype=bool)
+    gt = np.zeros((len(a), len(b)), dtype=bool)
+    for k in range(a.shape[1]):
+        column_a = a[:, k, None]
+        column_b = b[None, :, k]
+        ge &= column_a >= column_b
+        gt |= column_a > column_b
+    return ge & gt
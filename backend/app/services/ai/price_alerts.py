@@ -0,0 +1,225 @@
+import datetime
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.ai.price_stats import PriceStatsTracker
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+
+logger = logging.getLogger(__name__)
+
+
+def _as_date(value: Any) -> Optional[datetime.date]:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    return value
+
+
+class PriceAlertEngine:
+    """
+    Turns new scraped prices into price-drop notifications for saved deals
+
+    Every saved deal gets a watch on its flight route and hotel property for
+    its travel date, with a threshold min_drop_percent below the saved price.
+    Watches are stored with an index on (kind, key, travel date, threshold),
+    so a batch of new prices is reduced to the lowest price per route/property
+    and date and only watches of those keys with a threshold at or above that
+    price are read: the work grows with the new observations and the alerts
+    they trigger, not with the number of watches. Alerted watches move their
+    threshold below the new price, so only further drops alert again.
+    """
+
+    def __init__(self,
+                 min_drop_percent: float = settings.PRICE_ALERT_MIN_DROP_PERCENT,
+                 currency_converter: Optional[CurrencyConverter] = None):
+        """
+        Initialize the alert engine
+
+        Args:
+            min_drop_percent: Drop below the reference price needed for an alert
+            currency_converter: Converts prices to the base currency (the shared converter if None)
+        """
+        self.min_drop_percent = min_drop_percent
+        self.currency_converter = currency_converter or default_currency_converter
+
+    def threshold(self, reference_price: float) -> float:
+        """
+        Highest price that alerts for a reference price
+        """
+        return reference_price * (1 - self.min_drop_percent / 100)
+
+    def watch_saved_deals(self, db: Session, saved_deal_ids: Optional[Sequence[int]] = None) -> int:
+        """
+        Create the price watches of saved deals
+
+        Args:
+            db: Database session
+            saved_deal_ids: Newly saved deals (None to backfill every saved deal without watches)
+
+        Returns:
+            Number of watches created
+        """
+        rows = []
+        for source in crud.price_watch.get_watch_sources(db, saved_deal_ids=saved_deal_ids):
+            watched = (
+                ("flight", PriceStatsTracker.route_key(source["origin"] or source["departure_location"],
+                                                       source["flight_destination"] or source["destination"]),
+                 source["flight_price"], source["flight_currency"]),
+                ("hotel", PriceStatsTracker.property_key(source["hotel_name"], source["destination"]),
+                 source["hotel_price"], source["hotel_currency"]),
+            )
+            for kind, key, price, currency in watched:
+                if key is None or price is None:
+                    continue
+                reference = self.currency_converter.convert(price, currency, self.currency_converter.base_currency)
+                rows.append({
+                    "saved_deal_id": source["saved_deal_id"],
+                    "user_id": source["user_id"],
+                    "recommendation_id": source["recommendation_id"],
+                    "kind": kind,
+                    "key": key,
+                    "travel_date": _as_date(source["departure_date"]),
+                    "reference_price": reference,
+                    "threshold": self.threshold(reference),
+                })
+        return crud.price_watch.create_multi(db, rows=rows)
+
+    def process(self,
+                db: Session,
+                kind: str,
+                keys: Sequence[Optional[str]],
+                travel_dates: Sequence[Any],
+                prices: Sequence[Optional[float]],
+                currencies: Optional[Sequence[Optional[str]]] = None) -> int:
+        """
+        Match a batch of new prices against the watches and create the alerts
+
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            keys: Route or property key of each price (None to skip the price)
+            travel_dates: Departure or check-in date of each price
+            prices: New prices (None to skip)
+            currencies: Currency code of each price (None means the base currency)
+
+        Returns:
+            Number of notifications created
+        """
+        prices = np.array([np.nan if p is None else p for p in prices], dtype=np.float64)
+        if currencies is not None:
+            prices = self.currency_converter.to_base(prices, currencies)
+        dates = [_as_date(d) for d in travel_dates]
+        valid = np.flatnonzero(~np.isnan(prices) & np.array(
+            [key is not None and day is not None for key, day in zip(keys, dates)], dtype=bool
+        ))
+        if not valid.size:
+            return 0
+
+        # Lowest new price per (key, travel date)
+        labels = np.array([f"{keys[i]}\x00{dates[i].isoformat()}" for i in valid], dtype=object).astype(str)
+        unique, codes = np.unique(labels, return_inverse=True)
+        lowest = np.full(unique.size, np.inf)
+        np.minimum.at(lowest, codes.reshape(-1), prices[valid])
+        groups = []
+        for label, price in zip(unique.tolist(), lowest.tolist()):
+            key, day = label.split("\x00")
+            groups.append((key, datetime.date.fromisoformat(day), price))
+
+        triggered = crud.price_watch.get_triggered(db, kind=kind, groups=groups)
+        if not triggered:
+            return 0
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        notifications: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        currency = self.currency_converter.base_currency
+        for watch in triggered:
+            price = watch["observed_price"]
+            drop = (1 - price / watch["reference_price"]) * 100 if watch["reference_price"] else 0.0
+            notifications.append({
+                "user_id": watch["user_id"],
+                "recommendation_id": watch["recommendation_id"],
+                "type": "price_alert",
+                "title": f"Price drop on your saved {kind}",
+                "message": (f"The {kind} price for {watch['key']} on {watch['travel_date'].isoformat()} "
+                            f"dropped {drop:.1f}% to {price:.2f} {currency} "
+                            f"(was {watch['reference_price']:.2f} {currency})."),
+                "is_read": False,
+                "created_at": now,
+            })
+            updates.append({
+                "id": watch["id"],
+                "reference_price": price,
+                "threshold": self.threshold(price),
+                "last_alert_price": price,
+                "last_alerted_at": now,
+            })
+
+        crud.notification.create_multi(db, rows=notifications, commit=False)
+        crud.price_watch.record_alerts(db, rows=updates, commit=False)
+        db.commit()
+        logger.info(f"Created {len(notifications)} {kind} price alerts")
+        return len(notifications)
+
+    def observe_flights(self,
+                        db: Session,
+                        flights: Sequence[Dict[str, Any]],
+                        origin: Optional[str] = None,
+                        destination: Optional[str] = None,
+                        departure_date: Any = None) -> int:
+        """
+        Check scraped flight prices against the flight watches
+
+        Args:
+            db: Database session
+            flights: Scraped flights
+            origin: Route origin for flights without an "origin"
+            destination: Route destination for flights without a "destination"
+            departure_date: Search departure date (the travel date watches are keyed by)
+
+        Returns:
+            Number of notifications created
+        """
+        return self.process(
+            db, "flight",
+            [PriceStatsTracker.route_key(f.get("origin") or origin, f.get("destination") or destination)
+             for f in flights],
+            [departure_date] * len(flights),
+            [f.get("price") for f in flights],
+            [f.get("currency") for f in flights],
+        )
+
+    def observe_hotels(self,
+                       db: Session,
+                       hotels: Sequence[Dict[str, Any]],
+                       location: Optional[str] = None,
+                       check_in: Any = None) -> int:
+        """
+        Check scraped nightly hotel prices against the hotel watches
+
+        Args:
+            db: Database session
+            hotels: Scraped hotels
+            location: Search destination, which properties are keyed by
+            check_in: Check-in date (the travel date watches are keyed by)
+
+        Returns:
+            Number of notifications created
+        """
+        return self.process(
+            db, "hotel",
+            [PriceStatsTracker.property_key(h.get("name"), location or h.get("location")) for h in hotels],
+            [check_in] * len(hotels),
+            [h.get("price_per_night") for h in hotels],
+            [h.get("currency") for h in hotels],
+        )
+
+
+# Global price alert engine
+price_alert_engine = PriceAlertEngine()
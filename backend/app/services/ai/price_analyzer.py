@@ -1,8 +1,15 @@
 import logging
-from typing import Dict, Any, List, Optional
-import datetime, timedelta
+import math
+from typing import Dict, Any, List, Optional, Sequence
+import datetime
 import numpy as np
 
+from app.services.ai.booking_window import BookingWindowTables, booking_window_tables as default_booking_tables
+from app.services.ai.candidate_matrix import top_k_indices
+from app.services.ai.price_stats import RunningPriceStats
+from app.services.ai.trend_model import fit_price_series
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+
 logger = logging.getLogger(__name__)
 
 
@@ -11,10 +18,32 @@ class PriceAnalyzer:
     Analyzes flight and hotel price data to identify trends, good deals,
     and optimal booking times.
     """
+
+    # Minimum savings versus the group average for an offer to count as a deal
+    MIN_SAVINGS_PERCENT = 15.0
+
+    # Number of deals returned per item type
+    MAX_DEALS = 3
+
+    # Days over which a running price trend is projected to judge its direction
+    TREND_HORIZON_DAYS = 30
+
+    # Expected savings needed to recommend waiting for a later booking window
+    MIN_WAIT_SAVINGS_PERCENT = 3.0
     
-    def __init__(self):
-        """Initialize the price analyzer"""
-        pass
+    def __init__(self,
+                 currency_converter: Optional[CurrencyConverter] = None,
+                 booking_tables: Optional[BookingWindowTables] = None):
+        """
+        Initialize the price analyzer
+        
+        Args:
+            currency_converter: Converts prices to one currency before they are
+                compared (the shared converter if None)
+            booking_tables: Booking lead-time tables (the shared tables if None)
+        """
+        self.currency_converter = currency_converter or default_currency_converter
+        self.booking_tables = booking_tables or default_booking_tables
     
     def find_best_deals(self, 
                       flights: List[Dict[str, Any]], 
@@ -41,83 +70,116 @@ class PriceAnalyzer:
             
         return best_deals
     
+    def detect_deals(self,
+                     prices: Any,
+                     groups: Optional[Sequence[Any]] = None,
+                     currencies: Optional[Sequence[Optional[str]]] = None,
+                     min_savings_percent: float = MIN_SAVINGS_PERCENT,
+                     top_k: Optional[int] = MAX_DEALS) -> Dict[str, np.ndarray]:
+        """
+        Find the offers that are much cheaper than the average of their group
+
+        Works on columns rather than item dicts, so large price histories can
+        be analyzed in one pass: groups are factorized once, group averages
+        come from one weighted bincount, and savings, the threshold and the
+        top-k selection are array operations. Missing (NaN) prices are left
+        out of the averages and are never deals.
+
+        Args:
+            prices: Price of each offer
+            groups: Group key of each offer, e.g. its route or star rating (one group if None)
+            currencies: Currency code of each offer (None means the base currency)
+            min_savings_percent: Minimum savings versus the group average for a deal
+            top_k: Maximum number of deals to return (all deals if None)
+
+        Returns:
+            Dict of arrays with one entry per deal, best first: "index" (row of
+            the offer), "savings_percent", "savings_amount" and "avg_price"
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if currencies is not None:
+            prices = self.currency_converter.to_base(prices, currencies)
+        if groups is None:
+            codes = np.zeros(prices.size, dtype=np.intp)
+        else:
+            _, codes = np.unique(np.asarray(groups), return_inverse=True)
+            codes = codes.reshape(-1)
+
+        priced = ~np.isnan(prices)
+        counts = np.bincount(codes[priced], minlength=codes.max(initial=-1) + 1)
+        sums = np.bincount(codes[priced], weights=prices[priced], minlength=counts.size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_prices = (sums / counts)[codes]
+            savings = avg_prices - prices
+            savings_percent = savings / avg_prices * 100
+
+        candidates = np.flatnonzero(priced & (avg_prices > 0) & (savings_percent >= min_savings_percent))
+        best = candidates[top_k_indices(savings_percent[candidates], top_k)]
+        return {
+            "index": best,
+            "savings_percent": savings_percent[best],
+            "savings_amount": savings[best],
+            "avg_price": avg_prices[best],
+        }
+
     def _find_best_flight_deals(self, flights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find the best flight deals"""
+        """Find the best flight deals, compared with the average price of the same route"""
         if not flights:
             return []
-            
-        # Calculate average price
-        prices = [flight["price"] for flight in flights]
-        avg_price = sum(prices) / len(prices)
-        
+
+        deals = self.detect_deals(
+            [flight["price"] for flight in flights],
+            groups=[f"{flight.get('origin')}|{flight.get('destination')}" for flight in flights],
+            currencies=[flight.get("currency") for flight in flights],
+        )
+
         best_deals = []
-        for flight in flights:
-            price_diff = avg_price - flight["price"]
-            savings_percent = (price_diff / avg_price) * 100
-            
-            # Only consider as a deal if it's at least 15% cheaper
-            if savings_percent >= 15:
-                deal = {
-                    "type": "flight",
-                    "item": flight,
-                    "savings_percent": savings_percent,
-                    "savings_amount": price_diff,
-                    "avg_price": avg_price,
-                    "explanation": f"{flight['airline']} flight is {savings_percent:.1f}% cheaper than average for this route."
-                }
-                best_deals.append(deal)
-        
-        # Sort by savings percentage
-        best_deals.sort(key=lambda x: x["savings_percent"], reverse=True)
-        
-        # Limit to top 3
-        return best_deals[:3]
-    
+        for index, savings_percent, price_diff, avg_price in zip(
+            deals["index"].tolist(), deals["savings_percent"].tolist(),
+            deals["savings_amount"].tolist(), deals["avg_price"].tolist(),
+        ):
+            flight = flights[index]
+            best_deals.append({
+                "type": "flight",
+                "item": flight,
+                "savings_percent": savings_percent,
+                "savings_amount": price_diff,
+                "avg_price": avg_price,
+                "currency": self.currency_converter.base_currency,
+                "explanation": f"{flight['airline']} flight is {savings_percent:.1f}% cheaper than average for this route."
+            })
+        return best_deals
+
     def _find_best_hotel_deals(self, hotels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find the best hotel deals"""
+        """Find the best hotel deals, compared with the average price of the same star rating"""
         if not hotels:
             return []
-            
-        # Calculate average price per night for different star ratings
-        star_prices = {}
-        for hotel in hotels:
-            rating = round(hotel["rating"]) if "rating" in hotel else 3
-            if rating not in star_prices:
-                star_prices[rating] = []
-            star_prices[rating].append(hotel["price_per_night"])
-        
-        # Calculate average price per star rating
-        avg_prices = {
-            rating: sum(prices) / len(prices) 
-            for rating, prices in star_prices.items() if prices
-        }
-        
+
+        # Hotels without a rating are compared with 3-star hotels
+        ratings = np.array([hotel.get("rating") for hotel in hotels], dtype=np.float64)
+        stars = np.round(np.where(np.isnan(ratings), 3, ratings)).astype(np.int64)
+        deals = self.detect_deals(
+            [hotel["price_per_night"] for hotel in hotels],
+            groups=stars,
+            currencies=[hotel.get("currency") for hotel in hotels],
+        )
+
         best_deals = []
-        for hotel in hotels:
-            rating = round(hotel["rating"]) if "rating" in hotel else 3
-            
-            if rating in avg_prices:
-                avg_price = avg_prices[rating]
-                price_diff = avg_price - hotel["price_per_night"]
-                savings_percent = (price_diff / avg_price) * 100
-                
-                # Only consider as a deal if it's at least 15% cheaper for same star rating
-                if savings_percent >= 15:
-                    deal = {
-                        "type": "hotel",
-                        "item": hotel,
-                        "savings_percent": savings_percent,
-                        "savings_amount": price_diff,
-                        "avg_price": avg_price,
-                        "explanation": f"{hotel['name']} is {savings_percent:.1f}% cheaper than average for {rating}-star hotels in this area."
-                    }
-                    best_deals.append(deal)
-        
-        # Sort by savings percentage
-        best_deals.sort(key=lambda x: x["savings_percent"], reverse=True)
-        
-        # Limit to top 3
-        return best_deals[:3]
+        for index, savings_percent, price_diff, avg_price in zip(
+            deals["index"].tolist(), deals["savings_percent"].tolist(),
+            deals["savings_amount"].tolist(), deals["avg_price"].tolist(),
+        ):
+            hotel = hotels[index]
+            best_deals.append({
+                "type": "hotel",
+                "item": hotel,
+                "savings_percent": savings_percent,
+                "savings_amount": price_diff,
+                "avg_price": avg_price,
+                "currency": self.currency_converter.base_currency,
+                "explanation": f"{hotel['name']} is {savings_percent:.1f}% cheaper than average for {stars[index]}-star hotels in this area."
+            })
+        return best_deals
     
     def analyze_price_trends(self, 
                           historical_prices: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -139,48 +201,95 @@ class PriceAnalyzer:
                 "recommendation": "Not enough data to analyze price trends."
             }
         
-        # Sort by date
-        sorted_prices = sorted(historical_prices, key=lambda x: x["date"])
-        
-        # Extract dates and prices
-        dates = [item["date"] for item in sorted_prices]
-        prices = [item["price"] for item in sorted_prices]
+        # Fit a linear trend (with day-of-week and seasonal terms when the
+        # history is long enough); the same model the batch trend job uses
+        fit = fit_price_series(
+            [item["date"] for item in historical_prices],
+            self.currency_converter.to_base(
+                [item["price"] for item in historical_prices],
+                [item.get("currency") for item in historical_prices],
+            ),
+            min_observations=3,
+        )
+        if not fit["fitted"]:
+            return {
+                "trend": "unknown",
+                "direction": "stable",
+                "confidence": 0,
+                "recommendation": "Not enough data to analyze price trends."
+            }
         
-        # Calculate simple trend (linear regression would be better with more data)
-        first_third = np.mean(prices[:len(prices)//3])
-        last_third = np.mean(prices[-len(prices)//3:])
-        price_diff = last_third - first_third
+        # Change the fitted trend predicts over the trend horizon
+        level = fit["level"]
+        price_diff = fit["slope_per_day"] * self.TREND_HORIZON_DAYS
         
         # Determine trend direction
-        if price_diff > 0.05 * first_third:
+        if price_diff > 0.05 * level:
             direction = "increasing"
             recommendation = "Consider booking soon as prices are trending upward."
-        elif price_diff < -0.05 * first_third:
+        elif price_diff < -0.05 * level:
             direction = "decreasing"
             recommendation = "Consider waiting as prices are trending downward."
         else:
             direction = "stable"
             recommendation = "Prices are relatively stable, book at your convenience."
         
-        # Calculate confidence based on consistency of trend
-        price_changes = [prices[i+1] - prices[i] for i in range(len(prices) - 1)]
-        consistent_direction = all(pc > 0 for pc in price_changes) or all(pc < 0 for pc in price_changes)
-        
-        if consistent_direction:
-            confidence = 0.8
+        # Confidence that the slope is not zero (two-sided, from its standard error)
+        slope_se = fit["slope_se"]
+        if slope_se > 0:
+            confidence = math.erf(abs(fit["slope_per_day"]) / slope_se / math.sqrt(2))
         else:
-            # Calculate how many price changes are in the dominant direction
-            increasing_changes = sum(1 for pc in price_changes if pc > 0)
-            decreasing_changes = sum(1 for pc in price_changes if pc < 0)
-            dominant_direction_count = max(increasing_changes, decreasing_changes)
-            confidence = dominant_direction_count / len(price_changes)
+            confidence = 1.0 if fit["slope_per_day"] else 0.0
         
         return {
             "trend": "historical",
             "direction": direction,
             "confidence": confidence,
             "recommendation": recommendation,
-            "price_diff_percent": (price_diff / first_third) * 100 if first_third else 0
+            "price_diff_percent": (price_diff / level) * 100 if level else 0,
+            "slope_per_day": fit["slope_per_day"],
+            "slope_ci": [fit["slope_ci_low"], fit["slope_ci_high"]],
+        }
+    
+    def analyze_price_stats(self, stats: RunningPriceStats) -> Dict[str, Any]:
+        """
+        Analyze the price trend of a route or property from its running statistics
+        
+        Same result shape as analyze_price_trends, but read from the stored
+        accumulators in O(1) instead of recomputed from the price history.
+        
+        Args:
+            stats: Running price statistics of the route or property
+            
+        Returns:
+            Dictionary with trend analysis
+        """
+        if stats is None or stats.count < 3 or stats.time_m2 <= 0 or not stats.mean:
+            return {
+                "trend": "unknown",
+                "direction": "stable",
+                "confidence": 0,
+                "recommendation": "Not enough data to analyze price trends."
+            }
+        
+        # Change the fitted trend predicts over the trend horizon
+        price_diff = stats.slope_per_day * self.TREND_HORIZON_DAYS
+        if price_diff > 0.05 * stats.mean:
+            direction = "increasing"
+            recommendation = "Consider booking soon as prices are trending upward."
+        elif price_diff < -0.05 * stats.mean:
+            direction = "decreasing"
+            recommendation = "Consider waiting as prices are trending downward."
+        else:
+            direction = "stable"
+            recommendation = "Prices are relatively stable, book at your convenience."
+        
+        return {
+            "trend": "running",
+            "direction": direction,
+            "confidence": abs(stats.correlation),
+            "recommendation": recommendation,
+            "price_diff_percent": (price_diff / stats.mean) * 100
         }
     
     def predict_optimal_booking_time(self, 
@@ -198,10 +307,10 @@ class PriceAnalyzer:
         Returns:
             Dictionary with booking recommendations
         """
-        # In a real implementation, this would use historical data and ML models
-        # For now, returning simplified recommendations based on general travel trends
+        # Rules of thumb, replaced below by the booking lead-time tables built
+        # from stored price history wherever they have data for this trip
         
-        departure_date = datetime.strptime(travel_dates["start_date"], "%Y-%m-%d")
+        departure_date = datetime.datetime.strptime(travel_dates["start_date"], "%Y-%m-%d")
         days_until_departure = (departure_date - datetime.datetime.now()).days
         
         flight_recommendation = {}
@@ -262,8 +371,36 @@ class PriceAnalyzer:
                 flight_recommendation["explanation"] += " Ski destinations are in high demand during winter peak season."
                 hotel_recommendation["explanation"] += " Ski resorts often fill up quickly during peak season."
         
+        flight_window = self.booking_tables.lookup("flight", destination, departure_date)
+        if flight_window:
+            flight_recommendation = self._booking_window_recommendation("flights", flight_window)
+        hotel_window = self.booking_tables.lookup("hotel", destination, departure_date)
+        if hotel_window:
+            hotel_recommendation = self._booking_window_recommendation("hotels", hotel_window)
+        
         return {
             "flights": flight_recommendation,
             "hotels": hotel_recommendation,
             "days_until_departure": days_until_departure
         }
+    
+    def _booking_window_recommendation(self, item: str, window: Dict[str, Any]) -> Dict[str, Any]:
+        """Booking recommendation from a booking lead-time table lookup"""
+        best = window["best_window"]
+        difference = (window["expected_price_index"] - 1) * 100
+        now = (f"Based on past prices ({window['source']}), {item} booked {window['lead_days']} days "
+               f"before departure cost about {abs(difference):.0f}% {'more' if difference > 0 else 'less'} "
+               f"than average.")
+        
+        if best["book_now"] or best["expected_savings_percent"] < self.MIN_WAIT_SAVINGS_PERCENT:
+            return {
+                "recommendation": f"Good time to book {item}",
+                "explanation": f"{now} Prices are not expected to drop by waiting.",
+                "booking_window": best,
+            }
+        return {
+            "recommendation": f"Wait to book {item}",
+            "explanation": (f"{now} They are typically {best['expected_savings_percent']:.0f}% cheaper "
+                            f"{best['lead_days_from']}-{best['lead_days_to']} days before departure."),
+            "booking_window": best,
+        }
@@ -0,0 +1,360 @@
+import datetime
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.services.ai.records import days_since_epoch, from_days_since_epoch
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+from app.services.scraper.entity_resolution import hotel_resolver
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class RunningPriceStats:
+    """
+    Streaming price statistics of one route or property
+
+    Holds a fixed set of accumulators instead of the price history: a Welford
+    mean and sum of squared deviations, an EWMA, the running minimum and
+    maximum, and the co-moments of observation time and price, from which the
+    least-squares trend slope follows. Batches of observations are folded in
+    with the pairwise (Chan et al.) update, so adding a scrape costs
+    O(batch size) and every statistic is read in O(1).
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    ewma: Optional[float] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    time_mean: float = 0.0
+    time_m2: float = 0.0
+    co_moment: float = 0.0
+    first_observed_at: Optional[datetime.datetime] = None
+    last_observed_at: Optional[datetime.datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "RunningPriceStats":
+        """
+        Build from a PriceStat row mapping (unknown columns are ignored)
+        """
+        return cls(**{name: row[name] for name in cls.__dataclass_fields__ if name in row})
+
+    def to_row(self) -> Dict[str, Any]:
+        """
+        Column values for a PriceStat row
+        """
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the observed prices"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+    @property
+    def slope_per_day(self) -> float:
+        """Least-squares price change per day (0 until prices were seen at two different times)"""
+        return self.co_moment / self.time_m2 if self.time_m2 > 0 else 0.0
+
+    @property
+    def correlation(self) -> float:
+        """Correlation of price with time, i.e. how consistently prices follow the trend"""
+        if self.time_m2 <= 0 or self.m2 <= 0:
+            return 0.0
+        return float(np.clip(self.co_moment / np.sqrt(self.time_m2 * self.m2), -1.0, 1.0))
+
+    def update(self, price: float, observed_at: datetime.datetime,
+               alpha: float = settings.PRICE_STATS_EWMA_ALPHA) -> None:
+        """
+        Fold in a single observation
+        """
+        days = days_since_epoch(observed_at)
+        self.merge(1, float(price), 0.0, price, price, days, 0.0, 0.0,
+                   days, days, 1.0 - alpha, alpha * price, float(price))
+
+    def merge(self, count: int, mean: float, m2: float, min_price: float, max_price: float,
+              time_mean: float, time_m2: float, co_moment: float, first_day: float, last_day: float,
+              decay: float, ewma_sum: float, ewma_fresh: float) -> None:
+        """
+        Fold in the summary of a batch of observations (see summarize_batch)
+        """
+        if count <= 0:
+            return
+        total = self.count + count
+        weight = self.count * count / total
+        d_price = mean - self.mean
+        d_time = time_mean - self.time_mean
+
+        self.m2 += m2 + d_price * d_price * weight
+        self.time_m2 += time_m2 + d_time * d_time * weight
+        self.co_moment += co_moment + d_time * d_price * weight
+        self.mean += d_price * count / total
+        self.time_mean += d_time * count / total
+        self.ewma = ewma_fresh if self.ewma is None else decay * self.ewma + ewma_sum
+        self.min_price = min_price if self.min_price is None else min(self.min_price, min_price)
+        self.max_price = max_price if self.max_price is None else max(self.max_price, max_price)
+        first, last = from_days_since_epoch(first_day), from_days_since_epoch(last_day)
+        self.first_observed_at = first if self.first_observed_at is None else min(self.first_observed_at, first)
+        self.last_observed_at = last if self.last_observed_at is None else max(self.last_observed_at, last)
+        self.count = total
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current statistics as a plain dict
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "ewma": self.ewma,
+            "min_price": self.min_price,
+            "max_price": self.max_price,
+            "slope_per_day": self.slope_per_day,
+            "correlation": self.correlation,
+            "first_observed_at": self.first_observed_at,
+            "last_observed_at": self.last_observed_at,
+        }
+
+
+def summarize_batch(codes: np.ndarray, prices: np.ndarray, days: np.ndarray,
+                    alpha: float) -> Dict[str, np.ndarray]:
+    """
+    Per-group summaries of a batch of observations, for RunningPriceStats.merge
+
+    Args:
+        codes: Group index (0..G-1) of each observation
+        prices: Observed prices
+        days: Observation times in days
+        alpha: EWMA weight of each new price; observations are in arrival order
+
+    Returns:
+        Dict of arrays with one entry per group
+    """
+    counts = np.bincount(codes)
+    groups = counts.size
+    mean = np.bincount(codes, weights=prices, minlength=groups) / counts
+    time_mean = np.bincount(codes, weights=days, minlength=groups) / counts
+    d_price = prices - mean[codes]
+    d_time = days - time_mean[codes]
+
+    min_price = np.full(groups, np.inf)
+    max_price = np.full(groups, -np.inf)
+    first_day = np.full(groups, np.inf)
+    last_day = np.full(groups, -np.inf)
+    np.minimum.at(min_price, codes, prices)
+    np.maximum.at(max_price, codes, prices)
+    np.minimum.at(first_day, codes, days)
+    np.maximum.at(last_day, codes, days)
+
+    # EWMA of n new prices x_0..x_{n-1} on top of a previous value e:
+    # (1-a)^n e + sum a (1-a)^(n-1-i) x_i; without a previous value, x_0 seeds it
+    order = np.argsort(codes, kind="stable")
+    position = np.empty(codes.size, dtype=np.int64)
+    position[order] = np.arange(codes.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    remaining = counts[codes] - 1 - position
+    weights = alpha * (1.0 - alpha) ** remaining
+    fresh_weights = np.where(position == 0, (1.0 - alpha) ** remaining, weights)
+
+    return {
+        "count": counts,
+        "mean": mean,
+        "m2": np.bincount(codes, weights=d_price * d_price, minlength=groups),
+        "min_price": min_price,
+        "max_price": max_price,
+        "time_mean": time_mean,
+        "time_m2": np.bincount(codes, weights=d_time * d_time, minlength=groups),
+        "co_moment": np.bincount(codes, weights=d_time * d_price, minlength=groups),
+        "first_day": first_day,
+        "last_day": last_day,
+        "decay": (1.0 - alpha) ** counts,
+        "ewma_sum": np.bincount(codes, weights=weights * prices, minlength=groups),
+        "ewma_fresh": np.bincount(codes, weights=fresh_weights * prices, minlength=groups),
+    }
+
+
+class PriceStatsTracker:
+    """
+    Keeps running price statistics per flight route and per hotel property
+
+    Each scrape's prices are grouped by key and summarized with array
+    operations, then merged into the stored statistics of those keys: one
+    read and one write batch per scrape, independent of how much history a
+    key already has. Prices are converted to the base currency first.
+    """
+
+    def __init__(self,
+                 alpha: float = settings.PRICE_STATS_EWMA_ALPHA,
+                 currency_converter: Optional[CurrencyConverter] = None):
+        """
+        Initialize the tracker
+
+        Args:
+            alpha: EWMA weight of each new price
+            currency_converter: Converts prices to the base currency (the shared converter if None)
+        """
+        self.alpha = alpha
+        self.currency_converter = currency_converter or default_currency_converter
+        # Serializes read-merge-write cycles of concurrent searches in this process;
+        # across processes the rows are locked in the database (see observe)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def route_key(origin: Optional[str], destination: Optional[str]) -> Optional[str]:
+        """
+        Key of a flight route, e.g. "JFK-LAX" (None if either end is unknown)
+        """
+        if not origin or not destination:
+            return None
+        return f"{origin.strip().upper()}-{destination.strip().upper()}"
+
+    @staticmethod
+    def property_key(name: Optional[str], location: Optional[str]) -> Optional[str]:
+        """
+        Key of a hotel property: normalized location and name tokens (None without a name)
+
+        Names are reduced the way duplicate detection compares them, so
+        "The Grand Hotel" and "Grand" share a key.
+        """
+        tokens = hotel_resolver.normalize_name(name)[1]
+        if not tokens:
+            return None
+        return f"{hotel_resolver.normalize_name(location)[0]}|{' '.join(sorted(tokens))}"
+
+    def observe(self,
+                db: Session,
+                kind: str,
+                keys: Sequence[Optional[str]],
+                prices: Sequence[Optional[float]],
+                currencies: Optional[Sequence[Optional[str]]] = None,
+                observed_at: Optional[datetime.datetime] = None) -> int:
+        """
+        Fold one scrape's prices into the statistics of their keys
+
+        Args:
+            db: Database session
+            kind: "flight" or "hotel"
+            keys: Route or property key of each price (None to skip the price)
+            prices: Observed prices (None to skip)
+            currencies: Currency code of each price (None means the base currency)
+            observed_at: When the prices were scraped (now if None)
+
+        Returns:
+            Number of keys updated
+        """
+        prices = np.array([np.nan if p is None else p for p in prices], dtype=np.float64)
+        if currencies is not None:
+            prices = self.currency_converter.to_base(prices, currencies)
+        valid = np.flatnonzero(~np.isnan(prices) & np.array([key is not None for key in keys], dtype=bool))
+        if not valid.size:
+            return 0
+
+        unique_keys, codes = np.unique(np.array([keys[i] for i in valid], dtype=object).astype(str),
+                                       return_inverse=True)
+        observed_at = observed_at or datetime.datetime.now(datetime.timezone.utc)
+        days = np.full(valid.size, days_since_epoch(observed_at))
+        summary = summarize_batch(codes.reshape(-1), prices[valid], days, self.alpha)
+        columns = {name: values.tolist() for name, values in summary.items()}
+
+        with self._lock:
+            for attempt in range(2):
+                # The stored rows stay locked until save_rows commits the merge, so a
+                # concurrent process waits instead of merging into stale values. A key
+                # that another process inserts first fails the insert; the retry then
+                # reads and merges into that row.
+                existing = crud.price_stat.get_rows_by_keys(db, kind=kind, keys=unique_keys.tolist(),
+                                                            for_update=True)
+                rows = {}
+                for group, key in enumerate(unique_keys.tolist()):
+                    row = existing.get(key, {})
+                    stats = RunningPriceStats.from_row(row)
+                    stats.merge(**{name: values[group] for name, values in columns.items()})
+                    rows[key] = {**stats.to_row(), "id": row.get("id"),
+                                 "currency": self.currency_converter.base_currency}
+                try:
+                    crud.price_stat.save_rows(db, kind=kind, rows=rows)
+                    break
+                except IntegrityError:
+                    db.rollback()
+                    if attempt:
+                        raise
+        return len(rows)
+
+    def observe_flights(self,
+                        db: Session,
+                        flights: Sequence[Dict[str, Any]],
+                        origin: Optional[str] = None,
+                        destination: Optional[str] = None,
+                        observed_at: Optional[datetime.datetime] = None) -> int:
+        """
+        Fold scraped flight prices into their routes' statistics
+
+        Args:
+            db: Database session
+            flights: Scraped flights
+            origin: Route origin for flights without an "origin"
+            destination: Route destination for flights without a "destination"
+            observed_at: When the flights were scraped (now if None)
+
+        Returns:
+            Number of routes updated
+        """
+        return self.observe(
+            db, "flight",
+            [self.route_key(f.get("origin") or origin, f.get("destination") or destination) for f in flights],
+            [f.get("price") for f in flights],
+            [f.get("currency") for f in flights],
+            observed_at,
+        )
+
+    def observe_hotels(self,
+                       db: Session,
+                       hotels: Sequence[Dict[str, Any]],
+                       location: Optional[str] = None,
+                       observed_at: Optional[datetime.datetime] = None) -> int:
+        """
+        Fold scraped nightly hotel prices into their properties' statistics
+
+        Args:
+            db: Database session
+            hotels: Scraped hotels
+            location: Search destination, which properties are keyed by
+            observed_at: When the hotels were scraped (now if None)
+
+        Returns:
+            Number of properties updated
+        """
+        return self.observe(
+            db, "hotel",
+            [self.property_key(h.get("name"), location or h.get("location")) for h in hotels],
+            [h.get("price_per_night") for h in hotels],
+            [h.get("currency") for h in hotels],
+            observed_at,
+        )
+
+    def get(self, db: Session, kind: str, key: Optional[str]) -> Optional[RunningPriceStats]:
+        """
+        Current statistics of a route or property (None if it has not been observed)
+        """
+        if key is None:
+            return None
+        row = crud.price_stat.get_by_key(db, kind=kind, key=key)
+        if row is None:
+            return None
+        return RunningPriceStats(**{name: getattr(row, name) for name in RunningPriceStats.__dataclass_fields__})
+
+
+# Global price statistics tracker
+price_stats_tracker = PriceStatsTracker()
@@ -1,10 +1,26 @@
+import asyncio
+import json
 import logging
+import re
 from typing import Dict, Any, List, Optional
 import numpy as np
-import datetime
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 
+from app.core.config import settings
+from app.services.cache.llm_cache import llm_cache, llm_model_name
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+from app.services.llm import llm_client_pool
+from app.services.ai.bundle_optimizer import BundleOptimizer
+from app.services.ai.candidate_matrix import SCORE_COMPONENTS, CandidateMatrix, top_k_indices
+from app.services.ai.packing_rules import recommendation_packing_rules
+from app.services.ai.pareto import dominance_counts, pareto_frontier
+from app.services.ai.records import (
+    EventRecord, FlightRecord, HotelRecord, datetime_array, parse_datetime, to_records
+)
+from app.services.ai.spatial_index import SpatialIndex, mean_distance_km
+from app.services.ai.weather_index import WeatherIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,27 +30,76 @@ class RecommendationEngine:
     to make personalized travel recommendations
     """
     
-    def __init__(self, llm_client=None):
+    # Weights of the component scores in the total score
+    PRICE_WEIGHT = 0.4
+    WEATHER_WEIGHT = 0.4
+    CONVENIENCE_WEIGHT = 0.2
+    
+    # Total trip price range used to scale the price score
+    MIN_TRIP_PRICE = 100.0
+    MAX_TRIP_PRICE = 2000.0
+    
+    # Flight duration (in minutes) at which the duration score reaches zero
+    MAX_FLIGHT_DURATION = 600.0
+    
+    # Hotel proximity to events: radius counted as nearby, nearby events needed
+    # for a full score, and mean distance to chosen events at which the score is zero
+    EVENT_RADIUS_KM = 2.0
+    NEARBY_EVENTS_TARGET = 5
+    MAX_EVENT_DISTANCE_KM = 10.0
+    
+    # Score dimensions of the Pareto frontier, all maximized
+    SCORE_DIMENSIONS = SCORE_COMPONENTS
+    
+    def __init__(self, llm_client=None,
+                 max_concurrency: Optional[int] = None,
+                 llm_timeout: Optional[float] = None,
+                 batch_summaries: Optional[bool] = None,
+                 currency_converter: Optional[CurrencyConverter] = None):
         """
         Initialize with optional LLM client
+        
+        Args:
+            llm_client: LangChain LLM used for recommendation summaries (the
+                shared Gemini client from the LLM client pool if None)
+            max_concurrency: Maximum number of LLM calls in flight at once
+            llm_timeout: Seconds to wait for one LLM call before using the template summary
+            batch_summaries: Ask for all summaries in one prompt instead of one call each
+            currency_converter: Converts prices to one currency before scoring
+                (the shared converter if None)
+        """
+        self._llm_client = llm_client
+        self.currency_converter = currency_converter or default_currency_converter
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.llm_timeout = llm_timeout if llm_timeout is not None else settings.LLM_TIMEOUT_SECONDS
+        self.batch_summaries = settings.LLM_BATCH_SUMMARIES if batch_summaries is None else batch_summaries
+        self._summary_chain = None
+    
+    @property
+    def llm_client(self):
+        """
+        LLM client in use, None if no LLM is available
         """
-        self.llm_client = llm_client
+        return self._llm_client if self._llm_client is not None else llm_client_pool.get()
     
     async def generate_recommendations(self, 
                                 search_data: Dict[str, Any],
                                 flights: List[Dict[str, Any]], 
                                 hotels: List[Dict[str, Any]],
                                 weather_data: List[Dict[str, Any]],
-                                events: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+                                events: Optional[List[Dict[str, Any]]] = None,
+                                top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Generate personalized travel recommendations
         
         Args:
-            search_data: User search parameters
+            search_data: User search parameters; with a "budget", recommendations are
+                the best flight + hotel + events bundles within it
             flights: List of flight data
             hotels: List of hotel data
             weather_data: List of weather data
             events: List of event data (optional)
+            top_k: Number of recommendations to return
             
         Returns:
             List of recommendations with explanation and scores
@@ -42,17 +107,26 @@ class RecommendationEngine:
         if not flights or not hotels or not weather_data:
             return []
             
-        # Calculate scores for each flight and hotel combination
-        recommendations = self._generate_flight_hotel_combinations(flights, hotels, weather_data, events)
+        # Parse the forecast once; scoring and packing share the same index
+        weather_index = WeatherIndex(weather_data)
         
-        # Add packing suggestions based on weather
-        recommendations = self._add_packing_suggestions(recommendations, weather_data)
-            
-        # Sort recommendations by total score (descending)
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
+        preferences = search_data.get("preferences") or {}
+        if search_data.get("budget") is not None:
+            # The whole trip (flight, hotel stay and chosen events) has to fit the budget
+            top_recommendations = self._generate_budget_combinations(
+                search_data, flights, hotels, weather_data, events, top_k=top_k, weather_index=weather_index,
+            )
+        else:
+            # Score every flight and hotel combination and keep the best ones (sorted by score)
+            top_recommendations = self._generate_flight_hotel_combinations(
+                flights, hotels, weather_data, events, top_k=top_k, weather_index=weather_index,
+                chosen_event_ids=preferences.get("event_ids"),
+            )
         
-        # Keep only the top recommendations
-        top_recommendations = recommendations[:5]
+        # Add packing suggestions based on weather
+        top_recommendations = self._add_packing_suggestions(
+            top_recommendations, weather_data, weather_index=weather_index
+        )
         
         # Generate textual summaries for the top recommendations
         top_recommendations = await self._generate_summaries(top_recommendations, search_data)
@@ -63,256 +137,446 @@ class RecommendationEngine:
                                            flights: List[Dict[str, Any]], 
                                            hotels: List[Dict[str, Any]],
                                            weather_data: List[Dict[str, Any]],
-                                           events: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+                                           events: Optional[List[Dict[str, Any]]] = None,
+                                           top_k: Optional[int] = None,
+                                           weather_index: Optional[WeatherIndex] = None,
+                                           chosen_event_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
         """
-        Generate combinations of flights and hotels and score them
+        Score every flight and hotel combination and return the best ones
+        
+        All pairs are scored at once as a flights x hotels matrix; only the
+        top_k winners (all pairs if top_k is None) are turned into dicts,
+        sorted by total score (descending). Events with a location make hotel
+        proximity part of the convenience score.
         """
-        recommendations = []
+        if not flights or not hotels:
+            return []
         
-        # Calculate average weather scores for the date range
-        weather_scores = self._calculate_weather_scores(weather_data)
+        components = self._score_components(
+            flights, hotels, weather_data, weather_index, events=events, chosen_event_ids=chosen_event_ids
+        )
+        total_scores = (
+            self.PRICE_WEIGHT * components["price_score"]
+            + self.WEATHER_WEIGHT * components["weather_score"]
+            + self.CONVENIENCE_WEIGHT * components["convenience_score"]
+        )
         
-        # Generate combinations (limit to a reasonable number for demo purposes)
-        max_combinations = 20
-        counter = 0
+        flight_indices, hotel_indices = np.unravel_index(
+            top_k_indices(total_scores.ravel(), top_k), total_scores.shape
+        )
         
-        for flight in flights[:10]:  # Limit to top 10 flights for simplicity
-            for hotel in hotels[:10]:  # Limit to top 10 hotels for simplicity
-                if counter >= max_combinations:
-                    break
-                    
-                # Calculate scores
-                price_score = self._calculate_price_score(flight, hotel)
-                convenience_score = self._calculate_convenience_score(flight, hotel)
-                
-                # Get weather score for this date range
-                departure_date = datetime.fromisoformat(flight["departure_time"]) if isinstance(flight["departure_time"], str) else flight["departure_time"]
-                arrival_time = datetime.fromisoformat(flight["arrival_time"]) if isinstance(flight["arrival_time"], str) else flight["arrival_time"]
-                weather_score = self._get_weather_score_for_dates(weather_scores, departure_date.strftime("%Y-%m-%d"), arrival_time.strftime("%Y-%m-%d"))
-                
-                # Calculate total score (weighted average)
-                total_score = (
-                    0.4 * price_score +
-                    0.4 * weather_score +
-                    0.2 * convenience_score
-                )
-                
-                recommendation = {
-                    "flight": flight,
-                    "hotel": hotel,
-                    "score": total_score,
-                    "price_score": price_score,
-                    "weather_score": weather_score,
-                    "convenience_score": convenience_score,
-                    "total_price": flight["price"] + (hotel["price_per_night"] * self._calculate_nights(flight)),
-                    "currency": flight["currency"]  # Assuming all prices are in the same currency
-                }
-                
-                recommendations.append(recommendation)
-                counter += 1
+        recommendations = []
+        for f, h in zip(flight_indices.tolist(), hotel_indices.tolist()):
+            recommendation = self._combination(flights, hotels, components, f, h)
+            recommendation["score"] = float(total_scores[f, h])
+            recommendations.append(recommendation)
         
         return recommendations
     
-    def _calculate_price_score(self, flight: Dict[str, Any], hotel: Dict[str, Any]) -> float:
+    def _generate_budget_combinations(self,
+                                      search_data: Dict[str, Any],
+                                      flights: List[Dict[str, Any]],
+                                      hotels: List[Dict[str, Any]],
+                                      weather_data: List[Dict[str, Any]],
+                                      events: Optional[List[Dict[str, Any]]] = None,
+                                      top_k: int = 5,
+                                      weather_index: Optional[WeatherIndex] = None) -> List[Dict[str, Any]]:
         """
-        Calculate price score based on flight and hotel prices
-        Lower prices = higher score
-        """
-        # Simple scoring based on total price
-        # In a real implementation, you would use more sophisticated pricing analysis
-        flight_price = flight["price"]
-        hotel_price_per_night = hotel["price_per_night"]
-        nights = self._calculate_nights(flight)
-        total_price = flight_price + (hotel_price_per_night * nights)
-        
-        # Inverse price score (lower price = higher score)
-        # Scale between 0 and 1 (assuming prices between $100 and $2000)
-        min_price = 100
-        max_price = 2000
+        Return the best flight + hotel + events bundles within the search budget
         
-        # Clamp price within range
-        clamped_price = max(min_price, min(total_price, max_price))
+        Bundles come from the bundle optimizer (sorted by bundle score), which
+        scores only the affordable pairs and returns the component scores of
+        the chosen ones, so no flights x hotels matrix is built here.
+        """
+        bundles = self.generate_bundles(
+            search_data, flights, hotels, weather_data, events, top_k=top_k, weather_index=weather_index
+        )
+        keys = ("flight", "hotel", "price_score", "weather_score", "convenience_score", "total_price", "currency",
+                "score", "events", "bundle_score", "events_price", "bundle_price", "remaining_budget")
+        return [{key: bundle[key] for key in keys} for bundle in bundles]
+    
+    def generate_pareto_frontier(self,
+                                 flights: List[Dict[str, Any]],
+                                 hotels: List[Dict[str, Any]],
+                                 weather_data: List[Dict[str, Any]],
+                                 events: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Find the Pareto-optimal flight and hotel combinations
         
-        # Calculate score (inverse: lower price = higher score)
-        price_score = 1 - ((clamped_price - min_price) / (max_price - min_price))
+        Instead of collapsing the component scores into one weighted sum, return
+        every combination that no other combination beats on all of price,
+        weather and convenience. The best combination for any choice of
+        positive weights is always on the frontier, so a client can re-weight
+        the frontier locally without asking the server again.
         
-        return price_score
-    
-    def _calculate_convenience_score(self, flight: Dict[str, Any], hotel: Dict[str, Any]) -> float:
+        Args:
+            flights: List of flight data
+            hotels: List of hotel data
+            weather_data: List of weather data
+            events: List of event data (optional)
+            
+        Returns:
+            Dictionary with the frontier (sorted by the default weighted score),
+            the number of candidates and the per-dimension score ranges
         """
-        Calculate convenience score based on flight duration, layovers, and hotel location
+        if not flights or not hotels:
+            return {"dimensions": list(self.SCORE_DIMENSIONS), "candidate_count": 0,
+                    "frontier": [], "ranges": {}}
+        
+        components = self._score_components(flights, hotels, weather_data, events=events)
+        points = np.stack(
+            [components[dimension].ravel() for dimension in self.SCORE_DIMENSIONS], axis=1
+        )
+        frontier = pareto_frontier(points)
+        dominated_counts = dominance_counts(points, frontier)
+        frontier_points = points[frontier]
+        
+        weights = np.array([self.PRICE_WEIGHT, self.WEATHER_WEIGHT, self.CONVENIENCE_WEIGHT])
+        weighted = frontier_points @ weights
+        order = np.argsort(-weighted, kind="stable")
+        best = frontier_points.max(axis=0)
+        
+        shape = components["price_score"].shape
+        results = []
+        for rank in order.tolist():
+            f, h = np.unravel_index(frontier[rank], shape)
+            recommendation = self._combination(flights, hotels, components, int(f), int(h))
+            recommendation["score"] = float(weighted[rank])
+            recommendation["dominated_count"] = int(dominated_counts[rank])
+            recommendation["best_for"] = [
+                dimension for dimension, value, top in
+                zip(self.SCORE_DIMENSIONS, frontier_points[rank].tolist(), best.tolist())
+                if value == top
+            ]
+            results.append(recommendation)
+        
+        return {
+            "dimensions": list(self.SCORE_DIMENSIONS),
+            "candidate_count": int(len(points)),
+            "frontier": results,
+            "ranges": {
+                dimension: {"min": float(low), "max": float(high)}
+                for dimension, low, high in zip(
+                    self.SCORE_DIMENSIONS, frontier_points.min(axis=0).tolist(), best.tolist()
+                )
+            },
+        }
+    
+    def generate_bundles(self,
+                         search_data: Dict[str, Any],
+                         flights: List[Dict[str, Any]],
+                         hotels: List[Dict[str, Any]],
+                         weather_data: List[Dict[str, Any]],
+                         events: Optional[List[Dict[str, Any]]] = None,
+                         top_k: int = 1,
+                         weather_index: Optional[WeatherIndex] = None) -> List[Dict[str, Any]]:
         """
-        # Score based on flight duration (shorter = better)
-        max_duration = 600  # in minutes
-        duration_score = 1 - (min(flight["duration_minutes"], max_duration) / max_duration)
+        Pick the best flight + hotel + events bundles within the search budget
         
-        # Score based on layovers (fewer = better)
-        layovers_score = 1.0 if flight["layovers"] == 0 else (0.7 if flight["layovers"] == 1 else 0.4)
+        Args:
+            search_data: User search parameters; "budget" caps the bundle price,
+                preferences["event_categories"] marks preferred event categories and
+                preferences["event_ids"] are the events hotel proximity is measured to
+            flights: List of flight data
+            hotels: List of hotel data
+            weather_data: List of weather data
+            events: List of event data (optional)
+            top_k: Number of bundles to return
+            weather_index: Parsed weather_data (built if None)
+            
+        Returns:
+            List of bundles sorted by bundle score
+        """
+        preferences = search_data.get("preferences") or {}
+        return BundleOptimizer(self).optimize(
+            flights, hotels, weather_data, events,
+            budget=search_data.get("budget"),
+            preferred_categories=preferences.get("event_categories"),
+            top_k=top_k,
+            chosen_event_ids=preferences.get("event_ids"),
+            weather_index=weather_index,
+        )
+    
+    def build_candidate_matrix(self,
+                               flights: List[Dict[str, Any]],
+                               hotels: List[Dict[str, Any]],
+                               weather_data: List[Dict[str, Any]],
+                               events: Optional[List[Dict[str, Any]]] = None) -> CandidateMatrix:
+        """
+        Score every flight and hotel combination into a re-rankable matrix
         
-        # Hotel rating score
-        rating_score = hotel.get("rating", 3.0) / 5.0
+        Args:
+            flights: List of flight data, each with an "id"
+            hotels: List of hotel data, each with an "id"
+            weather_data: List of weather data
+            events: List of event data (optional, for hotel proximity)
+            
+        Returns:
+            CandidateMatrix with the component scores of every pair
+        """
+        components = self._score_components(flights, hotels, weather_data, events=events)
+        return CandidateMatrix(
+            flight_ids=[flight["id"] for flight in flights],
+            hotel_ids=[hotel["id"] for hotel in hotels],
+            price_score=components["price_score"],
+            weather_score=components["weather_score"],
+            convenience_score=components["convenience_score"],
+            total_price=components["total_price"],
+            layovers=[flight["layovers"] for flight in flights],
+            duration_minutes=[flight["duration_minutes"] for flight in flights],
+            hotel_rating=self._hotel_arrays(hotels)["rating"],
+        )
+
+    def best_combination(self,
+                         flights: List[Dict[str, Any]],
+                         hotels: List[Dict[str, Any]],
+                         weather_data: List[Dict[str, Any]],
+                         max_total_price: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the highest scoring flight and hotel combination
+
+        Scores are on an absolute scale, so the best combinations of different
+        destinations can be compared with each other.
+
+        Args:
+            flights: List of flight data
+            hotels: List of hotel data
+            weather_data: List of weather data
+            max_total_price: Ignore combinations whose total price is higher
+
+        Returns:
+            The best combination with its scores, or None if no combination qualifies
+        """
+        if not flights or not hotels:
+            return None
+
+        components = self._score_components(flights, hotels, weather_data)
+        total_scores = (
+            self.PRICE_WEIGHT * components["price_score"]
+            + self.WEATHER_WEIGHT * components["weather_score"]
+            + self.CONVENIENCE_WEIGHT * components["convenience_score"]
+        )
+        if max_total_price is not None:
+            total_scores = np.where(components["total_price"] <= max_total_price, total_scores, -np.inf)
+
+        f, h = np.unravel_index(int(np.argmax(total_scores)), total_scores.shape)
+        if not np.isfinite(total_scores[f, h]):
+            return None
+
+        combination = self._combination(flights, hotels, components, int(f), int(h))
+        combination["score"] = float(total_scores[f, h])
+        return combination
+
+    def _score_components(self,
+                          flights: List[Dict[str, Any]],
+                          hotels: List[Dict[str, Any]],
+                          weather_data: List[Dict[str, Any]],
+                          weather_index: Optional[WeatherIndex] = None,
+                          events: Optional[List[Dict[str, Any]]] = None,
+                          chosen_event_ids: Optional[List[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        Score every flight and hotel combination on each component
         
-        # Combine scores (weighted average)
-        convenience_score = (0.4 * duration_score + 0.3 * layovers_score + 0.3 * rating_score)
+        Events (optional) add hotel proximity to the convenience score: the mean
+        distance to the chosen events if any are given, else the number of
+        events near the hotel.
         
-        return convenience_score
+        Returns:
+            Dictionary of flights x hotels matrices: price_score, weather_score,
+            convenience_score and total_price
+        """
+        flight_arrays = self._flight_arrays(flights)
+        hotel_arrays = self._hotel_arrays(hotels, events, chosen_event_ids)
+        
+        # Weather only depends on the flight dates: one O(1) range average per flight
+        if weather_index is None:
+            weather_index = WeatherIndex(weather_data)
+        flight_weather = weather_index.mean_scores(
+            flight_arrays["departure"].astype("datetime64[D]").astype(np.int64),
+            flight_arrays["arrival"].astype("datetime64[D]").astype(np.int64),
+        )
+        
+        # Prices are already converted to the base currency
+        total_prices = (
+            flight_arrays["price"][:, None]
+            + hotel_arrays["price_per_night"][None, :] * flight_arrays["nights"][:, None]
+        )
+        
+        return {
+            "price_score": self._price_scores(total_prices),
+            "weather_score": np.broadcast_to(flight_weather[:, None], total_prices.shape),
+            "convenience_score": self._convenience_scores(flight_arrays, hotel_arrays),
+            "total_price": total_prices,
+        }
     
-    def _calculate_weather_scores(self, weather_data: List[Dict[str, Any]]) -> Dict[str, float]:
+    def _combination(self, flights: List[Dict[str, Any]], hotels: List[Dict[str, Any]],
+                     components: Dict[str, np.ndarray], f: int, h: int) -> Dict[str, Any]:
         """
-        Calculate weather scores for each date
+        Build the result dict for one flight and hotel combination (without total score)
         """
-        weather_scores = {}
-        
-        for day_weather in weather_data:
-            date_str = day_weather["date"] if isinstance(day_weather["date"], str) else day_weather["date"].strftime("%Y-%m-%d")
-            
-            # Good weather score based on:
-            # - Temperature (ideal range: 70-85°F)
-            # - Low precipitation chance
-            # - Good conditions (Sunny, Clear, Partly Cloudy)
-            
-            # Temperature score
-            temp_high = day_weather["temperature_high"]
-            ideal_temp_low = 70
-            ideal_temp_high = 85
-            
-            if ideal_temp_low <= temp_high <= ideal_temp_high:
-                temp_score = 1.0
-            else:
-                # How far from ideal range
-                if temp_high < ideal_temp_low:
-                    temp_diff = ideal_temp_low - temp_high
-                else:
-                    temp_diff = temp_high - ideal_temp_high
-                    
-                # Max penalty of 0.5 for being 20 degrees away from ideal range
-                temp_score = max(0.5, 1.0 - (temp_diff / 40.0))
-            
-            # Precipitation score (0% = 1.0, 100% = 0.0)
-            precip_score = 1.0 - (day_weather["precipitation_chance"] / 100.0)
-            
-            # Condition score
-            condition = day_weather["condition"]
-            good_conditions = ["Sunny", "Clear", "Partly Cloudy"]
-            neutral_conditions = ["Cloudy"]
-            
-            if condition in good_conditions:
-                condition_score = 1.0
-            elif condition in neutral_conditions:
-                condition_score = 0.7
-            else:
-                condition_score = 0.3
-            
-            # Final weather score (weighted)
-            weather_score = (0.4 * temp_score + 0.4 * precip_score + 0.2 * condition_score)
-            weather_scores[date_str] = weather_score
-        
-        return weather_scores
+        return {
+            "flight": flights[f],
+            "hotel": hotels[h],
+            "price_score": float(components["price_score"][f, h]),
+            "weather_score": float(components["weather_score"][f, h]),
+            "convenience_score": float(components["convenience_score"][f, h]),
+            "total_price": float(components["total_price"][f, h]),
+            "currency": self.currency_converter.base_currency
+        }
     
-    def _get_weather_score_for_dates(self, weather_scores: Dict[str, float],
-                                    start_date: str, end_date: str) -> float:
+    def _flight_arrays(self, flights: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
         """
-        Get the average weather score for a date range
+        Extract the flight fields used for scoring into NumPy arrays
+        
+        Flights may be FlightRecords (timestamps already parsed) or dicts,
+        which are converted first. Prices are converted to the base currency.
+        """
+        flights = to_records(flights, FlightRecord)
+        departures = datetime_array([flight.departure_time for flight in flights])
+        arrivals = datetime_array([flight.arrival_time for flight in flights])
+        # Whole days between departure and arrival (floored like timedelta.days), at least 1 night
+        nights = np.maximum(1, (arrivals - departures).astype(np.int64) // 86400)
+        
+        return {
+            "price": self.currency_converter.to_base(
+                [flight.price for flight in flights], [flight.currency for flight in flights]
+            ),
+            "duration_minutes": np.array([flight.duration_minutes for flight in flights], dtype=np.float64),
+            "layovers": np.array([flight.layovers for flight in flights], dtype=np.int64),
+            "departure": departures,
+            "arrival": arrivals,
+            "nights": nights,
+        }
+    
+    def _hotel_arrays(self, hotels: List[Dict[str, Any]],
+                      events: Optional[List[Dict[str, Any]]] = None,
+                      chosen_event_ids: Optional[List[int]] = None) -> Dict[str, np.ndarray]:
         """
-        # Convert strings to datetime objects for easier comparison
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
+        Extract the hotel fields used for scoring into NumPy arrays (HotelRecords or dicts),
+        with nightly prices in the base currency
         
-        relevant_scores = []
+        With events, also a "proximity" score per hotel (NaN for hotels without a location).
+        """
+        hotels = to_records(hotels, HotelRecord)
+        arrays = {
+            "price_per_night": self.currency_converter.to_base(
+                [hotel.price_per_night for hotel in hotels], [hotel.currency for hotel in hotels]
+            ),
+            "rating": np.array(
+                [hotel.rating if hotel.rating is not None else 3.0 for hotel in hotels],
+                dtype=np.float64,
+            ),
+        }
+        if events:
+            proximity = self._proximity_scores(hotels, to_records(events, EventRecord), chosen_event_ids)
+            if proximity is not None:
+                arrays["proximity"] = proximity
+        return arrays
+    
+    def _proximity_scores(self, hotels: List[HotelRecord], events: List[EventRecord],
+                          chosen_event_ids: Optional[List[int]] = None) -> Optional[np.ndarray]:
+        """
+        Score how close each hotel is to the events (1 = close), or None if no event has a location
         
-        for date_str, score in weather_scores.items():
-            date = datetime.strptime(date_str, "%Y-%m-%d")
-            if start <= date <= end:
-                relevant_scores.append(score)
+        With chosen events the score falls linearly with the mean distance to
+        them; otherwise it grows with the number of events within EVENT_RADIUS_KM,
+        found with a spatial index instead of a hotels x events distance matrix.
+        """
+        def coordinates(items):
+            return (
+                np.array([np.nan if i.latitude is None else i.latitude for i in items], dtype=np.float64),
+                np.array([np.nan if i.longitude is None else i.longitude for i in items], dtype=np.float64),
+            )
         
-        if not relevant_scores:
-            return 0.5  # Default score if no weather data available
-            
-        return sum(relevant_scores) / len(relevant_scores)
+        event_lat, event_lon = coordinates(events)
+        if np.isnan(event_lat).all():
+            return None
+        hotel_lat, hotel_lon = coordinates(hotels)
+        
+        if chosen_event_ids:
+            chosen = set(chosen_event_ids)
+            mask = np.array([event.id in chosen for event in events]) & ~np.isnan(event_lat)
+            if mask.any():
+                distances = mean_distance_km(hotel_lat, hotel_lon, event_lat[mask], event_lon[mask])
+                return 1.0 - np.minimum(distances, self.MAX_EVENT_DISTANCE_KM) / self.MAX_EVENT_DISTANCE_KM
+        
+        index = SpatialIndex(event_lat, event_lon, cell_km=self.EVENT_RADIUS_KM)
+        nearby = index.count_within(hotel_lat, hotel_lon, self.EVENT_RADIUS_KM)
+        scores = np.minimum(nearby, self.NEARBY_EVENTS_TARGET) / self.NEARBY_EVENTS_TARGET
+        return np.where(np.isnan(hotel_lat) | np.isnan(hotel_lon), np.nan, scores)
     
-    def _calculate_nights(self, flight: Dict[str, Any]) -> int:
+    def _price_scores(self, total_prices: np.ndarray) -> np.ndarray:
         """
-        Calculate the number of nights between departure and arrival dates
+        Calculate price scores from total trip prices
+        Lower prices = higher score
+        """
+        # Inverse price score scaled between 0 and 1 over the expected price range
+        clamped = np.clip(total_prices, self.MIN_TRIP_PRICE, self.MAX_TRIP_PRICE)
+        return 1.0 - (clamped - self.MIN_TRIP_PRICE) / (self.MAX_TRIP_PRICE - self.MIN_TRIP_PRICE)
+    
+    def _convenience_scores(self, flight_arrays: Dict[str, np.ndarray],
+                            hotel_arrays: Dict[str, np.ndarray]) -> np.ndarray:
         """
-        departure_date = datetime.fromisoformat(flight["departure_time"]) if isinstance(flight["departure_time"], str) else flight["departure_time"]
-        arrival_time = datetime.fromisoformat(flight["arrival_time"]) if isinstance(flight["arrival_time"], str) else flight["arrival_time"]
+        Calculate convenience scores based on flight duration, layovers, hotel rating
+        and, when known, hotel proximity to events
+        """
+        # Score based on flight duration (shorter = better)
+        duration_score = 1.0 - np.minimum(flight_arrays["duration_minutes"], self.MAX_FLIGHT_DURATION) / self.MAX_FLIGHT_DURATION
         
-        # Calculate nights (assuming departure and return flights)
-        nights = (arrival_time - departure_date).days
+        # Score based on layovers (fewer = better)
+        layovers = flight_arrays["layovers"]
+        layovers_score = np.where(layovers == 0, 1.0, np.where(layovers == 1, 0.7, 0.4))
         
-        # Ensure at least 1 night
-        return max(1, nights)
+        # Hotel rating score, shared half and half with proximity where it is known
+        rating_score = hotel_arrays["rating"] / 5.0
+        proximity = hotel_arrays.get("proximity")
+        if proximity is not None:
+            rating_score = np.where(np.isnan(proximity), rating_score, 0.5 * rating_score + 0.5 * proximity)
+        
+        # Combine scores (weighted average)
+        return (0.4 * duration_score + 0.3 * layovers_score)[:, None] + 0.3 * rating_score[None, :]
+    
+    _parse_datetime = staticmethod(parse_datetime)
     
     def _add_packing_suggestions(self, recommendations: List[Dict[str, Any]], 
-                               weather_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                               weather_data: List[Dict[str, Any]],
+                               weather_index: Optional[WeatherIndex] = None) -> List[Dict[str, Any]]:
         """
         Add packing suggestions based on weather forecast
+        
+        Recommendations sharing a travel period share its weather summary, and
+        the packing lists of all summaries come from the compiled rule table in
+        one batch, so a search's recommendations cost one list per distinct
+        weather signature.
         """
+        if weather_index is None:
+            weather_index = WeatherIndex(weather_data)
+        
+        # Min/max temperatures and predominant condition, once per date range
+        summaries_by_period = {}
+        summaries = []
         for recommendation in recommendations:
             flight = recommendation["flight"]
-            
-            # Get date range for this recommendation
-            departure_date = datetime.fromisoformat(flight["departure_time"]) if isinstance(flight["departure_time"], str) else flight["departure_time"]
-            arrival_time = datetime.fromisoformat(flight["arrival_time"]) if isinstance(flight["arrival_time"], str) else flight["arrival_time"]
-            
-            # Find min/max temperatures and predominant conditions
-            temps = []
-            conditions = []
-            
-            for day_weather in weather_data:
-                date = datetime.strptime(day_weather["date"], "%Y-%m-%d") if isinstance(day_weather["date"], str) else day_weather["date"]
-                
-                if departure_date.date() <= date.date() <= arrival_time.date():
-                    temps.append(day_weather["temperature_high"])
-                    temps.append(day_weather["temperature_low"])
-                    conditions.append(day_weather["condition"])
-            
-            if not temps:
+            period = (flight["departure_time"], flight["arrival_time"])
+            if period not in summaries_by_period:
+                summaries_by_period[period] = weather_index.summary(
+                    self._parse_datetime(flight["departure_time"]),
+                    self._parse_datetime(flight["arrival_time"]),
+                )
+            summaries.append(summaries_by_period[period])
+        
+        known = [summary for summary in summaries if summary is not None]
+        suggestions = iter(recommendation_packing_rules.suggest_many(known))
+        for recommendation, weather_summary in zip(recommendations, summaries):
+            if weather_summary is None:
                 # No weather data for this period
                 recommendation["packing_suggestions"] = {
                     "clothing": ["Pack for variable weather, layering recommended"],
                     "accessories": ["Sunglasses", "Umbrella (just in case)"],
                     "documents": ["Passport", "ID", "Hotel confirmation", "Travel insurance"]
                 }
-                continue
-                
-            min_temp = min(temps)
-            max_temp = max(temps)
-            
-            # Determine predominant conditions
-            from collections import Counter
-            condition_counts = Counter(conditions)
-            predominant_condition = condition_counts.most_common(1)[0][0]
-            
-            # Generate packing suggestions based on temperature and conditions
-            clothing = ["Comfortable walking shoes"]
-            accessories = ["Smartphone charger", "Travel adapter"]
-            documents = ["Passport", "ID", "Hotel confirmation", "Travel insurance"]
-            
-            # Temperature-based clothing
-            if min_temp < 50:
-                clothing.extend(["Winter coat", "Sweaters", "Long pants", "Warm socks"])
-            elif min_temp < 65:
-                clothing.extend(["Light jacket", "Long-sleeve shirts", "Pants"])
             else:
-                clothing.extend(["T-shirts", "Shorts/skirts"])
-                
-            if max_temp > 80:
-                clothing.extend(["Light, breathable clothing"])
-                accessories.append("Hat")
-                
-            # Condition-based items
-            if "Rain" in predominant_condition or "Thunderstorm" in predominant_condition:
-                accessories.extend(["Umbrella", "Raincoat"])
-            
-            if "Sunny" in predominant_condition or "Clear" in predominant_condition:
-                accessories.extend(["Sunglasses", "Sunscreen"])
-            
-            recommendation["packing_suggestions"] = {
-                "clothing": clothing,
-                "accessories": accessories,
-                "documents": documents
-            }
+                recommendation["packing_suggestions"] = next(suggestions)
             
         return recommendations
     
@@ -320,56 +584,99 @@ class RecommendationEngine:
                                 search_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Generate text summaries for recommendations using LLM
+        
+        Every recommendation first gets the template summary. With an LLM
+        client, summaries are then requested either concurrently (at most
+        max_concurrency calls at once, each with a timeout) or all in one
+        batched prompt; any summary the LLM does not deliver keeps its
+        template text.
         """
         for recommendation in recommendations:
-            flight = recommendation["flight"]
-            hotel = recommendation["hotel"]
-            
-            # For demonstration, generate a simple summary
-            # In a real implementation, you would use the LLM client to generate these
-            
-            # Price comparison
-            avg_price = 1000  # Placeholder for average price
-            price_diff_percent = ((avg_price - recommendation["total_price"]) / avg_price) * 100
+            recommendation["summary"] = self._template_summary(recommendation)
+        
+        if not self.llm_client or not recommendations:
+            return recommendations
+        
+        if self.batch_summaries:
+            llm_summaries = await self._get_llm_summaries_batch(recommendations, search_data)
+        else:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
             
-            price_text = f"{abs(price_diff_percent):.0f}% cheaper than average" if price_diff_percent > 0 else \
-                        f"{abs(price_diff_percent):.0f}% more expensive than average"
-                        
-            # Weather text
-            weather_score = recommendation["weather_score"]
-            if weather_score > 0.8:
-                weather_text = "excellent weather conditions"
-            elif weather_score > 0.6:
-                weather_text = "good weather conditions"
-            else:
-                weather_text = "acceptable weather conditions"
-                
-            # Convenience text
-            convenience_score = recommendation["convenience_score"]
-            if convenience_score > 0.8:
-                convenience_text = f"convenient {flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m non-stop flight"
-            elif convenience_score > 0.6:
-                convenience_text = f"reasonable {flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m flight"
-            else:
-                convenience_text = f"{flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m flight with {flight['layovers']} layover(s)"
+            async def bounded_summary(recommendation: Dict[str, Any]) -> Optional[str]:
+                async with semaphore:
+                    return await self._get_llm_summary(recommendation, search_data)
             
-            # Generate summary
-            summary = (
-                f"This {price_text} deal features a {convenience_text} with {flight['airline']} "
-                f"and a stay at the {hotel['rating']}-star {hotel['name']} in {hotel['location']}. "
-                f"You can expect {weather_text} during your trip."
+            llm_summaries = await asyncio.gather(
+                *(bounded_summary(recommendation) for recommendation in recommendations)
             )
-            
-            # Add LLM-generated summary if available
-            if self.llm_client:
-                llm_summary = await self._get_llm_summary(recommendation, search_data)
-                if llm_summary:
-                    summary = llm_summary
-            
-            recommendation["summary"] = summary
+        
+        for recommendation, llm_summary in zip(recommendations, llm_summaries):
+            if llm_summary:
+                recommendation["summary"] = llm_summary
             
         return recommendations
+    
+    def _template_summary(self, recommendation: Dict[str, Any]) -> str:
+        """
+        Build the template (non-LLM) summary for a recommendation
+        """
+        flight = recommendation["flight"]
+        hotel = recommendation["hotel"]
         
+        # Price comparison
+        avg_price = 1000  # Placeholder for average price
+        price_diff_percent = ((avg_price - recommendation["total_price"]) / avg_price) * 100
+        
+        price_text = f"{abs(price_diff_percent):.0f}% cheaper than average" if price_diff_percent > 0 else \
+                    f"{abs(price_diff_percent):.0f}% more expensive than average"
+                    
+        # Weather text
+        weather_score = recommendation["weather_score"]
+        if weather_score > 0.8:
+            weather_text = "excellent weather conditions"
+        elif weather_score > 0.6:
+            weather_text = "good weather conditions"
+        else:
+            weather_text = "acceptable weather conditions"
+            
+        # Convenience text
+        convenience_score = recommendation["convenience_score"]
+        if convenience_score > 0.8:
+            convenience_text = f"convenient {flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m non-stop flight"
+        elif convenience_score > 0.6:
+            convenience_text = f"reasonable {flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m flight"
+        else:
+            convenience_text = f"{flight['duration_minutes'] // 60}h{flight['duration_minutes'] % 60}m flight with {flight['layovers']} layover(s)"
+        
+        return (
+            f"This {price_text} deal features a {convenience_text} with {flight['airline']} "
+            f"and a stay at the {hotel['rating']}-star {hotel['name']} in {hotel['location']}. "
+            f"You can expect {weather_text} during your trip."
+        )
+        
+    def _get_summary_chain(self) -> LLMChain:
+        """
+        Get the chain used for summaries, created once and reused for every call
+        """
+        if self._summary_chain is None:
+            # The prompt is passed through as-is, so braces in the data need no escaping
+            prompt = PromptTemplate(template="{prompt}", input_variables=["prompt"])
+            self._summary_chain = LLMChain(llm=self.llm_client, prompt=prompt)
+        return self._summary_chain
+    
+    async def _run_llm(self, prompt: str) -> str:
+        """
+        Run one prompt through the LLM (or the response cache), giving up after llm_timeout seconds
+        """
+        llm_client = self.llm_client
+        response = llm_cache.get_or_call(
+            llm_model_name(llm_client),
+            prompt,
+            {"temperature": getattr(llm_client, "temperature", None)},
+            lambda: llm_client_pool.run(llm_client, lambda: self._get_summary_chain().arun(prompt=prompt)),
+        )
+        return await asyncio.wait_for(response, timeout=self.llm_timeout)
+    
     async def _get_llm_summary(self, recommendation: Dict[str, Any], 
                              search_data: Dict[str, Any]) -> str:
         """
@@ -378,26 +685,70 @@ class RecommendationEngine:
         try:
             if not self.llm_client:
                 return None
-                
-            # Build prompt for LLM
-            prompt_template = self._build_llm_prompt(recommendation, search_data)
-            
-            # Create LangChain PromptTemplate
-            prompt = PromptTemplate(
-                template=prompt_template,
-                input_variables=[]  # No input variables as we've already filled the template
-            )
             
-            # Create LangChain chain
-            chain = LLMChain(llm=self.llm_client, prompt=prompt)
-            
-            # Generate summary
-            summary = await chain.arun({})
-            
-            return summary
+            summary = await self._run_llm(self._build_llm_prompt(recommendation, search_data))
+            return summary.strip() or None
+        except asyncio.TimeoutError:
+            logger.warning(f"LLM summary timed out after {self.llm_timeout}s, using template summary")
+            return None
         except Exception as e:
             logger.error(f"Error generating LLM summary: {e}")
             return None
+    
+    async def _get_llm_summaries_batch(self, recommendations: List[Dict[str, Any]],
+                                     search_data: Dict[str, Any]) -> List[Optional[str]]:
+        """
+        Get LLM-generated summaries for all recommendations with a single prompt
+        
+        Returns:
+            One summary per recommendation, None where the reply had none
+        """
+        try:
+            sections = "\n".join(
+                f"### Recommendation {number}\n{self._build_llm_prompt(recommendation, search_data)}"
+                for number, recommendation in enumerate(recommendations, start=1)
+            )
+            prompt = (
+                f"You will write {len(recommendations)} separate travel recommendation summaries. "
+                f"Follow the instructions in each section below.\n\n{sections}\n\n"
+                "Reply with only a JSON object mapping each recommendation number "
+                '(as a string) to its summary, e.g. {"1": "...", "2": "..."}.'
+            )
+            reply = await self._run_llm(prompt)
+            return self._parse_batch_summaries(reply, len(recommendations))
+        except asyncio.TimeoutError:
+            logger.warning(f"Batched LLM summaries timed out after {self.llm_timeout}s, using template summaries")
+        except Exception as e:
+            logger.error(f"Error generating batched LLM summaries: {e}")
+        return [None] * len(recommendations)
+    
+    @staticmethod
+    def _parse_batch_summaries(reply: str, count: int) -> List[Optional[str]]:
+        """
+        Parse a batched summary reply: a JSON object keyed by number, or numbered paragraphs
+        """
+        summaries: List[Optional[str]] = [None] * count
+        
+        # Tolerate Markdown code fences and text around the JSON object
+        match = re.search(r"\{.*\}", reply, re.DOTALL)
+        if match:
+            try:
+                parsed = json.loads(match.group(0))
+                for key, value in parsed.items():
+                    number = int(key)
+                    if 1 <= number <= count and isinstance(value, str) and value.strip():
+                        summaries[number - 1] = value.strip()
+                return summaries
+            except (ValueError, TypeError, AttributeError):
+                pass
+        
+        # Fallback: "1. ...", "2) ..." or "Recommendation 1: ..." paragraphs
+        parts = re.split(r"^\s*(?:#+\s*)?(?:Recommendation\s+)?(\d+)\s*[.):]\s*", reply, flags=re.MULTILINE)
+        for number, text in zip(parts[1::2], parts[2::2]):
+            number = int(number)
+            if 1 <= number <= count and text.strip():
+                summaries[number - 1] = text.strip()
+        return summaries
             
     def _build_llm_prompt(self, recommendation: Dict[str, Any], 
                         search_data: Dict[str, Any]) -> str:
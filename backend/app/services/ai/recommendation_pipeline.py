@@ -0,0 +1,104 @@
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.models.search import Search
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.records import EventRecord, FlightRecord, HotelRecord, WeatherDay, to_records
+from app.services.cache import candidate_store
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_search_recommendations(db: Session,
+                                          search_id: int,
+                                          engine: Optional[RecommendationEngine] = None,
+                                          top_k: int = 5) -> int:
+    """
+    Recommendation stage of search processing
+
+    Runs the recommendation engine on the search's stored flights, hotels,
+    weather and events, then writes the winning recommendations and their
+    packing suggestions and marks the search completed, all in one
+    transaction.
+
+    Args:
+        db: Database session
+        search_id: ID of the search whose data has been ingested
+        engine: Recommendation engine to use (a default engine if None)
+        top_k: Number of recommendations to store
+
+    Returns:
+        Number of recommendations stored
+    """
+    search = db.get(Search, search_id)
+    if search is None:
+        raise ValueError(f"Search {search_id} not found")
+
+    # Compact records built straight from the column values: no ORM objects are built
+    flights = to_records(crud.flight.get_rows_by_search(db=db, search_id=search_id), FlightRecord)
+    hotels = to_records(crud.hotel.get_rows_by_search(db=db, search_id=search_id), HotelRecord)
+    weather_data = to_records(crud.weather.get_rows_by_search(db=db, search_id=search_id), WeatherDay)
+    events = to_records(crud.event.get_rows_by_search(db=db, search_id=search_id), EventRecord)
+
+    engine = engine or RecommendationEngine()
+    recommendations = await engine.generate_recommendations(
+        _search_data(search), flights, hotels, weather_data, events, top_k=top_k
+    )
+
+    crud.recommendation.create_multi_for_search(
+        db=db,
+        search_id=search_id,
+        rows=[_recommendation_row(recommendation) for recommendation in recommendations],
+        packing_suggestions=[recommendation.get("packing_suggestions") for recommendation in recommendations],
+        commit=False,
+    )
+    # Commits the recommendations together with the status change
+    crud.search.update_by_id(db=db, id=search_id, obj_in={"status": "completed"})
+    candidate_store.invalidate([search_id])
+
+    logger.info(f"Stored {len(recommendations)} recommendations for search_id: {search_id}")
+    return len(recommendations)
+
+
+def _search_data(search: Search) -> Dict[str, Any]:
+    """
+    Search parameters in the shape the recommendation engine expects
+    """
+    return {
+        "origin": search.departure_location,
+        "destination": search.destination,
+        "travelers": (search.adults or 0) + (search.children or 0),
+        "budget": search.budget,
+        "preferences": search.preferences or {},
+    }
+
+
+def _recommendation_row(recommendation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Map an engine recommendation to Recommendation column values
+    """
+    details = {
+        "total_price": recommendation["total_price"],
+        "currency": recommendation["currency"],
+    }
+    if "bundle_price" in recommendation:
+        # Recommendations picked within the search budget
+        details.update({
+            "event_ids": [event["id"] for event in recommendation["events"]],
+            "events_price": recommendation["events_price"],
+            "bundle_price": recommendation["bundle_price"],
+            "remaining_budget": recommendation["remaining_budget"],
+        })
+    return {
+        "flight_id": recommendation["flight"]["id"],
+        "hotel_id": recommendation["hotel"]["id"],
+        "score": recommendation["score"],
+        "price_score": recommendation["price_score"],
+        "weather_score": recommendation["weather_score"],
+        "convenience_score": recommendation["convenience_score"],
+        "summary": recommendation.get("summary"),
+        "details": details,
+    }
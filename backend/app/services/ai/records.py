@@ -0,0 +1,194 @@
+import datetime
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Type, TypeVar
+
+import numpy as np
+
+from app.core.dates import days_since_epoch, from_days_since_epoch, parse_datetime  # noqa: F401 (re-exported)
+
+R = TypeVar("R", bound="_Record")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_SECOND = datetime.timedelta(seconds=1)
+_NAT = np.iinfo(np.int64).min
+
+
+def datetime_array(values: Sequence[Optional[datetime.datetime]]) -> np.ndarray:
+    """
+    Convert parsed timestamps to a datetime64[s] array (None becomes NaT)
+
+    Much faster than letting NumPy convert datetime objects one by one. Aware
+    timestamps are converted to UTC.
+    """
+    def seconds(value: Optional[datetime.datetime]) -> int:
+        if value is None:
+            return _NAT
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return (value - _EPOCH) // _SECOND
+
+    return np.fromiter((seconds(value) for value in values), dtype=np.int64, count=len(values)).view(
+        "datetime64[s]"
+    )
+
+
+class _Record:
+    """
+    Shared behaviour of the compact records
+
+    Records are slotted dataclasses: one fixed-layout object per item instead
+    of a dict, with timestamps parsed once when the record is built. They
+    also support read-only item access (record["price"], record.get("rating"))
+    so code written against scraper dicts works on them unchanged.
+    """
+
+    __slots__ = ()
+
+    # Fields holding timestamps, parsed by from_dict
+    DATETIME_FIELDS = ()
+
+    @classmethod
+    def from_dict(cls: Type[R], data: Mapping[str, Any]) -> R:
+        """
+        Build a record from a scraper dict or a database row mapping (unknown keys are ignored)
+        """
+        values = {name: data.get(name) for name in cls.__dataclass_fields__ if name in data}
+        for name in cls.DATETIME_FIELDS:
+            if name in values:
+                values[name] = parse_datetime(values[name])
+        return cls(**values)
+
+    @classmethod
+    def from_orm(cls: Type[R], obj: Any) -> R:
+        """
+        Build a record from an ORM object
+        """
+        return cls(**{name: getattr(obj, name, None) for name in cls.__dataclass_fields__})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert to a plain dict with the ORM column names (timestamps stay datetimes)
+        """
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+
+@dataclass(slots=True)
+class FlightRecord(_Record):
+    """
+    Flight offer used by the scoring path
+    """
+
+    DATETIME_FIELDS = ("departure_time", "arrival_time")
+
+    price: float = 0.0
+    departure_time: Optional[datetime.datetime] = None
+    arrival_time: Optional[datetime.datetime] = None
+    duration_minutes: int = 0
+    layovers: int = 0
+    currency: str = "USD"
+    airline: Optional[str] = None
+    flight_number: Optional[str] = None
+    origin: Optional[str] = None
+    destination: Optional[str] = None
+    source_website: Optional[str] = None
+    source_url: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    id: Optional[int] = None
+    search_id: Optional[int] = None
+
+
+@dataclass(slots=True)
+class HotelRecord(_Record):
+    """
+    Hotel offer used by the scoring path
+    """
+
+    price_per_night: float = 0.0
+    rating: Optional[float] = None
+    currency: str = "USD"
+    name: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    amenities: Optional[List[str]] = None
+    description: Optional[str] = None
+    source_website: Optional[str] = None
+    source_url: Optional[str] = None
+    image_url: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    id: Optional[int] = None
+    search_id: Optional[int] = None
+
+
+@dataclass(slots=True)
+class WeatherDay(_Record):
+    """
+    One day of a weather forecast
+    """
+
+    DATETIME_FIELDS = ("date",)
+
+    date: Optional[datetime.datetime] = None
+    temperature_high: float = 0.0
+    temperature_low: float = 0.0
+    precipitation_chance: float = 0.0
+    condition: Optional[str] = None
+    humidity: Optional[float] = None
+    wind_speed: Optional[float] = None
+    location: Optional[str] = None
+    source_website: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    id: Optional[int] = None
+    search_id: Optional[int] = None
+
+
+@dataclass(slots=True)
+class EventRecord(_Record):
+    """
+    Event at the destination
+    """
+
+    DATETIME_FIELDS = ("start_date", "end_date")
+
+    start_date: Optional[datetime.datetime] = None
+    end_date: Optional[datetime.datetime] = None
+    price: Optional[float] = None
+    is_free: bool = False
+    category: Optional[str] = None
+    currency: str = "USD"
+    title: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    source_website: Optional[str] = None
+    source_url: Optional[str] = None
+    image_url: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    id: Optional[int] = None
+    search_id: Optional[int] = None
+
+
+def to_records(items: Optional[Iterable[Any]], record_type: Type[R]) -> List[R]:
+    """
+    Convert scraper dicts or row mappings to records; records are passed through unchanged
+
+    Args:
+        items: Dicts, row mappings or records (None for no items)
+        record_type: Record class to build
+
+    Returns:
+        List of records
+    """
+    if not items:
+        return []
+    return [item if isinstance(item, record_type) else record_type.from_dict(item) for item in items]
@@ -0,0 +1,149 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Cell coordinates are packed into one int64 key, 21 bits per axis
+_AXIS_BITS = 21
+_AXIS_OFFSET = 1 << (_AXIS_BITS - 1)
+
+
+def _to_xyz(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Earth-centred Cartesian coordinates (km) of latitude/longitude points
+    """
+    lat = np.radians(latitudes)
+    lon = np.radians(longitudes)
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_KM * np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Great-circle distance (km) between points; arguments broadcast like NumPy arrays
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(lon2) - np.asarray(lon1))
+    h = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def mean_distance_km(latitudes: Sequence[float], longitudes: Sequence[float],
+                     target_latitudes: Sequence[float], target_longitudes: Sequence[float]) -> np.ndarray:
+    """
+    Mean great-circle distance from each point to a small set of targets (e.g. chosen events)
+
+    Returns NaN for every point when there are no targets.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    if len(target_latitudes) == 0:
+        return np.full(latitudes.shape, np.nan)
+    distances = haversine_km(
+        latitudes[:, None], np.asarray(longitudes, dtype=np.float64)[:, None],
+        np.asarray(target_latitudes, dtype=np.float64)[None, :],
+        np.asarray(target_longitudes, dtype=np.float64)[None, :],
+    )
+    return distances.mean(axis=1)
+
+
+class SpatialIndex:
+    """
+    Uniform grid index over latitude/longitude points for radius queries
+
+    Points are mapped to Earth-centred Cartesian coordinates and bucketed in
+    cubic cells. Two points within r km along the surface are within r km in
+    a straight line too, so a radius query only has to look at the cells
+    within r of the query cell, which makes it exact everywhere on the globe
+    (no projection or date-line issues). Cells are found for all queries at
+    once with binary searches over the sorted cell keys, so answering every
+    hotel's radius query costs about O((H + pairs found) log E) instead of
+    a dense H x E distance matrix.
+    """
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], cell_km: float = 1.0):
+        """
+        Build the index
+
+        Args:
+            latitudes: Point latitudes (NaN for points without a location)
+            longitudes: Point longitudes
+            cell_km: Grid cell edge; about the typical query radius works best
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.cell_km = float(cell_km)
+        if 2 * EARTH_RADIUS_KM / self.cell_km >= _AXIS_OFFSET:
+            raise ValueError("cell_km is too small")
+        self.size = len(latitudes)
+
+        located = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        xyz = _to_xyz(latitudes[located], longitudes[located])
+        keys = self._keys(np.floor(xyz / self.cell_km).astype(np.int64))
+        order = np.argsort(keys, kind="stable")
+
+        self._keys_sorted = keys[order]
+        self._xyz = xyz[order]
+        self._indices = located[order]
+
+    def pairs_within(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                     radius_km: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find all (query, point) pairs within radius_km of each other
+
+        Args:
+            latitudes: Query latitudes (NaN queries match nothing)
+            longitudes: Query longitudes
+            radius_km: Search radius along the Earth's surface
+
+        Returns:
+            Arrays of query indices, point indices and distances (km), sorted by query
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0))
+        located = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        if not len(located) or not len(self._keys_sorted) or radius_km < 0:
+            return empty
+
+        query_xyz = _to_xyz(latitudes[located], longitudes[located])
+        query_cells = np.floor(query_xyz / self.cell_km).astype(np.int64)
+        reach = int(np.ceil(radius_km / self.cell_km))
+        steps = np.arange(-reach, reach + 1)
+        offsets = np.stack(np.meshgrid(steps, steps, steps, indexing="ij"), axis=-1).reshape(-1, 3)
+
+        # Ranges of sorted points in every neighbouring cell of every query
+        keys = self._keys(query_cells[:, None, :] + offsets[None, :, :]).ravel()
+        starts = np.searchsorted(self._keys_sorted, keys, side="left")
+        counts = np.searchsorted(self._keys_sorted, keys, side="right") - starts
+        total = int(counts.sum())
+        if total == 0:
+            return empty
+
+        # Expand the ranges into candidate pairs without a Python loop
+        query_of_range = np.repeat(np.arange(len(located)), len(offsets))
+        query_candidates = np.repeat(query_of_range, counts)
+        range_starts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        point_candidates = range_starts + np.arange(total)
+
+        # Straight-line distance <= chord of the radius <=> surface distance <= radius
+        chord = np.linalg.norm(self._xyz[point_candidates] - query_xyz[query_candidates], axis=1)
+        max_chord = 2 * EARTH_RADIUS_KM * np.sin(min(radius_km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+        keep = chord <= max_chord * (1 + 1e-12)
+        chord = chord[keep]
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / (2 * EARTH_RADIUS_KM), 1.0))
+        return located[query_candidates[keep]], self._indices[point_candidates[keep]], distances
+
+    def count_within(self, latitudes: Sequence[float], longitudes: Sequence[float],
+                     radius_km: float) -> np.ndarray:
+        """
+        Count the points within radius_km of each query point
+        """
+        queries, _, _ = self.pairs_within(latitudes, longitudes, radius_km)
+        return np.bincount(queries, minlength=len(latitudes))
+
+    @staticmethod
+    def _keys(cells: np.ndarray) -> np.ndarray:
+        shifted = cells + _AXIS_OFFSET
+        return (shifted[..., 0] << (2 * _AXIS_BITS)) | (shifted[..., 1] << _AXIS_BITS) | shifted[..., 2]
@@ -0,0 +1,308 @@
+import asyncio
+import datetime
+import logging
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.ai.price_stats import PriceStatsTracker
+from app.services.ai.records import days_since_epoch, from_days_since_epoch, parse_datetime
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+
+logger = logging.getLogger(__name__)
+
+# Design matrix columns: intercept, trend, Tuesday..Sunday (Monday is the baseline), annual cycle
+_INTERCEPT, _TREND = 0, 1
+_DOW = slice(2, 8)
+_SEASON = slice(8, 10)
+_COLUMNS = 10
+
+# Trend time unit (days); keeps the trend column on the same scale as the others
+_TREND_SCALE_DAYS = 30.0
+
+
+def _t_quantile_975(dof: np.ndarray) -> np.ndarray:
+    """
+    97.5% quantile of Student's t (Cornish-Fisher expansion; within 4% for 3+ degrees of freedom)
+    """
+    z = 1.959964
+    dof = np.asarray(dof, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+                + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+
+
+def _design(days: np.ndarray, time_mean: np.ndarray, active: np.ndarray) -> np.ndarray:
+    """
+    Design rows for observations at the given days, with inactive columns zeroed
+    """
+    x = np.zeros(days.shape + (_COLUMNS,))
+    x[..., _INTERCEPT] = 1.0
+    x[..., _TREND] = (days - time_mean) / _TREND_SCALE_DAYS
+    # 1970-01-01 was a Thursday; Monday is 0
+    dow = np.floor(days + 3).astype(np.int64) % 7
+    for day in range(1, 7):
+        x[..., _DOW.start + day - 1] = dow == day
+    angle = 2 * np.pi * days / 365.25
+    x[..., _SEASON.start] = np.sin(angle)
+    x[..., _SEASON.start + 1] = np.cos(angle)
+    return x * active
+
+
+def fit_price_trends(codes: np.ndarray,
+                     days: np.ndarray,
+                     prices: np.ndarray,
+                     forecast_days: int = settings.PRICE_TREND_FORECAST_DAYS,
+                     min_observations: int = 5,
+                     min_dow_observations: int = 14,
+                     min_seasonal_span_days: float = 180.0) -> Dict[str, np.ndarray]:
+    """
+    Fit a linear trend with day-of-week and annual terms to many price series at once
+
+    Every series gets the model price = intercept + slope * t + day-of-week
+    effect + annual sine/cosine. The normal equations of all series are built
+    together (each X'X entry is one bincount over all observations) and solved
+    as one stacked pseudo-inverse, so thousands of routes cost a few array
+    passes rather than a Python loop of regressions. Terms a series has too
+    little data for (day of week below min_dow_observations, the annual cycle
+    below min_seasonal_span_days of history) are left out of its model.
+
+    Args:
+        codes: Series index (0..S-1) of each observation
+        days: Observation times in days since the epoch
+        prices: Observed prices
+        forecast_days: Days forecast after each series' last observation
+        min_observations: Series with fewer observations are not fitted
+        min_dow_observations: Observations needed to fit day-of-week effects
+        min_seasonal_span_days: History span needed to fit the annual cycle
+
+    Returns:
+        Dict of arrays with one entry per series: "fitted" (bool), "observations",
+        "slope_per_day", "slope_ci_low", "slope_ci_high", "level" (fitted price
+        at the last observation), "last_day" and "forecast" (S x forecast_days);
+        unfitted series have NaN results
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    days = np.asarray(days, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    series = int(codes.max()) + 1 if codes.size else 0
+
+    counts = np.bincount(codes, minlength=series)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        time_mean = np.bincount(codes, weights=days, minlength=series) / counts
+        price_mean = np.bincount(codes, weights=prices, minlength=series) / counts
+    first_day = np.full(series, np.inf)
+    last_day = np.full(series, -np.inf)
+    np.minimum.at(first_day, codes, days)
+    np.maximum.at(last_day, codes, days)
+
+    active = np.zeros((series, _COLUMNS))
+    active[:, :2] = 1.0
+    active[:, _DOW] = (counts >= min_dow_observations)[:, None]
+    active[:, _SEASON] = (last_day - first_day >= min_seasonal_span_days)[:, None]
+
+    # Normal equations of every series; prices are centred per series for accuracy
+    x = _design(days, time_mean[codes], active[codes])
+    y = prices - price_mean[codes]
+    xtx = np.empty((series, _COLUMNS, _COLUMNS))
+    for j in range(_COLUMNS):
+        for k in range(j, _COLUMNS):
+            xtx[:, j, k] = xtx[:, k, j] = np.bincount(codes, weights=x[:, j] * x[:, k], minlength=series)
+    xty = np.stack([np.bincount(codes, weights=x[:, j] * y, minlength=series) for j in range(_COLUMNS)], axis=1)
+    yty = np.bincount(codes, weights=y * y, minlength=series)
+
+    xtx_inv = np.linalg.pinv(xtx, hermitian=True)
+    beta = np.einsum("spq,sq->sp", xtx_inv, xty)
+    rank = np.linalg.matrix_rank(xtx, hermitian=True)
+
+    # Residual variance and the slope's confidence interval
+    rss = np.maximum(yty - 2 * np.einsum("sp,sp->s", beta, xty)
+                     + np.einsum("sp,spq,sq->s", beta, xtx, beta), 0.0)
+    dof = counts - rank
+    fitted = (counts >= min_observations) & (dof > 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sigma2 = np.where(fitted, rss / np.where(dof > 0, dof, 1), np.nan)
+        slope_se = np.sqrt(sigma2 * np.maximum(xtx_inv[:, _TREND, _TREND], 0.0)) / _TREND_SCALE_DAYS
+    slope = np.where(fitted, beta[:, _TREND] / _TREND_SCALE_DAYS, np.nan)
+    margin = _t_quantile_975(np.where(fitted, dof, 1)) * slope_se
+
+    # Level at the last observation and the forecast for the following days
+    steps = last_day[:, None] + np.arange(1, forecast_days + 1)[None, :]
+    level = np.einsum("sp,sp->s", _design(last_day, time_mean, active), beta) + price_mean
+    forecast = np.einsum("shp,sp->sh", _design(steps, time_mean[:, None], active[:, None, :]), beta)
+    forecast += price_mean[:, None]
+
+    return {
+        "fitted": fitted,
+        "observations": counts,
+        "slope_per_day": slope,
+        "slope_ci_low": slope - margin,
+        "slope_ci_high": slope + margin,
+        "slope_se": np.where(fitted, slope_se, np.nan),
+        "level": np.where(fitted, level, np.nan),
+        "last_day": last_day,
+        "forecast": np.where(fitted[:, None], forecast, np.nan),
+    }
+
+
+def fit_price_series(dates: Sequence[Any], prices: Sequence[float],
+                     forecast_days: int = settings.PRICE_TREND_FORECAST_DAYS,
+                     min_observations: int = 5) -> Dict[str, float]:
+    """
+    Fit one price series with the batch model (for ad-hoc histories)
+
+    Returns:
+        Scalar results of fit_price_trends for the series (forecast omitted)
+    """
+    days = np.array([days_since_epoch(parse_datetime(d)) for d in dates], dtype=np.float64)
+    result = fit_price_trends(np.zeros(len(days), dtype=np.intp), days, prices, forecast_days,
+                              min_observations=min_observations)
+    return {name: values[0].item() for name, values in result.items() if name != "forecast"}
+
+
+class PriceTrendJob:
+    """
+    Scheduled batch job fitting price trends for every route and property
+
+    Loads the scraped price history of the last history_days, fits all flight
+    routes and hotel properties in one batch each with fit_price_trends and
+    replaces the stored trends, which the API then serves as they are. Keys
+    are the same as those of the running price statistics.
+    """
+
+    def __init__(self,
+                 history_days: int = settings.PRICE_TREND_HISTORY_DAYS,
+                 forecast_days: int = settings.PRICE_TREND_FORECAST_DAYS,
+                 refresh_seconds: int = settings.PRICE_TREND_REFRESH_SECONDS,
+                 currency_converter: Optional[CurrencyConverter] = None):
+        """
+        Initialize the job
+
+        Args:
+            history_days: Days of price history fitted
+            forecast_days: Days forecast after each key's last observation
+            refresh_seconds: Time between runs of the periodic job
+            currency_converter: Converts prices to the base currency (the shared converter if None)
+        """
+        self.history_days = history_days
+        self.forecast_days = forecast_days
+        self.refresh_seconds = refresh_seconds
+        self.currency_converter = currency_converter or default_currency_converter
+
+    def run(self, db: Session, now: Optional[datetime.datetime] = None) -> Dict[str, int]:
+        """
+        Fit and store the trends of all flight routes and hotel properties
+
+        Args:
+            db: Database session
+            now: Time of the run (now if None)
+
+        Returns:
+            Number of trends stored per kind
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        since = now - datetime.timedelta(days=self.history_days)
+
+        flights = crud.flight.get_price_history(db, since=since)
+        hotels = crud.hotel.get_price_history(db, since=since)
+        flight_rows = self.fit(
+            [PriceStatsTracker.route_key(f["origin"], f["destination"]) for f in flights],
+            [f["observed_at"] for f in flights], [f["price"] for f in flights],
+            [f["currency"] for f in flights], now,
+        )
+        hotel_rows = self.fit(
+            [PriceStatsTracker.property_key(h["name"], h["location"]) for h in hotels],
+            [h["observed_at"] for h in hotels], [h["price_per_night"] for h in hotels],
+            [h["currency"] for h in hotels], now,
+        )
+
+        stored = {
+            "flight": crud.price_trend.replace_kind(db, kind="flight", rows=flight_rows),
+            "hotel": crud.price_trend.replace_kind(db, kind="hotel", rows=hotel_rows),
+        }
+        logger.info(f"Fitted price trends: {stored['flight']} routes, {stored['hotel']} hotels")
+        return stored
+
+    def fit(self,
+            keys: Sequence[Optional[str]],
+            observed_at: Sequence[datetime.datetime],
+            prices: Sequence[float],
+            currencies: Sequence[Optional[str]],
+            now: datetime.datetime) -> List[Dict[str, Any]]:
+        """
+        Fit every key's price series and build its PriceTrend row
+
+        Args:
+            keys: Route or property key of each observation (None to skip it)
+            observed_at: Scrape time of each observation
+            prices: Observed prices
+            currencies: Currency code of each price
+            now: Time of the run, stored as fitted_at
+
+        Returns:
+            Column values of each key that had enough data to fit
+        """
+        prices = self.currency_converter.to_base(prices, currencies)
+        valid = np.flatnonzero(~np.isnan(prices) & np.array([key is not None for key in keys], dtype=bool))
+        if not valid.size:
+            return []
+
+        unique_keys, codes = np.unique(np.array([keys[i] for i in valid], dtype=object).astype(str),
+                                       return_inverse=True)
+        days = np.array([days_since_epoch(observed_at[i]) for i in valid], dtype=np.float64)
+        result = fit_price_trends(codes.reshape(-1), days, prices[valid], self.forecast_days)
+
+        rows = []
+        for index in np.flatnonzero(result["fitted"]).tolist():
+            last_observed_at = from_days_since_epoch(result["last_day"][index])
+            rows.append({
+                "key": unique_keys[index],
+                "currency": self.currency_converter.base_currency,
+                "observations": int(result["observations"][index]),
+                "slope_per_day": float(result["slope_per_day"][index]),
+                "slope_ci_low": _finite_or_none(result["slope_ci_low"][index]),
+                "slope_ci_high": _finite_or_none(result["slope_ci_high"][index]),
+                "level": float(result["level"][index]),
+                "forecast": [
+                    {"date": (last_observed_at.date() + datetime.timedelta(days=step + 1)).isoformat(),
+                     "price": round(float(price), 2)}
+                    for step, price in enumerate(result["forecast"][index].tolist())
+                ],
+                "last_observed_at": last_observed_at,
+                "fitted_at": now,
+            })
+        return rows
+
+    def run_with_new_session(self) -> Dict[str, int]:
+        """
+        Run the job with its own database session (for the background task)
+        """
+        db = SessionLocal()
+        try:
+            return self.run(db)
+        finally:
+            db.close()
+
+    async def run_periodically(self) -> None:
+        """
+        Refit all trends every refresh_seconds; run as a background task for the life of the app
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.run_with_new_session)
+            except Exception as e:
+                logger.error(f"Price trend job failed: {str(e)}")
+            await asyncio.sleep(self.refresh_seconds)
+
+
+def _finite_or_none(value: float) -> Optional[float]:
+    return float(value) if math.isfinite(value) else None
+
+
+# Global price trend job
+price_trend_job = PriceTrendJob()
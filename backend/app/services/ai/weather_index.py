@@ -0,0 +1,237 @@
+import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.services.ai.records import WeatherDay, datetime_array, to_records
+
+DayLike = Union[str, datetime.date, datetime.datetime, np.datetime64]
+
+
+class WeatherIndex:
+    """
+    Dense, day-indexed view of a weather forecast with O(1) date-range aggregates
+
+    The forecast is parsed once into arrays covering every day between the first
+    and last forecast date. Prefix sums give range sums and counts (weather
+    score, temperatures, rainy days, per-condition counts) and sparse tables give
+    range minimum/maximum temperatures, so any date-range aggregate costs O(1)
+    regardless of trip length. All range queries also accept arrays of ranges.
+    """
+
+    # Ideal daily high temperature range (°F) for the weather score
+    IDEAL_TEMP_LOW = 70.0
+    IDEAL_TEMP_HIGH = 85.0
+
+    # Precipitation chance (%) above which a day counts as a rainy day
+    PRECIPITATION_DAY_THRESHOLD = 30.0
+
+    GOOD_CONDITIONS = ("Sunny", "Clear", "Partly Cloudy")
+    NEUTRAL_CONDITIONS = ("Cloudy",)
+
+    def __init__(self, weather_data: Sequence[Dict[str, Any]]):
+        """
+        Build the index from WeatherDay records or weather dicts (scraper output or rows)
+
+        Args:
+            weather_data: Items with date, temperature_high, temperature_low,
+                precipitation_chance and condition. Several items for the
+                same date are averaged.
+        """
+        self.conditions: List[str] = []
+        if not weather_data:
+            self.first_day = 0
+            self.num_days = 0
+            self._build(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0),
+                        np.empty(0, dtype=np.int64))
+            return
+
+        weather_data = to_records(weather_data, WeatherDay)
+        days = datetime_array([day.date for day in weather_data]).astype("datetime64[D]").astype(np.int64)
+        highs = np.array([day.temperature_high for day in weather_data], dtype=np.float64)
+        lows = np.array([day.temperature_low for day in weather_data], dtype=np.float64)
+        precipitation = np.array([day.precipitation_chance for day in weather_data], dtype=np.float64)
+
+        condition_codes = {}
+        for day in weather_data:
+            condition_codes.setdefault(day.condition, len(condition_codes))
+        self.conditions = list(condition_codes)
+        codes = np.array([condition_codes[day.condition] for day in weather_data], dtype=np.int64)
+
+        self.first_day = int(days.min())
+        self.num_days = int(days.max()) - self.first_day + 1
+        self._build(days - self.first_day, highs, lows, precipitation, codes)
+
+    @staticmethod
+    def to_day(value: DayLike) -> int:
+        """
+        Convert a date, datetime, datetime64 or ISO string to days since the epoch
+        """
+        if isinstance(value, str):
+            value = value[:10]
+        elif isinstance(value, datetime.datetime):
+            value = value.date()
+        return int(np.datetime64(value, "D").astype(np.int64))
+
+    @property
+    def empty(self) -> bool:
+        return self.num_days == 0
+
+    def mean_scores(self, start_days: np.ndarray, end_days: np.ndarray,
+                    default: float = 0.5) -> np.ndarray:
+        """
+        Average daily weather score over each [start, end] day range
+
+        Args:
+            start_days: First day of each range (days since the epoch)
+            end_days: Last day of each range, inclusive
+            default: Score for ranges without any forecast day
+
+        Returns:
+            Array of mean scores, one per range
+        """
+        lo, hi = self._clip(start_days, end_days)
+        count = self._range_sum(self._count_prefix, lo, hi)
+        total = self._range_sum(self._score_prefix, lo, hi)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, total / np.maximum(count, 1), default)
+
+    def summary(self, start: Optional[DayLike] = None,
+                end: Optional[DayLike] = None) -> Optional[Dict[str, Any]]:
+        """
+        Aggregate the forecast over a date range (the whole forecast by default)
+
+        Returns:
+            Dict with min_temp, max_temp, avg_temp, precipitation_days,
+            predominant_condition and days, or None if no forecast day is in range
+        """
+        start_day = self.first_day if start is None else self.to_day(start)
+        end_day = self.first_day + self.num_days - 1 if end is None else self.to_day(end)
+        lo, hi = self._clip(np.array([start_day]), np.array([end_day]))
+        count = int(self._range_sum(self._count_prefix, lo, hi)[0])
+        if count == 0:
+            return None
+
+        condition_counts = self._range_sum(self._condition_prefix, lo[0], hi[0])
+        return {
+            "min_temp": float(self._range_extreme(self._min_table, np.minimum, lo, hi)[0]),
+            "max_temp": float(self._range_extreme(self._max_table, np.maximum, lo, hi)[0]),
+            "avg_temp": float(self._range_sum(self._temp_prefix, lo, hi)[0] / (2 * count)),
+            "precipitation_days": int(self._range_sum(self._rainy_prefix, lo, hi)[0]),
+            "predominant_condition": self.conditions[int(np.argmax(condition_counts))],
+            "days": count,
+        }
+
+    def _build(self, offsets: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+               precipitation: np.ndarray, codes: np.ndarray) -> None:
+        """
+        Lay the observations out on the dense day axis and build prefix sums and sparse tables
+        """
+        n = self.num_days
+        count = np.zeros(n)
+        np.add.at(count, offsets, 1.0)
+
+        # Same-day duplicates are averaged for the score, temperatures and rain
+        def daily_mean(values: np.ndarray) -> np.ndarray:
+            sums = np.zeros(n)
+            np.add.at(sums, offsets, values)
+            return np.divide(sums, count, out=np.zeros(n), where=count > 0)
+
+        present = count > 0
+        mean_high = daily_mean(highs)
+        mean_low = daily_mean(lows)
+        mean_precipitation = daily_mean(precipitation)
+        daily_score = daily_mean(self._daily_scores(highs, precipitation, codes))
+
+        day_min = np.full(n, np.inf)
+        day_max = np.full(n, -np.inf)
+        np.minimum.at(day_min, offsets, np.minimum(highs, lows))
+        np.maximum.at(day_max, offsets, np.maximum(highs, lows))
+
+        condition_counts = np.zeros((n, len(self.conditions)))
+        np.add.at(condition_counts, (offsets, codes), 1.0)
+
+        self._count_prefix = self._prefix(present.astype(np.float64))
+        self._score_prefix = self._prefix(daily_score)
+        self._temp_prefix = self._prefix(mean_high + mean_low)
+        self._rainy_prefix = self._prefix(
+            (present & (mean_precipitation > self.PRECIPITATION_DAY_THRESHOLD)).astype(np.float64)
+        )
+        self._condition_prefix = self._prefix(condition_counts)
+        self._min_table = self._sparse_table(day_min, np.minimum)
+        self._max_table = self._sparse_table(day_max, np.maximum)
+
+    def _daily_scores(self, highs: np.ndarray, precipitation: np.ndarray,
+                      codes: np.ndarray) -> np.ndarray:
+        """
+        Score each observation on temperature, precipitation chance and condition
+        """
+        # Temperature score: 1.0 inside the ideal range, losing 1/40 per degree outside, min 0.5
+        temp_diff = np.maximum(self.IDEAL_TEMP_LOW - highs, 0.0) + np.maximum(highs - self.IDEAL_TEMP_HIGH, 0.0)
+        temp_score = np.maximum(0.5, 1.0 - temp_diff / 40.0)
+
+        # Precipitation score (0% = 1.0, 100% = 0.0)
+        precip_score = 1.0 - precipitation / 100.0
+
+        # Condition score
+        condition_scores = np.array([
+            1.0 if condition in self.GOOD_CONDITIONS
+            else 0.7 if condition in self.NEUTRAL_CONDITIONS
+            else 0.3
+            for condition in self.conditions
+        ])
+        condition_score = condition_scores[codes] if len(codes) else np.empty(0)
+
+        return 0.4 * temp_score + 0.4 * precip_score + 0.2 * condition_score
+
+    def _clip(self, start_days: np.ndarray, end_days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Map day ranges to index ranges [lo, hi) on the dense axis (empty when outside)
+        """
+        lo = np.clip(np.asarray(start_days, dtype=np.int64) - self.first_day, 0, self.num_days)
+        hi = np.clip(np.asarray(end_days, dtype=np.int64) - self.first_day + 1, 0, self.num_days)
+        return lo, np.maximum(hi, lo)
+
+    @staticmethod
+    def _prefix(values: np.ndarray) -> np.ndarray:
+        """
+        Prefix sums with a leading zero row, so sum(values[lo:hi]) = p[hi] - p[lo]
+        """
+        zero = np.zeros((1,) + values.shape[1:])
+        return np.concatenate([zero, np.cumsum(values, axis=0)])
+
+    @staticmethod
+    def _range_sum(prefix: np.ndarray, lo, hi):
+        return prefix[hi] - prefix[lo]
+
+    @staticmethod
+    def _sparse_table(values: np.ndarray, op) -> List[np.ndarray]:
+        """
+        Sparse table: level k holds op over windows of length 2**k
+        """
+        table = [values]
+        width = 1
+        while 2 * width <= len(values):
+            previous = table[-1]
+            table.append(op(previous[:-width], previous[width:]))
+            width *= 2
+        return table
+
+    @staticmethod
+    def _range_extreme(table: List[np.ndarray], op, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        """
+        Range min/max over [lo, hi) from a sparse table with two overlapping windows
+        """
+        result = np.full(len(lo), np.nan)
+        length = hi - lo
+        valid = length > 0
+        if not valid.any():
+            return result
+        level = np.zeros(len(lo), dtype=np.int64)
+        level[valid] = np.floor(np.log2(length[valid])).astype(np.int64)
+        for k in np.unique(level[valid]).tolist():
+            rows = valid & (level == k)
+            left = table[k][lo[rows]]
+            right = table[k][hi[rows] - (1 << k)]
+            result[rows] = op(left, right)
+        return result
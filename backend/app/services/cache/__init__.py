@@ -0,0 +1,9 @@
+from app.services.cache.candidate_store import CandidateStore, candidate_store
+from app.services.cache.llm_cache import LLMResponseCache, bucket, llm_cache, llm_model_name
+from app.services.cache.query_cache import QueryCache, query_cache
+from app.services.cache.scrape_cache import ScrapeCache, scrape_cache
+
+__all__ = [
+    "CandidateStore", "LLMResponseCache", "QueryCache", "ScrapeCache",
+    "bucket", "candidate_store", "llm_cache", "llm_model_name", "query_cache", "scrape_cache",
+]
@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    # Redis is optional: without it only the in-process tier is used
+    redis = None
+
+from app.core.config import settings
+from app.services.ai.candidate_matrix import CandidateMatrix
+
+logger = logging.getLogger(__name__)
+
+
+class CandidateStore:
+    """
+    Two-tier cache of scored candidate matrices, keyed by search ID
+
+    Decoded matrices are kept in an in-process LRU; their binary form is
+    shared through Redis (when configured) so other workers can re-rank a
+    search without rebuilding its matrix.
+    """
+
+    # How long to stop talking to Redis after a connection error
+    REDIS_RETRY_SECONDS = 30.0
+
+    def __init__(self,
+                 max_entries: int = settings.CANDIDATE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.CANDIDATE_CACHE_TTL_SECONDS,
+                 redis_url: str = settings.REDIS_URL):
+        """
+        Initialize the store
+
+        Args:
+            max_entries: Maximum number of matrices kept in the in-process LRU
+            ttl_seconds: Time-to-live of a matrix in both tiers
+            redis_url: Redis connection URL, empty to disable the Redis tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[int, Tuple[float, CandidateMatrix]]" = OrderedDict()
+
+        self._redis = None
+        self._redis_disabled_until = 0.0
+
+    def get(self, search_id: int) -> Optional[CandidateMatrix]:
+        """
+        Get the cached matrix of a search, or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(search_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(search_id)
+                return entry[1]
+
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            data = client.get(self._key(search_id))
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        if data is None:
+            return None
+
+        matrix = CandidateMatrix.from_bytes(data)
+        self._store_local(search_id, matrix, now)
+        return matrix
+
+    def put(self, search_id: int, matrix: CandidateMatrix) -> None:
+        """
+        Cache the matrix of a search in both tiers
+        """
+        self._store_local(search_id, matrix, time.monotonic())
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            client.set(self._key(search_id), matrix.to_bytes(), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def get_or_build(self, search_id: int,
+                     builder: Callable[[], Optional[CandidateMatrix]]) -> Optional[CandidateMatrix]:
+        """
+        Return the cached matrix of a search, building and caching it on a miss
+
+        Args:
+            search_id: ID of the search
+            builder: Callable producing the matrix, or None if there is nothing to score
+
+        Returns:
+            The matrix, or None if the builder produced none
+        """
+        matrix = self.get(search_id)
+        if matrix is None:
+            matrix = builder()
+            if matrix is not None:
+                self.put(search_id, matrix)
+        return matrix
+
+    def invalidate(self, search_ids: Iterable[int]) -> None:
+        """
+        Drop the matrices of the given searches from both tiers
+        """
+        search_ids = list(search_ids)
+        if not search_ids:
+            return
+        with self._lock:
+            for search_id in search_ids:
+                self._entries.pop(search_id, None)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                client.delete(*[self._key(search_id) for search_id in search_ids])
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def clear(self) -> None:
+        """
+        Drop all in-process entries
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _key(search_id: int) -> str:
+        return f"cm:{search_id}"
+
+    def _store_local(self, search_id: int, matrix: CandidateMatrix, now: float) -> None:
+        with self._lock:
+            self._entries[search_id] = (now + self.ttl_seconds, matrix)
+            self._entries.move_to_end(search_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_redis(self):
+        """
+        Lazily create the Redis client; None when Redis is unavailable
+        """
+        if redis is None or not self.redis_url:
+            return None
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+        return self._redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Candidate store Redis tier unavailable, using in-process tier only: {error}")
+        self._redis_disabled_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+
+# Global candidate store instance
+candidate_store = CandidateStore()
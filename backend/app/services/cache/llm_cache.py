@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def bucket(value: Optional[float], step: float) -> Optional[float]:
+    """
+    Round a numeric prompt input to the nearest multiple of step
+
+    Prompts built from bucketed values repeat far more often, so more of them
+    are answered from the cache. None is passed through.
+    """
+    if value is None:
+        return None
+    bucketed = round(float(value) / step) * step
+    return int(bucketed) if float(step).is_integer() else round(bucketed, 6)
+
+
+def llm_model_name(llm_client: Any) -> str:
+    """
+    Identify the model behind a LangChain LLM client for cache keys
+    """
+    for attribute in ("model", "model_name"):
+        name = getattr(llm_client, attribute, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(llm_client).__name__
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM responses keyed by model, normalized prompt and parameters
+
+    Responses are looked up in an in-process LRU first and then in a SQLite
+    file shared by all workers on the host. Both tiers expire entries after
+    the TTL. In get_or_call the SQLite reads and writes run in a worker
+    thread, so a slow disk never blocks the event loop. Prompts are normalized by collapsing whitespace, so indentation
+    and line wrapping differences do not cause misses.
+    """
+
+    def __init__(self,
+                 path: str = settings.LLM_CACHE_PATH,
+                 max_entries: int = settings.LLM_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.LLM_CACHE_TTL_SECONDS,
+                 enabled: bool = settings.LLM_CACHE_ENABLED):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file of the disk tier, empty to keep responses in memory only
+            max_entries: Maximum number of responses kept in the in-process LRU
+            ttl_seconds: Time-to-live of a response in both tiers
+            enabled: If False, every call goes straight to the LLM
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        # The lock guards the in-process tier; the disk tier has its own, so that
+        # memory lookups never wait for SQLite
+        self._lock = threading.RLock()
+        self._db_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_failed = False
+
+    async def get_or_call(self, model: str, prompt: str, params: Optional[Dict[str, Any]],
+                          call: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return the cached response for a prompt, calling the LLM on a miss
+
+        Args:
+            model: Model name
+            prompt: Prompt text sent to the model
+            params: Generation parameters that affect the response (e.g. temperature)
+            call: Coroutine function performing the LLM call
+
+        Returns:
+            The cached or fresh response
+        """
+        if not self.enabled:
+            return await call()
+
+        key = self.make_key(model, prompt, params)
+        response = self._get_local(key)
+        if response is None and self.path:
+            response = await asyncio.to_thread(self._get_disk, key)
+        if response is not None:
+            return response
+
+        response = await call()
+        self._count("misses")
+        if response:
+            expires_at = self._set_local(key, response)
+            if self.path:
+                await asyncio.to_thread(self._set_disk, key, response, expires_at)
+        return response
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key of a model, prompt and parameters
+        """
+        normalized = re.sub(r"\s+", " ", prompt).strip()
+        payload = json.dumps([model, normalized, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get a cached response by key, or None (blocks on the disk tier)
+        """
+        response = self._get_local(key)
+        return response if response is not None else self._get_disk(key)
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response in both tiers (blocks on the disk tier)
+        """
+        self._set_disk(key, response, self._set_local(key, response))
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired responses from the disk tier
+
+        Returns:
+            Number of responses deleted
+        """
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return 0
+            try:
+                deleted = db.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),)).rowcount
+                db.commit()
+                return deleted
+            except sqlite3.Error as e:
+                self._db_error(e)
+                return 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get hit/miss counters and the hit ratio
+        """
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            total = hits + self._stats["misses"]
+            return {**self._stats, "hit_ratio": hits / total if total else 0.0}
+
+    def clear(self) -> None:
+        """
+        Drop all in-process entries and counters (the disk tier is kept)
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[1]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return None
+            try:
+                row = db.execute(
+                    "SELECT response, expires_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._db_error(e)
+                return None
+        if row is None or row[1] <= now:
+            return None
+
+        with self._lock:
+            self._store_local(key, row[0], row[1])
+            self._stats["disk_hits"] += 1
+        return row[0]
+
+    def _set_local(self, key: str, response: str) -> float:
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_local(key, response, expires_at)
+        return expires_at
+
+    def _set_disk(self, key: str, response: str, expires_at: float) -> None:
+        with self._db_lock:
+            db = self._get_db()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, response, expires_at) VALUES (?, ?, ?)",
+                    (key, response, expires_at),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                self._db_error(e)
+
+    def _store_local(self, key: str, response: str, expires_at: float) -> None:
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """
+        Lazily open the SQLite disk tier; None when disabled or unavailable
+        """
+        if not self.path or self._db_failed:
+            return None
+        if self._db is None:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_responses ("
+                    "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                db.commit()
+                self._db = db
+            except (OSError, sqlite3.Error) as e:
+                self._db_error(e)
+        return self._db
+
+    def _db_error(self, error: Exception) -> None:
+        logger.warning(f"LLM cache disk tier unavailable, using in-process tier only: {error}")
+        self._db_failed = True
+        self._db = None
+
+
+# Global LLM response cache instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    # Redis is optional: without it only the in-process tier is used
+    redis = None
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Two-tier cache for user-scoped list query results
+
+    Results are looked up in an in-process LRU first and then in Redis (when
+    configured). Keys contain a per-(namespace, user) generation number, so
+    invalidating a user's results is a single counter increment. Old entries are
+    never read again and simply age out of both tiers.
+
+    Without Redis the generation counters live in this process only, so other
+    worker processes may serve stale results until the TTL expires.
+    """
+
+    # How long to stop talking to Redis after a connection error
+    REDIS_RETRY_SECONDS = 30.0
+
+    def __init__(self,
+                 max_entries: int = settings.QUERY_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.QUERY_CACHE_TTL_SECONDS,
+                 redis_url: str = settings.REDIS_URL,
+                 enabled: bool = settings.QUERY_CACHE_ENABLED):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of results kept in the in-process LRU
+            ttl_seconds: Time-to-live of a cached result in both tiers
+            redis_url: Redis connection URL, empty to disable the Redis tier
+            enabled: If False, every lookup goes straight to the loader
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self.enabled = enabled
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Tuple[str, Hashable], int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self._redis = None
+        self._redis_disabled_until = 0.0
+
+    def get_or_load(self, namespace: str, user_id: Hashable,
+                    params: Dict[str, Any], loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for a query, running the loader on a miss
+
+        Args:
+            namespace: Query family, e.g. "deals" or "recommendations"
+            user_id: ID of the user the query is scoped to
+            params: Query parameters (skip, limit, filters, ...)
+            loader: Callable producing a JSON-serializable result
+
+        Returns:
+            The cached or freshly loaded result
+        """
+        if not self.enabled:
+            return loader()
+
+        key = self._make_key(namespace, user_id, params)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(namespace, "local_hits")
+                return entry[1]
+
+        value = self._redis_get(key)
+        if value is not None:
+            self._store_local(key, value, now)
+            self._count(namespace, "redis_hits")
+            return value
+
+        value = loader()
+        self._store_local(key, value, now)
+        self._redis_set(key, value)
+        self._count(namespace, "misses")
+        return value
+
+    def invalidate(self, namespaces: Iterable[str], user_ids: Iterable[Hashable]) -> None:
+        """
+        Invalidate the cached results of the given namespaces for the given users
+
+        Args:
+            namespaces: Query families to invalidate
+            user_ids: Users whose results are affected
+        """
+        pairs = [(namespace, user_id) for namespace in namespaces
+                 for user_id in user_ids if user_id is not None]
+        if not pairs:
+            return
+
+        with self._lock:
+            for pair in pairs:
+                self._generations[pair] = self._generations.get(pair, 0) + 1
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for namespace, user_id in pairs:
+                    pipe.incr(self._generation_key(namespace, user_id))
+                pipe.execute()
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get hit/miss counters and hit ratios per namespace
+
+        Returns:
+            Dictionary mapping namespace to its counters and "hit_ratio"
+        """
+        with self._lock:
+            report = {}
+            for namespace, counters in self._stats.items():
+                hits = counters["local_hits"] + counters["redis_hits"]
+                total = hits + counters["misses"]
+                report[namespace] = {
+                    **counters,
+                    "hit_ratio": hits / total if total else 0.0,
+                }
+            return report
+
+    def clear(self) -> None:
+        """
+        Drop all in-process entries, generations and counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._stats.clear()
+
+    def _make_key(self, namespace: str, user_id: Hashable, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a query, including the current generation
+        """
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        generation = self._generation(namespace, user_id)
+        return f"qc:{namespace}:{user_id}:{generation}:{digest}"
+
+    def _generation(self, namespace: str, user_id: Hashable) -> int:
+        """
+        Get the current generation for a (namespace, user), preferring Redis
+        """
+        client = self._get_redis()
+        if client is not None:
+            try:
+                value = client.get(self._generation_key(namespace, user_id))
+                return int(value) if value is not None else 0
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        with self._lock:
+            return self._generations.get((namespace, user_id), 0)
+
+    @staticmethod
+    def _generation_key(namespace: str, user_id: Hashable) -> str:
+        return f"qc:gen:{namespace}:{user_id}"
+
+    def _store_local(self, key: str, value: Any, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _count(self, namespace: str, counter: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(
+                namespace, {"local_hits": 0, "redis_hits": 0, "misses": 0}
+            )
+            counters[counter] += 1
+
+    def _get_redis(self):
+        """
+        Lazily create the Redis client; None when Redis is unavailable
+        """
+        if redis is None or not self.redis_url:
+            return None
+        if time.monotonic() < self._redis_disabled_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+        return self._redis
+
+    def _redis_get(self, key: str) -> Optional[Any]:
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(key)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _redis_set(self, key: str, value: Any) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            client.set(key, json.dumps(value, default=str), ex=self.ttl_seconds)
+        except redis.RedisError as e:
+            self._redis_failed(e)
+
+    def _redis_failed(self, error: Exception) -> None:
+        logger.warning(f"Query cache Redis tier unavailable, using in-process tier only: {error}")
+        self._redis_disabled_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+
+
+# Global query cache instance
+query_cache = QueryCache()
@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from app.core.config import settings
+
+
+class ScrapeCache:
+    """
+    In-process cache of scraper results with request coalescing
+
+    Results are keyed by scraper kind and scrape parameters, so hotels,
+    weather and events of a destination are scraped once and shared by every
+    request for the same dates, whatever the origin. Concurrent requests for
+    a key that is being scraped wait for the running scrape instead of
+    starting their own. The scrape runs as its own task, so cancelling one
+    waiting request leaves it running for the others. Failed scrapes are not
+    cached.
+    """
+
+    def __init__(self,
+                 max_entries: int = settings.SCRAPE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: int = settings.SCRAPE_CACHE_TTL_SECONDS):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of scrape results kept
+            ttl_seconds: Time-to-live of a scrape result
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._stats = {"hits": 0, "coalesced": 0, "misses": 0}
+
+    async def get_or_scrape(self, kind: str, params: Dict[str, Any],
+                            scrape: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """
+        Return the cached result of a scrape, running it on a miss
+
+        Args:
+            kind: Scraper kind, e.g. "flights" or "hotels"
+            params: Scrape parameters
+            scrape: Coroutine function performing the scrape
+
+        Returns:
+            The cached or freshly scraped result
+        """
+        key = self._make_key(kind, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                # The scrape runs detached from the requests, so a caller that is
+                # cancelled (e.g. a disconnected client) does not cancel it for the others
+                pending = asyncio.ensure_future(self._scrape(key, scrape))
+                pending.add_done_callback(self._scrape_done)
+                self._in_flight[key] = pending
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        return await asyncio.shield(pending)
+
+    async def _scrape(self, key: str,
+                      scrape: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        try:
+            result = await scrape()
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _scrape_done(task: asyncio.Future) -> None:
+        # Mark a failure as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get hit/miss counters and the hit ratio (coalesced requests count as hits)
+        """
+        with self._lock:
+            hits = self._stats["hits"] + self._stats["coalesced"]
+            total = hits + self._stats["misses"]
+            return {**self._stats, "hit_ratio": hits / total if total else 0.0}
+
+    def clear(self) -> None:
+        """
+        Drop all cached results and counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats = {"hits": 0, "coalesced": 0, "misses": 0}
+
+    @staticmethod
+    def _make_key(kind: str, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"sc:{kind}:{digest}"
+
+
+# Global scrape cache instance
+scrape_cache = ScrapeCache()
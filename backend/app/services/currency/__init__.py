@@ -0,0 +1,3 @@
+from app.services.currency.converter import CurrencyConverter, currency_converter
+
+__all__ = ["CurrencyConverter", "currency_converter"]
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CurrencyConverter:
+    """
+    Converts prices to one base currency with a cached FX rate table
+
+    Rates are loaded from a local JSON file in the common
+    {"base": "EUR", "rates": {"USD": 1.08, ...}} shape (units of each currency
+    per unit of the file's base) and rebased to the configured base currency.
+    The table is reloaded when it is older than refresh_seconds and the file
+    has changed, either on use or by the periodic refresh task.
+
+    Whole price arrays are converted at once: currency codes are factorized
+    and each distinct currency's rate is looked up once. Prices in currencies
+    missing from the table are left unchanged (as if already in the base
+    currency), with a warning, which is what scoring did before conversion.
+    """
+
+    def __init__(self,
+                 base_currency: str = settings.BASE_CURRENCY,
+                 rates_path: str = settings.FX_RATES_PATH,
+                 refresh_seconds: int = settings.FX_RATES_REFRESH_SECONDS):
+        """
+        Initialize the converter
+
+        Args:
+            base_currency: Currency all prices are converted to
+            rates_path: JSON file with the FX rates, empty for base currency only
+            refresh_seconds: How often to check the rate file for changes
+        """
+        self.base_currency = base_currency.upper()
+        self.rates_path = rates_path
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.RLock()
+        self._rates: Dict[str, float] = {self.base_currency: 1.0}
+        self._loaded_mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._warned = set()
+
+    def load(self) -> bool:
+        """
+        Load the rate table from the rate file
+
+        Returns:
+            True if the table was loaded, False if the file is missing or invalid
+        """
+        if not self.rates_path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.rates_path)
+            with open(self.rates_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.set_rates(data["rates"], data.get("base", self.base_currency))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Could not load FX rates from {self.rates_path}: {e}")
+            return False
+
+        with self._lock:
+            self._loaded_mtime = mtime
+            self._checked_at = time.monotonic()
+        logger.info(f"Loaded {len(self._rates)} FX rates from {self.rates_path}")
+        return True
+
+    def set_rates(self, rates: Dict[str, float], base_currency: Optional[str] = None) -> None:
+        """
+        Replace the rate table
+
+        Args:
+            rates: Units of each currency per unit of base_currency
+            base_currency: Currency the rates are quoted against (default: the converter's base)
+        """
+        quoted = {code.upper(): float(rate) for code, rate in rates.items() if rate and float(rate) > 0}
+        quoted_base = (base_currency or self.base_currency).upper()
+        quoted[quoted_base] = 1.0
+        if self.base_currency not in quoted:
+            raise ValueError(f"FX rates do not include the base currency {self.base_currency}")
+
+        # Rebase: units of each currency per unit of our base currency
+        base_rate = quoted[self.base_currency]
+        with self._lock:
+            self._rates = {code: rate / base_rate for code, rate in quoted.items()}
+            self._warned.clear()
+
+    def refresh_if_stale(self) -> None:
+        """
+        Reload the rate file if it was last checked refresh_seconds ago and has changed since
+        """
+        if not self.rates_path or time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+        try:
+            changed = os.path.getmtime(self.rates_path) != self._loaded_mtime
+        except OSError:
+            return
+        if changed:
+            self.load()
+
+    async def refresh_periodically(self) -> None:
+        """
+        Keep the rate table fresh; run as a background task for the life of the app
+        """
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            self.refresh_if_stale()
+
+    def rate(self, currency: Optional[str]) -> float:
+        """
+        Units of a currency per unit of the base currency (1.0 for unknown currencies)
+        """
+        code = (currency or self.base_currency).upper()
+        with self._lock:
+            rate = self._rates.get(code)
+            if rate is None:
+                if code not in self._warned:
+                    self._warned.add(code)
+                    logger.warning(f"No FX rate for {code}; its prices are used unconverted")
+                return 1.0
+            return rate
+
+    def to_base(self, amounts: Any, currencies: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        Convert an array of amounts to the base currency
+
+        Args:
+            amounts: Amounts (NaN stays NaN)
+            currencies: Currency code of each amount (None means the base currency)
+
+        Returns:
+            Float array of amounts in the base currency
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if amounts.size == 0:
+            return amounts
+        self.refresh_if_stale()
+
+        codes = np.array([code or self.base_currency for code in currencies], dtype=str)
+        unique, inverse = np.unique(codes, return_inverse=True)
+        if len(unique) == 1 and unique[0].upper() == self.base_currency:
+            return amounts
+        rates = np.array([self.rate(code) for code in unique], dtype=np.float64)
+        return amounts / rates[inverse]
+
+    def convert(self, amount: float, from_currency: Optional[str], to_currency: Optional[str]) -> float:
+        """
+        Convert a single amount between two currencies
+        """
+        return float(amount) / self.rate(from_currency) * self.rate(to_currency)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Base currency, number of known currencies and age of the rate file
+        """
+        with self._lock:
+            return {
+                "base_currency": self.base_currency,
+                "currencies": len(self._rates),
+                "rates_path": self.rates_path or None,
+                "loaded_mtime": self._loaded_mtime,
+            }
+
+
+# Global currency converter instance
+currency_converter = CurrencyConverter()
@@ -1,17 +1,24 @@
+import asyncio
 import logging
 from app.services.scraper.bright_data_client import BrightDataClient
+from app.services.ai.booking_window import booking_window_tables
+from app.services.ai.trend_model import price_trend_job
+from app.services.currency import currency_converter
+from app.services.llm import llm_client_pool
 from app.core.config import settings
-import google.generativeai as genai
 
 # Global instance of clients to be used throughout the app
 logger = logging.getLogger(__name__)
 bright_data_client = None
+fx_refresh_task = None
+price_trend_task = None
+booking_tables_task = None
 
 async def initialize_services():
     """
     Initialize services on application startup
     """
-    global bright_data_client
+    global bright_data_client, fx_refresh_task, price_trend_task, booking_tables_task
     
     # Initialize Bright Data client
     bright_data_client = BrightDataClient(
@@ -21,15 +28,35 @@ async def initialize_services():
         zone_password=settings.BRIGHT_DATA_ZONE_PASSWORD
     )
     
-    # Initialize Gemini API if API key is provided
-    if settings.GEMINI_API_KEY:
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        logger.info("Initialized Gemini API client")
+    # The Gemini client is created by the shared LLM client pool on first use
+    
+    # Load FX rates and keep them fresh while the app runs
+    if settings.FX_RATES_PATH:
+        currency_converter.load()
+        fx_refresh_task = asyncio.create_task(currency_converter.refresh_periodically())
+    
+    # Refit the price trend models of all routes and hotels on a schedule
+    if settings.PRICE_TREND_REFRESH_SECONDS > 0:
+        price_trend_task = asyncio.create_task(price_trend_job.run_periodically())
+    
+    # Build the booking lead-time tables now and keep rebuilding them
+    if settings.BOOKING_TABLES_REFRESH_SECONDS > 0:
+        booking_tables_task = asyncio.create_task(booking_window_tables.run_periodically())
     
 async def cleanup_services():
     """
     Clean up resources on application shutdown
     """
-    global bright_data_client
+    global bright_data_client, fx_refresh_task, price_trend_task, booking_tables_task
     if bright_data_client:
         await bright_data_client.close()
+    llm_client_pool.close()
+    if fx_refresh_task:
+        fx_refresh_task.cancel()
+        fx_refresh_task = None
+    if price_trend_task:
+        price_trend_task.cancel()
+        price_trend_task = None
+    if booking_tables_task:
+        booking_tables_task.cancel()
+        booking_tables_task = None
@@ -0,0 +1,3 @@
+from app.services.llm.client_pool import LLMClientPool, llm_client_pool
+
+__all__ = ["LLMClientPool", "llm_client_pool"]
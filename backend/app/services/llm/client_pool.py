@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import threading
+import weakref
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    # Try importing from new location (langchain_community)
+    from langchain_community.llms import GoogleGenerativeAI
+except ImportError:
+    try:
+        # Fallback to old location (deprecated)
+        from langchain.llms import GoogleGenerativeAI
+    except ImportError:
+        # Define a placeholder to avoid import errors
+        GoogleGenerativeAI = None
+        logging.warning("GoogleGenerativeAI could not be imported. LLM features will be disabled.")
+
+from app.core.config import settings
+from app.services.cache.llm_cache import llm_model_name
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[str, float], Optional[Any]]
+
+
+class LLMClientPool:
+    """
+    Process-wide registry of LLM clients, created lazily on first use
+
+    One client is kept per (model, temperature) and shared by every service,
+    so the SDK's connection to the API is opened once and kept alive instead
+    of being rebuilt with each generator or engine. A failed or impossible
+    client (no API key, SDK not installed) is remembered as None, so callers
+    fall back to their non-LLM paths without retrying on every request.
+
+    Calls go through run(), which bounds the calls in flight per model
+    across the whole process and applies a per-model timeout. Semaphores are
+    kept per event loop, so the pool works from any loop.
+    """
+
+    def __init__(self,
+                 api_key: str = settings.GEMINI_API_KEY,
+                 default_model: str = settings.GEMINI_MODEL,
+                 max_concurrency: int = settings.LLM_POOL_MAX_CONCURRENCY,
+                 timeout: float = settings.LLM_POOL_TIMEOUT_SECONDS,
+                 model_concurrency: Optional[Dict[str, int]] = None,
+                 model_timeouts: Optional[Dict[str, float]] = None,
+                 factory: Optional[ClientFactory] = None):
+        """
+        Initialize the pool (no client is created until one is asked for)
+
+        Args:
+            api_key: Gemini API key, empty to disable LLM clients
+            default_model: Model used when none is given
+            max_concurrency: Calls in flight per model unless overridden
+            timeout: Seconds per call unless overridden
+            model_concurrency: Per-model overrides of max_concurrency
+            model_timeouts: Per-model overrides of timeout
+            factory: Builds a client from (model, temperature); the Gemini client if None
+        """
+        self.api_key = api_key
+        self.default_model = default_model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.model_concurrency = dict(settings.LLM_MODEL_CONCURRENCY if model_concurrency is None
+                                      else model_concurrency)
+        self.model_timeouts = dict(settings.LLM_MODEL_TIMEOUT_SECONDS if model_timeouts is None
+                                   else model_timeouts)
+        self.factory = factory or self._create_gemini_client
+
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, float], Optional[Any]] = {}
+        self._configured = False
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._counts: Dict[str, Counter] = {}
+
+    def get(self, model: Optional[str] = None, temperature: float = 0.7) -> Optional[Any]:
+        """
+        Shared client for a model, created on first use
+
+        Args:
+            model: Model name (the default model if None)
+            temperature: Sampling temperature of the client
+
+        Returns:
+            LangChain LLM client, or None if no client can be created
+        """
+        key = (model or self.default_model, temperature)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.factory(*key)
+            return self._clients[key]
+
+    def concurrency_for(self, model: str) -> int:
+        """
+        Maximum calls to a model in flight at once
+        """
+        return self.model_concurrency.get(model, self.max_concurrency)
+
+    def timeout_for(self, model: str) -> float:
+        """
+        Seconds one call to a model may take
+        """
+        return self.model_timeouts.get(model, self.timeout)
+
+    async def run(self,
+                  llm_client: Any,
+                  call: Callable[[], Awaitable[str]],
+                  timeout: Optional[float] = None) -> str:
+        """
+        Make one LLM call within the model's concurrency limit and timeout
+
+        Args:
+            llm_client: Client the call uses (its model picks the limits)
+            call: Makes the call
+            timeout: Seconds to allow, including the wait for a free slot
+                (the model's timeout if None)
+
+        Returns:
+            The LLM response
+
+        Raises:
+            asyncio.TimeoutError: If the call did not finish in time
+        """
+        model = llm_model_name(llm_client)
+        semaphore = self._semaphore(model)
+
+        async def limited() -> str:
+            async with semaphore:
+                return await call()
+
+        self._count(model, "calls")
+        try:
+            return await asyncio.wait_for(limited(), timeout if timeout is not None else self.timeout_for(model))
+        except asyncio.TimeoutError:
+            self._count(model, "timeouts")
+            raise
+        except Exception:
+            self._count(model, "errors")
+            raise
+
+    def close(self) -> None:
+        """
+        Drop all clients and limits; the next get() creates fresh clients
+        """
+        with self._lock:
+            self._clients.clear()
+            self._semaphores = weakref.WeakKeyDictionary()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Created clients and call, timeout and error counters per model
+        """
+        with self._lock:
+            return {
+                "clients": sorted(f"{model}@{temperature}" for (model, temperature), client in self._clients.items()
+                                  if client is not None),
+                "models": {model: dict(counts) for model, counts in self._counts.items()},
+            }
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._semaphores.setdefault(loop, {})
+            if model not in semaphores:
+                semaphores[model] = asyncio.Semaphore(self.concurrency_for(model))
+            return semaphores[model]
+
+    def _count(self, model: str, name: str) -> None:
+        with self._lock:
+            self._counts.setdefault(model, Counter())[name] += 1
+
+    def _create_gemini_client(self, model: str, temperature: float) -> Optional[Any]:
+        """
+        Build a Gemini client, configuring the Gemini SDK once per process
+        """
+        if GoogleGenerativeAI is None:
+            logger.warning("GoogleGenerativeAI is not available, LLM functionality will be disabled")
+            return None
+        if not self.api_key:
+            logger.warning("GEMINI_API_KEY is not set, LLM functionality will be disabled")
+            return None
+
+        try:
+            if not self._configured:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._configured = True
+            client = GoogleGenerativeAI(model=model, google_api_key=self.api_key, temperature=temperature)
+        except Exception as e:
+            logger.warning(f"Failed to initialize Gemini client: {e}")
+            return None
+        logger.info(f"Initialized Gemini client with model: {model}")
+        return client
+
+
+# Global LLM client pool
+llm_client_pool = LLMClientPool()
@@ -0,0 +1,262 @@
+import dataclasses
+import datetime
+import difflib
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.dates import parse_datetime
+
+
+class EntityResolver:
+    """
+    Merges duplicate hotels or events scraped from several sources
+
+    Candidates are blocked so that only plausible pairs are compared: items
+    with coordinates by geo-grid cell (each item is compared with items in
+    its own and the 8 neighbouring cells) and everything by normalized name
+    token, so two items are only compared if they share a name token and are
+    close to each other. Tokens shared by more than MAX_BLOCK_SIZE items are
+    too common to block on and are skipped, which keeps the work near-linear.
+    Within a block, names are fuzzy-matched and matches are clustered with
+    union-find. Each cluster keeps its cheapest offer, with the details of
+    all offers merged in.
+
+    Works on dicts and on records from app.services.ai.records alike; the
+    returned items have the same type as the input items.
+    """
+
+    # Grid cell size in degrees (about 550 m of latitude)
+    CELL_DEGREES = 0.005
+
+    # Two located items farther apart than this are never the same entity
+    MAX_DISTANCE_METERS = 300.0
+
+    # Name similarity needed for a match: token Jaccard or character ratio
+    MIN_TOKEN_SIMILARITY = 0.6
+    MIN_NAME_RATIO = 0.88
+
+    # Tokens shared by more items than this are not used for blocking
+    MAX_BLOCK_SIZE = 50
+
+    STOP_WORDS = frozenset({"the", "a", "an", "and", "of", "at", "by", "in", "on", "with"})
+
+    def __init__(self, name_field: str, price_field: str,
+                 extra_stop_words: Sequence[str] = (), date_field: Optional[str] = None):
+        """
+        Initialize the resolver
+
+        Args:
+            name_field: Field holding the entity name
+            price_field: Field holding the price the cheapest offer is chosen by
+            extra_stop_words: Words ignored when comparing names (e.g. "hotel")
+            date_field: Optional timestamp field; only items on the same day can match
+        """
+        self.name_field = name_field
+        self.price_field = price_field
+        self.stop_words = self.STOP_WORDS | frozenset(extra_stop_words)
+        self.date_field = date_field
+
+    def deduplicate(self, items: Sequence[Any]) -> List[Any]:
+        """
+        Merge duplicates, keeping the first-seen order of the remaining items
+
+        Args:
+            items: Scraped items (dicts or records)
+
+        Returns:
+            One item per entity: the cheapest offer, with merged details
+        """
+        items = list(items)
+        if len(items) < 2:
+            return items
+
+        keys = [self._item_key(item) for item in items]
+        parents = list(range(len(items)))
+
+        def find(i: int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        for i, j in self._candidate_pairs(keys):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j and self._matches(keys[i], keys[j]):
+                parents[max(root_i, root_j)] = min(root_i, root_j)
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(items)):
+            clusters[find(i)].append(i)
+
+        return [self._merge([items[i] for i in clusters[root]]) for root in sorted(clusters)]
+
+    def normalize_name(self, name: Optional[str]) -> Tuple[str, frozenset]:
+        """
+        Lowercase, strip accents and punctuation; returns the normalized name and its tokens
+        """
+        text = unicodedata.normalize("NFKD", name or "")
+        text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+        words = re.findall(r"[a-z0-9]+", text)
+        tokens = frozenset(word for word in words if word not in self.stop_words)
+        return " ".join(words), tokens or frozenset(words)
+
+    def _item_key(self, item: Any) -> Dict[str, Any]:
+        """
+        Precompute everything blocking and matching need for one item
+        """
+        name, tokens = self.normalize_name(item.get(self.name_field))
+        latitude, longitude = item.get("latitude"), item.get("longitude")
+        located = latitude is not None and longitude is not None
+        day = None
+        if self.date_field is not None:
+            value = parse_datetime(item.get(self.date_field))
+            day = value.date() if isinstance(value, datetime.datetime) else None
+        return {
+            "name": name,
+            "tokens": tokens,
+            "numbers": frozenset(token for token in tokens if token.isdigit()),
+            "located": located,
+            "latitude": latitude,
+            "longitude": longitude,
+            "cell": (math.floor(latitude / self.CELL_DEGREES), math.floor(longitude / self.CELL_DEGREES))
+            if located else None,
+            "area": self.normalize_name(item.get("location"))[0],
+            "day": day,
+        }
+
+    def _candidate_pairs(self, keys: List[Dict[str, Any]]):
+        """
+        Yield each (i, j), i < j, pair that shares a block
+        """
+        blocks: Dict[tuple, List[int]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            place = key["cell"] if key["located"] else ("area", key["area"])
+            for token in key["tokens"]:
+                blocks[(place, key["day"], token)].append(i)
+
+        seen = set()
+        for i, key in enumerate(keys):
+            if key["located"]:
+                row, column = key["cell"]
+                places = [(row + dr, column + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+            else:
+                places = [("area", key["area"])]
+            for token in key["tokens"]:
+                for place in places:
+                    block = blocks.get((place, key["day"], token))
+                    if not block or len(block) > self.MAX_BLOCK_SIZE:
+                        continue
+                    for j in block:
+                        if j > i and (i, j) not in seen:
+                            seen.add((i, j))
+                            yield i, j
+
+    def _matches(self, a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        """
+        Decide whether two blocked candidates are the same entity
+        """
+        if a["located"] and b["located"]:
+            if _distance_meters(a["latitude"], a["longitude"], b["latitude"], b["longitude"]) > self.MAX_DISTANCE_METERS:
+                return False
+        # "Hotel 12" and "Hotel 13" are different places however similar the names
+        if a["numbers"] != b["numbers"]:
+            return False
+        shared = len(a["tokens"] & b["tokens"])
+        if shared / len(a["tokens"] | b["tokens"]) >= self.MIN_TOKEN_SIMILARITY:
+            return True
+        return difflib.SequenceMatcher(None, a["name"], b["name"]).ratio() >= self.MIN_NAME_RATIO
+
+    def _merge(self, cluster: List[Any]) -> Any:
+        """
+        Keep the cheapest offer of a cluster, filling its gaps and merging details from the others
+        """
+        if len(cluster) == 1:
+            return cluster[0]
+
+        offers = sorted(cluster, key=self._price_key)
+        cheapest = offers[0]
+
+        details: Dict[str, Any] = {}
+        for offer in reversed(offers):
+            details.update(offer.get("details") or {})
+        details["offers"] = [
+            {
+                "source_website": offer.get("source_website"),
+                "source_url": offer.get("source_url"),
+                "price": offer.get(self.price_field),
+            }
+            for offer in offers
+        ]
+
+        changes: Dict[str, Any] = {"details": details}
+        for field in ("rating", "latitude", "longitude", "image_url", "description"):
+            if _has_field(cheapest, field) and cheapest.get(field) is None:
+                value = next((o.get(field) for o in offers if o.get(field) is not None), None)
+                if value is not None:
+                    changes[field] = value
+        if _has_field(cheapest, "amenities"):
+            amenities = list(dict.fromkeys(a for o in offers for a in (o.get("amenities") or [])))
+            if amenities:
+                changes["amenities"] = amenities
+
+        if dataclasses.is_dataclass(cheapest):
+            return dataclasses.replace(cheapest, **changes)
+        return {**cheapest, **changes}
+
+    def _price_key(self, item: Any) -> Tuple[int, float]:
+        """
+        Sort key putting the cheapest offer first (free events cost 0; mis-parsed
+        zero or negative prices come after the valid ones and unknown prices last)
+        """
+        if item.get("is_free"):
+            return 0, 0.0
+        try:
+            price = float(item.get(self.price_field))
+        except (TypeError, ValueError):
+            return 2, float("inf")
+        return (1, price) if price <= 0 else (0, price)
+
+
+def _has_field(item: Any, field: str) -> bool:
+    """
+    Whether a field can be set on the item (dicts accept any field)
+    """
+    return not dataclasses.is_dataclass(item) or field in item.__dataclass_fields__
+
+
+def _distance_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Haversine distance between two coordinates
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    h = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * 6371000.0 * math.asin(math.sqrt(h))
+
+
+hotel_resolver = EntityResolver(
+    name_field="name", price_field="price_per_night",
+    extra_stop_words=("hotel", "hotels", "resort", "suites", "apartments", "apartment"),
+)
+event_resolver = EntityResolver(
+    name_field="title", price_field="price",
+    extra_stop_words=("tickets", "ticket", "event"), date_field="start_date",
+)
+
+
+def deduplicate_hotels(hotels: Sequence[Any]) -> List[Any]:
+    """
+    Merge hotels listed by several sources, keeping the cheapest offer of each
+    """
+    return hotel_resolver.deduplicate(hotels)
+
+
+def deduplicate_events(events: Sequence[Any]) -> List[Any]:
+    """
+    Merge events listed by several sources, keeping the cheapest offer of each
+    """
+    return event_resolver.deduplicate(events)
@@ -0,0 +1,232 @@
+import dataclasses
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.currency import CurrencyConverter, currency_converter as default_currency_converter
+
+logger = logging.getLogger(__name__)
+
+# Scales a MAD (or mean absolute deviation) to a standard deviation for normal data
+_MAD_SCALE = 1.4826
+_MEAN_AD_SCALE = 1.2533
+
+ACTIONS = ("drop", "flag", "clamp")
+
+
+class PriceOutlierFilter:
+    """
+    Removes mis-parsed prices from scraped items before they are ingested
+
+    Prices are compared within groups of comparable items (e.g. a flight
+    route or a hotel star rating) with robust z-scores: the distance of the
+    log price from the group median in units of the scaled median absolute
+    deviation. Working on log prices treats "ten times too high" and "ten
+    times too low" alike, which matches how prices get mis-parsed (a total
+    shown per night, a missing decimal point). When more than half of a
+    group has the same price the MAD is 0 and the mean absolute deviation is
+    used instead. Groups smaller than min_group_size are only checked for
+    invalid (missing, zero or negative) prices.
+
+    Outliers are dropped, flagged in the item's details, or clamped to the
+    group's bounds; invalid prices are dropped unless the action is "flag".
+    The whole batch is scored with array operations; counters of what was
+    checked and done are kept for monitoring.
+
+    Works on dicts and on records from app.services.ai.records alike.
+    """
+
+    def __init__(self,
+                 price_field: str,
+                 group_key: Callable[[Any], Any],
+                 action: str = settings.PRICE_OUTLIER_ACTION,
+                 threshold: float = settings.PRICE_OUTLIER_THRESHOLD,
+                 min_group_size: int = settings.PRICE_OUTLIER_MIN_GROUP_SIZE,
+                 currency_converter: Optional[CurrencyConverter] = None):
+        """
+        Initialize the filter
+
+        Args:
+            price_field: Field holding the price
+            group_key: Returns the comparison group of an item
+            action: "drop", "flag" or "clamp"
+            threshold: Robust z-score above which a price is an outlier
+            min_group_size: Smallest group whose prices are compared
+            currency_converter: Converts prices to one currency before they are
+                compared (the shared converter if None)
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown outlier action {action!r}; expected one of {ACTIONS}")
+        self.price_field = price_field
+        self.group_key = group_key
+        self.action = action
+        self.threshold = threshold
+        self.min_group_size = min_group_size
+        self.currency_converter = currency_converter or default_currency_converter
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def filter(self, items: Sequence[Any]) -> List[Any]:
+        """
+        Apply the outlier action to a batch of scraped items
+
+        Args:
+            items: Scraped items (dicts or records)
+
+        Returns:
+            The items to ingest, in their original order
+        """
+        items = list(items)
+        if not items:
+            return items
+
+        prices = np.array([_number(item.get(self.price_field)) for item in items], dtype=np.float64)
+        currencies = [item.get("currency") for item in items]
+        base_prices = self.currency_converter.to_base(prices, currencies)
+        z, lower, upper = self.robust_scores(base_prices, [self.group_key(item) for item in items])
+
+        invalid = np.isnan(base_prices) | (base_prices <= 0)
+        outlier = ~invalid & (np.abs(z) > self.threshold)
+
+        for index in np.flatnonzero(invalid | outlier).tolist():
+            item = items[index]
+            if self.action == "flag":
+                items[index] = _with_details(item, {"price_outlier": {
+                    "reason": "invalid" if invalid[index] else "outlier",
+                    "robust_z": None if invalid[index] else round(float(z[index]), 2),
+                }})
+            elif self.action == "clamp" and outlier[index]:
+                bound = upper[index] if z[index] > 0 else lower[index]
+                clamped = self.currency_converter.convert(
+                    bound, self.currency_converter.base_currency, item.get("currency")
+                )
+                items[index] = _with_details(_with_field(item, self.price_field, round(clamped, 2)), {
+                    "price_outlier": {"reason": "clamped", "original_price": item.get(self.price_field),
+                                      "robust_z": round(float(z[index]), 2)},
+                })
+            else:
+                items[index] = None
+        result = [item for item in items if item is not None]
+
+        invalid_count, outlier_count = int(invalid.sum()), int(outlier.sum())
+        with self._lock:
+            self._counts["checked"] += len(items)
+            self._counts["invalid"] += invalid_count
+            self._counts["outliers"] += outlier_count
+            self._counts["dropped"] += len(items) - len(result)
+            if self.action == "flag":
+                self._counts["flagged"] += invalid_count + outlier_count
+            elif self.action == "clamp":
+                self._counts["clamped"] += outlier_count
+        if invalid_count or outlier_count:
+            logger.info(f"Price filter on {self.price_field}: {invalid_count} invalid, "
+                        f"{outlier_count} outliers of {len(items)} ({self.action})")
+        return result
+
+    def robust_scores(self, prices: np.ndarray, groups: Sequence[Any]):
+        """
+        Robust z-scores of log prices within their groups
+
+        Args:
+            prices: Prices (NaN or non-positive prices are ignored)
+            groups: Group of each price
+
+        Returns:
+            Arrays of robust z-scores (0 for prices that are not compared) and
+            of the lower and upper price bounds of each price's group
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        valid = ~np.isnan(prices) & (prices > 0)
+        z = np.zeros(prices.size)
+        lower = np.full(prices.size, -np.inf)
+        upper = np.full(prices.size, np.inf)
+        rows = np.flatnonzero(valid)
+        if not rows.size:
+            return z, lower, upper
+
+        labels = np.array([repr(groups[i]) for i in rows.tolist()], dtype=object).astype(str)
+        codes = np.unique(labels, return_inverse=True)[1].reshape(-1)
+        logs = np.log(prices[rows])
+        median = _group_medians(codes, logs)
+        deviation = np.abs(logs - median[codes])
+        counts = np.bincount(codes)
+        spread = _group_medians(codes, deviation) * _MAD_SCALE
+        mean_spread = np.bincount(codes, weights=deviation) / counts * _MEAN_AD_SCALE
+        spread = np.where(spread > 0, spread, mean_spread)
+
+        compared = (counts >= self.min_group_size) & (spread > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = np.where(compared[codes], (logs - median[codes]) / spread[codes], 0.0)
+        z[rows] = scores
+        bound = np.where(compared, self.threshold * spread, np.inf)
+        lower[rows] = np.exp(median - bound)[codes]
+        upper[rows] = np.exp(median + bound)[codes]
+        return z, lower, upper
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of checked, invalid and outlier prices and of the actions taken
+        """
+        with self._lock:
+            return {key: self._counts[key] for key in ("checked", "invalid", "outliers", "dropped",
+                                                        "flagged", "clamped")}
+
+
+def _group_medians(codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Median of values per group, from one sort of (group, value)
+    """
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    ordered = values[order]
+    return (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _with_field(item: Any, field: str, value: Any) -> Any:
+    if dataclasses.is_dataclass(item):
+        return dataclasses.replace(item, **{field: value})
+    return {**item, field: value}
+
+
+def _with_details(item: Any, extra: Dict[str, Any]) -> Any:
+    return _with_field(item, "details", {**(item.get("details") or {}), **extra})
+
+
+def _route(flight: Any) -> tuple:
+    return (flight.get("origin"), flight.get("destination"))
+
+
+def _star_rating(hotel: Any) -> int:
+    # Hotels without a usable rating are compared with 3-star hotels, as in deal detection
+    rating = _number(hotel.get("rating"))
+    return 3 if np.isnan(rating) else int(round(rating))
+
+
+flight_price_filter = PriceOutlierFilter(price_field="price", group_key=_route)
+hotel_price_filter = PriceOutlierFilter(price_field="price_per_night", group_key=_star_rating)
+
+
+def filter_flight_prices(flights: Sequence[Any]) -> List[Any]:
+    """
+    Handle mis-parsed flight prices, comparing flights of the same route
+    """
+    return flight_price_filter.filter(flights)
+
+
+def filter_hotel_prices(hotels: Sequence[Any]) -> List[Any]:
+    """
+    Handle mis-parsed nightly hotel prices, comparing hotels of the same star rating
+    """
+    return hotel_price_filter.filter(hotels)
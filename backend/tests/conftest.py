@@ -10,6 +10,7 @@ from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.api.deps import get_db
 from app.db.base_class import Base
+from app.services.cache import llm_cache
 
 
 # Use in-memory SQLite for tests
@@ -69,3 +70,13 @@ def test_db():
     
     # Clean up
     db.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(monkeypatch):
+    # Keep LLM responses in memory only and start every test with an empty cache
+    monkeypatch.setattr(llm_cache, "path", "")
+    monkeypatch.setattr(llm_cache, "_db", None)
+    llm_cache.clear()
+    yield
+    llm_cache.clear()
@@ -0,0 +1,110 @@
+"""
+Tests for the booking lead-time lookup tables.
+"""
+import datetime
+
+import numpy as np
+
+from app.models.flight import Flight
+from app.models.search import Search
+from app.services.ai.booking_window import BookingWindowTables
+from app.services.ai.price_analyzer import PriceAnalyzer
+
+TODAY = datetime.date(2025, 1, 10)
+
+
+def lead_curve(lead):
+    """Typical fare curve: expensive close to departure, cheapest 45-60 days out."""
+    return 1.0 + 0.6 * np.exp(-lead / 10) + 0.0004 * (lead - 50) ** 2 / 10
+
+
+def build_tables(destinations=("Lisbon",), observations=4000, seed=2):
+    """Build flight tables from synthetic scrapes for several origins per destination."""
+    rng = np.random.default_rng(seed)
+    departures = [TODAY + datetime.timedelta(days=int(d)) for d in rng.integers(0, 300, observations)]
+    leads = rng.integers(0, 200, observations)
+    origins = rng.choice(["Berlin", "Paris", "Rome"], observations)
+    base = {"Berlin": 150.0, "Paris": 120.0, "Rome": 200.0}
+    tables = BookingWindowTables(min_cell_observations=5)
+    used = tables.build_from_history(
+        kinds=["flight"] * observations,
+        destinations=[destinations[i % len(destinations)] for i in range(observations)],
+        series=[f"{origin}-{destinations[i % len(destinations)]}" for i, origin in enumerate(origins)],
+        departure_dates=departures,
+        observed_at=[d - datetime.timedelta(days=int(lead)) for d, lead in zip(departures, leads)],
+        prices=[base[o] * lead_curve(lead) * rng.uniform(0.97, 1.03) for o, lead in zip(origins, leads)],
+        currencies=["USD"] * observations,
+    )
+    return tables, used
+
+
+def test_lookup_finds_cheapest_reachable_window():
+    """Test that the best window is the cheapest lead time still reachable by waiting."""
+    tables, used = build_tables()
+    assert used == 4000
+
+    early = tables.lookup("flight", "lisbon", TODAY + datetime.timedelta(days=150), today=TODAY)
+    assert early["source"] == "destination and month"
+    assert not early["best_window"]["book_now"]
+    assert early["best_window"]["lead_days_from"] == 45
+    assert early["best_window"]["expected_savings_percent"] > 5
+
+    in_window = tables.lookup("flight", "Lisbon", TODAY + datetime.timedelta(days=50), today=TODAY)
+    late = tables.lookup("flight", "Lisbon", TODAY + datetime.timedelta(days=3), today=TODAY)
+    assert in_window["best_window"]["book_now"] and late["best_window"]["book_now"]
+    assert late["expected_price_index"] > in_window["expected_price_index"]
+
+
+def test_lookup_falls_back_for_unknown_destinations_and_no_data():
+    """Test that sparse trips use the all-destinations tables, and trips without data get nothing."""
+    tables, _ = build_tables(destinations=("Lisbon", "Porto"))
+
+    unknown = tables.lookup("flight", "Reykjavik", TODAY + datetime.timedelta(days=150), today=TODAY)
+    assert unknown["source"] == "all destinations in this month"
+    assert tables.lookup("hotel", "Lisbon", TODAY + datetime.timedelta(days=30), today=TODAY) is None
+    assert tables.lookup("flight", "Lisbon", TODAY - datetime.timedelta(days=1), today=TODAY) is None
+    assert BookingWindowTables().lookup("flight", "Lisbon", TODAY, today=TODAY) is None
+
+
+def test_booking_time_prediction_uses_tables_when_available():
+    """Test that predictions come from the tables for flights and from the rules for hotels without data."""
+    tables, _ = build_tables()
+    analyzer = PriceAnalyzer(booking_tables=tables)
+    start = datetime.date.today() + datetime.timedelta(days=150)
+
+    prediction = analyzer.predict_optimal_booking_time(
+        "Lisbon", {"start_date": start.isoformat(), "end_date": (start + datetime.timedelta(days=7)).isoformat()}
+    )
+
+    assert prediction["flights"]["recommendation"] == "Wait to book flights"
+    assert prediction["flights"]["booking_window"]["lead_days_from"] == 45
+    assert prediction["hotels"]["recommendation"] == "Wait to book hotels"
+    assert "booking_window" not in prediction["hotels"]
+
+
+def test_stored_scrapes_fall_into_the_buckets_of_their_scrape_time(test_db):
+    """Test that scrapes stored at different times get their own lead times from the stored history."""
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    departure = now + datetime.timedelta(days=100)
+    search = Search(destination="Ushuaia", departure_location="Santiago",
+                    departure_date=departure, return_date=departure + datetime.timedelta(days=7))
+    test_db.add(search)
+    test_db.flush()
+    # First scrape stamped at insert time (about 100 days out), the second one 97 days later
+    test_db.add_all([Flight(search_id=search.id, origin="SCL", destination="USH", price=100.0 + i, currency="USD")
+                     for i in range(3)])
+    test_db.commit()
+    rescraped_at = now + datetime.timedelta(days=97)
+    test_db.add_all([Flight(search_id=search.id, origin="SCL", destination="USH", price=200.0 + i, currency="USD",
+                            created_at=rescraped_at) for i in range(3)])
+    test_db.commit()
+    tables = BookingWindowTables(min_cell_observations=3)
+
+    assert tables.build(test_db, now=rescraped_at) == 6
+
+    early = tables.lookup("flight", "Ushuaia", departure.date(), today=now.date())
+    late = tables.lookup("flight", "Ushuaia", departure.date(), today=rescraped_at.date())
+    assert [point["lead_days_from"] for point in early["curve"]] == [0, 90]
+    assert (early["lead_days"], late["lead_days"]) == (100, 3)
+    assert early["best_window"]["book_now"] and late["best_window"]["book_now"]
+    assert late["expected_price_index"] > 1.0 > early["expected_price_index"]
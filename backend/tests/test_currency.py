@@ -0,0 +1,74 @@
+"""
+Tests for currency normalization of mixed-currency results.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from app.services.ai.price_analyzer import PriceAnalyzer
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.currency import CurrencyConverter
+from tests.test_recommendation_engine import make_flights, make_hotels, make_weather
+
+
+def write_rates(path, rates, base="EUR"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"base": base, "rates": rates}, f)
+
+
+def test_rates_are_rebased_and_arrays_converted(tmp_path):
+    """Test loading, rebasing to USD and vectorized conversion."""
+    path = tmp_path / "fx.json"
+    write_rates(path, {"USD": 1.25, "GBP": 0.8})
+    converter = CurrencyConverter(base_currency="USD", rates_path=str(path))
+    assert converter.load()
+
+    amounts = converter.to_base([100.0, 100.0, 100.0, 100.0, 100.0], ["USD", "EUR", "gbp", None, "XYZ"])
+
+    assert np.allclose(amounts, [100.0, 125.0, 156.25, 100.0, 100.0])
+    assert np.isclose(converter.convert(100.0, "GBP", "EUR"), 125.0)
+
+
+def test_rate_file_changes_are_picked_up(tmp_path):
+    """Test that a changed rate file is reloaded once the refresh interval has passed."""
+    path = tmp_path / "fx.json"
+    write_rates(path, {"USD": 1.0}, base="USD")
+    converter = CurrencyConverter(base_currency="USD", rates_path=str(path), refresh_seconds=0)
+    converter.load()
+    assert converter.rate("EUR") == 1.0
+
+    write_rates(path, {"EUR": 0.5}, base="USD")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    converter.refresh_if_stale()
+
+    assert converter.rate("EUR") == 0.5
+
+
+def test_missing_rate_file_keeps_base_only():
+    """Test that a missing file leaves prices unconverted."""
+    converter = CurrencyConverter(base_currency="USD", rates_path="/nonexistent/fx.json")
+    assert not converter.load()
+    assert np.allclose(converter.to_base([10.0], ["EUR"]), [10.0])
+
+
+def test_scoring_and_deals_compare_prices_in_one_currency():
+    """Test that mixed-currency offers are ranked as if quoted in the base currency."""
+    converter = CurrencyConverter(base_currency="USD")
+    converter.set_rates({"EUR": 0.5}, base_currency="USD")
+    flights, hotels, weather = make_flights(10), make_hotels(6), make_weather()
+    in_euros = [dict(flight, price=flight["price"] * 0.5, currency="EUR") for flight in flights]
+
+    engine = RecommendationEngine(currency_converter=converter)
+    expected = engine._generate_flight_hotel_combinations(flights, hotels, weather, top_k=5)
+    mixed = engine._generate_flight_hotel_combinations(in_euros, hotels, weather, top_k=5)
+
+    assert np.allclose([r["total_price"] for r in mixed], [r["total_price"] for r in expected])
+    assert all(r["currency"] == "USD" for r in mixed)
+
+    analyzer = PriceAnalyzer(currency_converter=converter)
+    deals = analyzer._find_best_flight_deals(in_euros[:5] + flights[5:])
+    assert [d["item"]["airline"] for d in deals] == [
+        d["item"]["airline"] for d in analyzer._find_best_flight_deals(flights)
+    ]
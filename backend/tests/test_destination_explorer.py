@@ -0,0 +1,136 @@
+"""
+Tests for explore mode (ranking many destinations in one request).
+"""
+import asyncio
+import datetime
+
+from app.services.ai.destination_explorer import DestinationExplorer
+from app.services.cache.scrape_cache import ScrapeCache
+from tests.test_recommendation_engine import make_flights, make_hotels, make_weather
+
+START = datetime.date(2025, 6, 1)
+END = datetime.date(2025, 6, 8)
+
+
+class FakeScraper:
+    """Scraper returning canned data per destination and recording its calls."""
+
+    def __init__(self, make, key="destination", fail_for=()):
+        self.make = make
+        self.key = key
+        self.fail_for = set(fail_for)
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def scrape(self, params):
+        self.calls.append(params)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            destination = params[self.key]
+            if destination in self.fail_for:
+                raise RuntimeError(f"scrape failed for {destination}")
+            return self.make(destination)
+        finally:
+            self.running -= 1
+
+
+def make_explorer(cache, fail_for=()):
+    flights = FakeScraper(lambda d: make_flights(12, seed=len(d)), fail_for=fail_for)
+    hotels = FakeScraper(lambda d: make_hotels(8, seed=len(d) + 1), key="location")
+    weather = FakeScraper(lambda d: make_weather(), key="location")
+    explorer = DestinationExplorer(flights, hotels, weather, max_concurrency=2, cache=cache)
+    return explorer, flights, hotels, weather
+
+
+def run_explore(explorer, origin, destinations, **kwargs):
+    async def collect():
+        return [m async for m in explorer.explore(origin, destinations, START, END, **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_destinations_are_ranked_by_best_combination():
+    """Test that every destination is streamed and the final ranking matches the engine."""
+    explorer, _, _, _ = make_explorer(ScrapeCache())
+    destinations = ["Lisbon", "Rome", "Oslo", "Athens", "Prague"]
+
+    messages = run_explore(explorer, "Berlin", destinations + ["Rome"])
+
+    streamed = [m for m in messages if m["type"] == "destination"]
+    assert sorted(m["destination"] for m in streamed) == sorted(destinations)
+    ranking = messages[-1]
+    assert ranking["type"] == "ranking"
+    assert [r["rank"] for r in ranking["destinations"]] == list(range(1, 6))
+
+    expected = {
+        d: explorer.engine.best_combination(
+            make_flights(12, seed=len(d)), make_hotels(8, seed=len(d) + 1), make_weather()
+        )["score"]
+        for d in destinations
+    }
+    assert [r["destination"] for r in ranking["destinations"]] == sorted(
+        destinations, key=lambda d: expected[d], reverse=True
+    )
+
+
+def test_scrapes_are_bounded_and_shared():
+    """Test the concurrency bound and that hotels and weather are reused across origins."""
+    cache = ScrapeCache()
+    explorer, flights, hotels, weather = make_explorer(cache)
+    destinations = ["Lisbon", "Rome", "Oslo", "Athens", "Prague"]
+
+    run_explore(explorer, "Berlin", destinations)
+    assert flights.max_running <= 2
+    assert len(hotels.calls) == len(weather.calls) == 5
+
+    run_explore(explorer, "Paris", destinations)
+    assert len(flights.calls) == 10
+    assert len(hotels.calls) == len(weather.calls) == 5
+    assert cache.stats()["hits"] == 10
+
+
+def test_failures_and_budget_are_reported_per_destination():
+    """Test that a failed scrape or an unaffordable destination does not stop the others."""
+    explorer, _, _, _ = make_explorer(ScrapeCache(), fail_for={"Rome"})
+
+    messages = run_explore(explorer, "Berlin", ["Lisbon", "Rome"])
+    errors = {m["destination"]: m["message"] for m in messages if m["type"] == "error"}
+    assert "scrape failed" in errors["Rome"]
+    assert [r["destination"] for r in messages[-1]["destinations"]] == ["Lisbon"]
+
+    messages = run_explore(explorer, "Berlin", ["Lisbon"], budget=1.0)
+    assert messages[0]["type"] == "error"
+    assert messages[-1]["destinations"] == []
+
+
+def test_cancelled_request_does_not_cancel_a_shared_scrape():
+    """Test that when the request that started a scrape is cancelled, the others sharing it still get the result."""
+    cache = ScrapeCache()
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [{"name": "Hotel Oslo"}]
+
+    async def two_requests():
+        first = asyncio.create_task(cache.get_or_scrape("hotels", {"location": "Oslo"}, scrape))
+        second = asyncio.create_task(cache.get_or_scrape("hotels", {"location": "Oslo"}, scrape))
+        await asyncio.sleep(0.01)
+        first.cancel()  # e.g. the first explore client disconnected
+        result = await second
+        try:
+            await first
+        except asyncio.CancelledError:
+            pass
+        return first.cancelled(), result
+
+    first_cancelled, result = asyncio.run(two_requests())
+
+    assert first_cancelled
+    assert result == [{"name": "Hotel Oslo"}]
+    assert len(calls) == 1
+    assert asyncio.run(cache.get_or_scrape("hotels", {"location": "Oslo"}, scrape)) == result
+    assert len(calls) == 1
@@ -0,0 +1,152 @@
+"""
+Tests for cross-source deduplication of hotels and events.
+"""
+import pathlib
+import random
+import subprocess
+import sys
+import time
+
+from app.services.ai.records import HotelRecord, to_records
+from app.services.scraper.entity_resolution import deduplicate_events, deduplicate_hotels, hotel_resolver
+from app.services.scraper.price_filter import filter_hotel_prices
+
+
+def hotel(name, price, latitude=38.7100, longitude=-9.1400, source="booking", **extra):
+    return {
+        "name": name, "price_per_night": price, "latitude": latitude, "longitude": longitude,
+        "location": "Lisbon", "source_website": source, "source_url": f"https://{source}/{name}",
+        "details": {source: True}, **extra,
+    }
+
+
+def test_duplicate_hotels_keep_cheapest_offer_with_merged_details():
+    """Test that listings of one property collapse to its cheapest offer."""
+    hotels = [
+        hotel("Grand Plaza Hotel", 180.0, rating=4.5),
+        hotel("Riverside Inn", 90.0, latitude=38.7300),
+        hotel("The Grand Plaza", 150.0, latitude=38.7101, source="airbnb", amenities=["wifi"]),
+        hotel("Grand Plaza Hotel", 120.0, latitude=38.7500, source="expedia"),
+    ]
+
+    result = deduplicate_hotels(hotels)
+
+    assert [h["name"] for h in result] == ["The Grand Plaza", "Riverside Inn", "Grand Plaza Hotel"]
+    merged = result[0]
+    assert merged["price_per_night"] == 150.0
+    assert merged["rating"] == 4.5
+    assert merged["details"]["booking"] and merged["details"]["airbnb"]
+    assert [o["price"] for o in merged["details"]["offers"]] == [150.0, 180.0]
+    # 4.4 km away: same name, different property
+    assert result[2]["price_per_night"] == 120.0
+
+
+def test_mis_parsed_offer_does_not_replace_a_valid_one():
+    """Test that a hotel one source lists at 0.0 and another at 150.0 keeps the valid offer."""
+    hotels = [
+        hotel("Grand Plaza Hotel", 0.0),
+        hotel("The Grand Plaza", 150.0, latitude=38.7101, source="airbnb"),
+    ] + [hotel(f"Alfama Suites {i}", 140.0 + 5 * i, latitude=38.72 + 0.01 * i) for i in range(4)]
+
+    deduplicated = deduplicate_hotels(hotels)
+    assert deduplicated[0]["price_per_night"] == 150.0
+    assert [o["price"] for o in deduplicated[0]["details"]["offers"]] == [150.0, 0.0]
+
+    # As search processing runs them: the filter drops the bad offer, then duplicates merge
+    result = deduplicate_hotels(filter_hotel_prices(hotels))
+    assert [h["price_per_night"] for h in result if "Plaza" in h["name"]] == [150.0]
+
+
+def test_hotels_without_coordinates_match_by_area_and_numbers_must_agree():
+    """Test name matching without coordinates, and that numbered names stay apart."""
+    hotels = [
+        {"name": "Ocean View Resort", "price_per_night": 210.0, "location": "Lisbon"},
+        {"name": "Ocean View Hotel", "price_per_night": 199.0, "location": "Lisbon"},
+        {"name": "Ocean View Hotel", "price_per_night": 99.0, "location": "Porto"},
+        {"name": "Hostel 12", "price_per_night": 30.0, "location": "Lisbon"},
+        {"name": "Hostel 13", "price_per_night": 25.0, "location": "Lisbon"},
+    ]
+
+    result = deduplicate_hotels(hotels)
+
+    assert [h["price_per_night"] for h in result] == [199.0, 99.0, 30.0, 25.0]
+
+
+def test_events_only_match_on_the_same_day():
+    """Test event merging, preferring a free listing."""
+    events = [
+        {"title": "Jazz Night at the Park", "start_date": "2025-06-02T20:00:00", "price": 25.0,
+         "location": "Lisbon", "source_website": "eventbrite"},
+        {"title": "Jazz Night Park", "start_date": "2025-06-02T20:30:00", "is_free": True,
+         "location": "Lisbon", "source_website": "meetup"},
+        {"title": "Jazz Night at the Park", "start_date": "2025-06-03T20:00:00", "price": 25.0,
+         "location": "Lisbon", "source_website": "eventbrite"},
+    ]
+
+    result = deduplicate_events(events)
+
+    assert len(result) == 2
+    assert result[0]["source_website"] == "meetup"
+    assert len(result[0]["details"]["offers"]) == 2
+
+
+def test_records_stay_records():
+    """Test that records go in and come out."""
+    records = to_records([hotel("Grand Plaza", 100.0), hotel("Grand Plaza", 90.0, source="airbnb")], HotelRecord)
+
+    result = deduplicate_hotels(records)
+
+    assert len(result) == 1 and isinstance(result[0], HotelRecord)
+    assert result[0].price_per_night == 90.0
+
+
+def test_blocking_finds_the_same_matches_as_all_pairs():
+    """Test blocked matching against an all-pairs comparison on a noisy set."""
+    rnd = random.Random(3)
+    words = ["sun", "palace", "river", "garden", "royal", "harbor", "plaza", "central", "blue", "old"]
+    hotels = []
+    for i in range(150):
+        name = " ".join(rnd.sample(words, 2))
+        lat, lon = 38.70 + rnd.random() * 0.05, -9.15 + rnd.random() * 0.05
+        for copy in range(rnd.randint(1, 3)):
+            hotels.append(hotel(name if copy == 0 else f"The {name} Hotel", rnd.uniform(50, 300),
+                                latitude=lat + copy * 0.0004, longitude=lon))
+
+    result = deduplicate_hotels(hotels)
+
+    keys = [hotel_resolver._item_key(h) for h in hotels]
+    parents = list(range(len(hotels)))
+
+    def find(i):
+        while parents[i] != i:
+            i = parents[i]
+        return i
+
+    for i in range(len(hotels)):
+        for j in range(i + 1, len(hotels)):
+            if keys[i]["tokens"] & keys[j]["tokens"] and hotel_resolver._matches(keys[i], keys[j]):
+                parents[max(find(i), find(j))] = min(find(i), find(j))
+    assert len(result) == len({find(i) for i in range(len(hotels))})
+
+
+def test_deduplication_scales_near_linearly():
+    """Test that a large candidate set is deduplicated quickly."""
+    rnd = random.Random(4)
+    hotels = [
+        hotel(f"Hotel {rnd.choice(['Sun', 'Sea', 'Star'])} {i}", rnd.uniform(50, 300),
+              latitude=38.0 + rnd.random(), longitude=-9.0 + rnd.random())
+        for i in range(20000)
+    ]
+    start = time.perf_counter()
+    result = deduplicate_hotels(hotels)
+    assert time.perf_counter() - start < 5.0
+    assert len(result) == len(hotels)
+
+
+def test_module_imports_on_its_own():
+    """Test that entity resolution imports in a fresh interpreter, before any AI service is loaded."""
+    backend = pathlib.Path(__file__).resolve().parents[1]
+    result = subprocess.run([sys.executable, "-c", "import app.services.scraper.entity_resolution"],
+                            cwd=backend, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
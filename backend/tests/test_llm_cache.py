@@ -0,0 +1,90 @@
+"""
+Tests for the LLM response cache.
+"""
+import asyncio
+import pathlib
+import threading
+
+from app.core.config import BACKEND_DIR, Settings
+from app.services.cache.llm_cache import LLMResponseCache, bucket
+
+
+def make_call(replies, calls):
+    """Create a fake LLM call returning the next reply and counting calls."""
+    async def call():
+        calls.append(1)
+        return replies[len(calls) - 1]
+    return call
+
+
+def test_identical_prompts_are_answered_from_memory():
+    """Test that whitespace-only prompt differences hit the same entry."""
+    cache = LLMResponseCache(path="", max_entries=10, ttl_seconds=60)
+    calls = []
+    call = make_call(["first", "second"], calls)
+
+    assert asyncio.run(cache.get_or_call("gemini", "Pack for  Paris\n  please", {"temperature": 0.7}, call)) == "first"
+    assert asyncio.run(cache.get_or_call("gemini", "Pack for Paris please", {"temperature": 0.7}, call)) == "first"
+    assert asyncio.run(cache.get_or_call("gemini", "Pack for Paris please", {"temperature": 0.2}, call)) == "second"
+    assert len(calls) == 2
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    """Test that a new cache instance reads the SQLite tier until the TTL passes."""
+    path = str(tmp_path / "llm.sqlite3")
+    calls = []
+
+    writer = LLMResponseCache(path=path, max_entries=10, ttl_seconds=60)
+    asyncio.run(writer.get_or_call("gemini", "prompt", None, make_call(["cached"], calls)))
+
+    reader = LLMResponseCache(path=path, max_entries=10, ttl_seconds=60)
+    assert asyncio.run(reader.get_or_call("gemini", "prompt", None, make_call(["fresh"], []))) == "cached"
+    assert reader.stats()["disk_hits"] == 1
+
+    expired = LLMResponseCache(path=path, max_entries=10, ttl_seconds=-1)
+    expired.set(expired.make_key("gemini", "old", None), "stale")
+    assert expired.purge_expired() == 1
+    assert LLMResponseCache(path=path).get(expired.make_key("gemini", "old", None)) is None
+
+
+def test_disk_tier_runs_off_the_event_loop(tmp_path):
+    """Test that get_or_call reads and writes SQLite in a worker thread, not on the event loop."""
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), max_entries=10, ttl_seconds=60)
+    disk_threads = []
+    for name in ("_get_disk", "_set_disk"):
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            disk_threads.append(threading.get_ident())
+            return method(*args)
+
+        setattr(cache, name, record)
+
+    async def lookup():
+        reply = await cache.get_or_call("gemini", "prompt", None, make_call(["fresh"], []))
+        return threading.get_ident(), reply
+
+    loop_thread, reply = asyncio.run(lookup())
+
+    assert reply == "fresh"
+    assert len(disk_threads) == 2
+    assert loop_thread not in disk_threads
+    assert asyncio.run(cache.get_or_call("gemini", "prompt", None, make_call(["other"], []))) == "fresh"
+    assert len(disk_threads) == 2  # answered from memory
+
+
+def test_cache_path_is_resolved_against_the_backend_directory():
+    """Test that a relative cache path does not depend on the working directory."""
+    assert pathlib.Path(Settings().LLM_CACHE_PATH).is_relative_to(BACKEND_DIR)
+    assert Settings(LLM_CACHE_PATH="cache/llm.sqlite3").LLM_CACHE_PATH == str(BACKEND_DIR / "cache" / "llm.sqlite3")
+    assert Settings(LLM_CACHE_PATH="").LLM_CACHE_PATH == ""
+
+
+def test_bucket_rounds_to_step():
+    """Test numeric bucketing of prompt inputs."""
+    assert bucket(67.4, 5) == 65
+    assert bucket(68, 5) == 70
+    assert bucket(3, 2) == 4
+    assert bucket(0.34, 0.25) == 0.25
+    assert bucket(None, 5) is None
@@ -0,0 +1,87 @@
+"""
+Tests for the shared, lazily created LLM client pool.
+"""
+import asyncio
+
+import pytest
+
+from app.services.ai.packing_suggestion import PackingSuggestionGenerator
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.llm import LLMClientPool, llm_client_pool
+from tests.test_recommendation_engine import SlowLLM
+
+
+def counting_factory(created):
+    def factory(model, temperature):
+        created.append((model, temperature))
+        return SlowLLM(delay=0.05, reply=f"{model} reply")
+    return factory
+
+
+def test_clients_are_created_lazily_once_per_model():
+    """Test that no client exists until asked for and each model's client is reused."""
+    created = []
+    pool = LLMClientPool(default_model="model-a", factory=counting_factory(created))
+    assert created == []
+
+    first = pool.get()
+    assert pool.get() is first
+    assert pool.get("model-b") is not first
+    assert created == [("model-a", 0.7), ("model-b", 0.7)]
+    assert pool.stats()["clients"] == ["model-a@0.7", "model-b@0.7"]
+
+    pool.close()
+    assert pool.get() is not first
+
+
+def test_unavailable_client_is_remembered():
+    """Test that a missing API key disables the LLM without retrying on each request."""
+    pool = LLMClientPool(api_key="")
+    assert pool.get() is None
+    assert pool.get() is None
+    assert pool.stats()["clients"] == []
+
+
+def test_calls_are_limited_per_model_across_callers():
+    """Test the per-model concurrency limit and override, shared by all callers and event loops."""
+    pool = LLMClientPool(max_concurrency=2, model_concurrency={"wide": 4})
+    narrow = SlowLLM(delay=0.05)
+    narrow_calls = lambda: pool.run(narrow, lambda: narrow._acall("hi"))
+
+    async def burst(count):
+        return await asyncio.gather(*(narrow_calls() for _ in range(count)))
+
+    assert asyncio.run(burst(6)) == ["LLM summary"] * 6
+    assert narrow.peak == 2
+    # A new event loop gets its own semaphores
+    asyncio.run(burst(3))
+    assert narrow.peak == 2
+    assert pool.concurrency_for("wide") == 4
+    assert pool.stats()["models"]["SlowLLM"]["calls"] == 9
+
+
+def test_calls_time_out_per_model():
+    """Test that the model timeout applies and is counted."""
+    pool = LLMClientPool(timeout=5.0, model_timeouts={"SlowLLM": 0.05})
+    slow = SlowLLM(delay=1.0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(pool.run(slow, lambda: slow._acall("hi")))
+    assert pool.stats()["models"]["SlowLLM"]["timeouts"] == 1
+
+
+def test_generator_and_engine_share_the_pooled_client(monkeypatch):
+    """Test that both services use one client from the shared pool unless given their own."""
+    created = []
+    monkeypatch.setattr(llm_client_pool, "factory", counting_factory(created))
+    llm_client_pool.close()
+    try:
+        generator, engine = PackingSuggestionGenerator(), RecommendationEngine()
+        assert created == []
+
+        assert generator.llm_client is engine.llm_client
+        assert len(created) == 1
+        own = SlowLLM()
+        assert RecommendationEngine(llm_client=own).llm_client is own
+    finally:
+        llm_client_pool.close()
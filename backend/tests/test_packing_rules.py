@@ -0,0 +1,96 @@
+"""
+Tests for the compiled, memoized packing rule tables.
+"""
+import pytest
+
+from app.services.ai.packing_rules import PackingRuleTable, packing_list_rules, rule
+from app.services.ai.packing_suggestion import PackingSuggestionGenerator
+from app.services.ai.recommendation_engine import RecommendationEngine
+from tests.test_recommendation_engine import make_flights, make_weather
+
+
+def weather(min_temp, max_temp, precipitation_days=0, condition="Cloudy"):
+    return {"min_temp": min_temp, "max_temp": max_temp, "avg_temp": (min_temp + max_temp) / 2,
+            "precipitation_days": precipitation_days, "predominant_condition": condition}
+
+
+def test_rules_match_thresholds_and_activities():
+    """Test the generator's rule-based list at and around its thresholds."""
+    generator = PackingSuggestionGenerator(llm_client=None)
+
+    cold = generator._generate_rule_based_suggestions(weather(40, 60, 5), ["Beach day", "SWIMMING"])
+    assert cold["clothing"] == ["Underwear", "Socks", "Pajamas", "Winter coat", "Sweaters", "Long-sleeve shirts",
+                                "Warm socks", "Jeans/pants", "Waterproof shoes", "Swimsuit", "Beach cover-up"]
+    assert cold["accessories"] == ["Gloves", "Scarf", "Winter hat", "Umbrella", "Rain jacket",
+                                   "Beach towel", "Flip flops"]
+    assert "Sunscreen" not in cold["toiletries"]
+
+    mild = generator._generate_rule_based_suggestions(weather(50, 75, 3), ["business meetings"])
+    assert "Light jacket" in mild["clothing"] and "Waterproof shoes" not in mild["clothing"]
+    assert "Shorts" not in mild["clothing"]
+    assert mild["accessories"] == ["Light scarf", "Umbrella", "Rain jacket", "Portfolio/briefcase"]
+
+    # Overlapping rules list T-shirts once
+    hot = generator._generate_rule_based_suggestions(weather(70, 90), None)
+    assert hot["clothing"] == ["Underwear", "Socks", "Pajamas", "T-shirts", "Light shirts", "Shorts",
+                               "Light clothing"]
+    assert hot["toiletries"][-1] == "Sunscreen"
+    assert set(hot) == {"clothing", "accessories", "toiletries", "documents", "electronics", "miscellaneous"}
+
+
+def test_same_signature_is_memoized_and_copies_are_independent():
+    """Test that trips in the same threshold buckets share one memoized list."""
+    table = PackingRuleTable(
+        base={"clothing": ["Socks"], "accessories": []},
+        rules=[rule(("min_temp", "<", 50), clothing=["Coat"]),
+               rule(("condition", "Rain"), accessories=["Umbrella"])],
+    )
+
+    assert table.signature(weather(41, 60)) == table.signature(weather(49.5, 90))
+    assert table.signature(weather(41, 60)) != table.signature(weather(50, 60))
+
+    lists = table.suggest_many([weather(41, 60, condition="Light Rain"), weather(45, 70, condition="Rain"),
+                                weather(60, 70)])
+    assert lists[0] == lists[1] == {"clothing": ["Socks", "Coat"], "accessories": ["Umbrella"]}
+    assert lists[2] == {"clothing": ["Socks"], "accessories": []}
+    lists[0]["clothing"].append("Hat")
+    assert lists[1]["clothing"] == ["Socks", "Coat"]
+    assert table.stats()["signatures"] == 2
+
+    table.suggest(weather(30, 40, condition="Thunderstorm, Rain"))
+    assert table.stats()["hits"] == 1
+
+
+def test_rules_for_unknown_categories_are_rejected():
+    """Test that a rule table is checked when it is compiled."""
+    with pytest.raises(ValueError):
+        PackingRuleTable(base={"clothing": []}, rules=[rule(("min_temp", "<", 50), gadgets=["Torch"])])
+    with pytest.raises(ValueError):
+        PackingRuleTable(base={"clothing": []}, rules=[rule(("min_temp", "~", 50), clothing=["Coat"])])
+
+
+def test_engine_adds_lists_per_recommendation_from_shared_summaries():
+    """Test the engine's batch: one list per recommendation, including periods without weather."""
+    engine = RecommendationEngine(llm_client=None)
+    flights = make_flights(6)
+    flights[5] = {**flights[5], "departure_time": "2030-01-01T08:00:00", "arrival_time": "2030-01-02T08:00:00"}
+    recommendations = [{"flight": flight} for flight in flights]
+
+    engine._add_packing_suggestions(recommendations, make_weather())
+
+    for recommendation in recommendations[:5]:
+        suggestions = recommendation["packing_suggestions"]
+        assert suggestions["clothing"][:4] == ["Comfortable walking shoes", "Light jacket", "Long-sleeve shirts",
+                                               "Pants"]
+        assert suggestions["documents"] == ["Passport", "ID", "Hotel confirmation", "Travel insurance"]
+    assert recommendations[5]["packing_suggestions"]["clothing"] == [
+        "Pack for variable weather, layering recommended"
+    ]
+    assert recommendations[0]["packing_suggestions"] is not recommendations[1]["packing_suggestions"]
+
+
+def test_shared_table_lists_are_not_shared_objects():
+    """Test that callers of the global table cannot change each other's lists."""
+    first = packing_list_rules.suggest(weather(66, 70))
+    first["clothing"].clear()
+    assert packing_list_rules.suggest(weather(66, 70))["clothing"]
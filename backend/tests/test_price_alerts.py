@@ -0,0 +1,140 @@
+"""
+Tests for price-drop alerts on saved deals.
+"""
+import datetime
+
+from sqlalchemy import event
+
+from app import crud
+from app.models.flight import Flight
+from app.models.hotel import Hotel
+from app.models.notification import Notification
+from app.models.price_watch import PriceWatch
+from app.models.recommendation import Recommendation
+from app.models.saved_deal import SavedDeal
+from app.models.search import Search
+from app.models.user import User
+from app.services.ai.price_alerts import PriceAlertEngine
+
+def add_saved_deal(db, departure, flight_price=400.0, hotel_price=120.0):
+    """Store a user's saved deal on a Quito -> Lima flight and a Lima hotel (one departure date per test)."""
+    user = User(email=f"alerts-{datetime.datetime.now().timestamp()}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    search = Search(user_id=user.id, destination="Lima", departure_location="Quito",
+                    departure_date=departure, return_date=departure + datetime.timedelta(days=5))
+    db.add(search)
+    db.flush()
+    flight = Flight(search_id=search.id, airline="Andes Air", price=flight_price, currency="USD")
+    hotel = Hotel(search_id=search.id, name="Miraflores Park Hotel", price_per_night=hotel_price, currency="USD")
+    db.add_all([flight, hotel])
+    db.flush()
+    recommendation = Recommendation(search_id=search.id, flight_id=flight.id, hotel_id=hotel.id, score=80.0)
+    db.add(recommendation)
+    db.flush()
+    deal = SavedDeal(user_id=user.id, recommendation_id=recommendation.id)
+    db.add(deal)
+    db.commit()
+    return user, deal
+
+
+def alerts_for(db, user):
+    return db.query(Notification).filter(Notification.user_id == user.id).order_by(Notification.id).all()
+
+
+def test_saved_deals_get_flight_and_hotel_watches(test_db):
+    """Test that backfilling creates one watch per saved flight and hotel, below the saved price."""
+    departure = datetime.datetime(2025, 9, 10)
+    _, deal = add_saved_deal(test_db, departure)
+    engine = PriceAlertEngine(min_drop_percent=10)
+
+    engine.watch_saved_deals(test_db)
+
+    watches = {w.kind: w for w in test_db.query(PriceWatch).filter_by(saved_deal_id=deal.id)}
+    assert watches["flight"].key == "QUITO-LIMA"
+    assert watches["flight"].travel_date == departure.date()
+    assert watches["flight"].threshold == 360.0
+    assert watches["hotel"].threshold == 108.0
+    assert engine.watch_saved_deals(test_db) == 0
+
+
+def test_price_drops_create_notifications_once(test_db):
+    """Test that a drop alerts once, and only a further drop alerts again."""
+    departure = datetime.datetime(2025, 9, 11)
+    user, deal = add_saved_deal(test_db, departure)
+    engine = PriceAlertEngine(min_drop_percent=5)
+    engine.watch_saved_deals(test_db, [deal.id])
+    flights = [{"price": 390.0}, {"price": 370.0, "airline": "Other"}, {"origin": "BOG", "price": 100.0}]
+
+    assert engine.observe_flights(test_db, flights, origin="Quito", destination="Lima",
+                                  departure_date=departure) == 1
+    assert engine.observe_flights(test_db, flights, origin="Quito", destination="Lima",
+                                  departure_date=departure) == 0
+    # Other dates and other hotels do not match
+    assert engine.observe_flights(test_db, [{"price": 10.0}], origin="Quito", destination="Lima",
+                                  departure_date=departure + datetime.timedelta(days=1)) == 0
+    assert engine.observe_hotels(test_db, [{"name": "Lima Inn", "price_per_night": 10.0}],
+                                 location="Lima", check_in=departure) == 0
+    assert engine.observe_flights(test_db, [{"price": 340.0}], origin="Quito", destination="Lima",
+                                  departure_date=departure) == 1
+
+    alerts = alerts_for(test_db, user)
+    assert [a.type for a in alerts] == ["price_alert", "price_alert"]
+    assert "dropped 7.5% to 370.00 USD" in alerts[0].message
+    assert alerts[1].recommendation_id == deal.recommendation_id
+
+
+def test_alert_lookup_only_reads_affected_watches(test_db):
+    """Test that a batch is matched with one indexed query, however many watches exist."""
+    departure = datetime.datetime(2025, 9, 13)
+    user, deal = add_saved_deal(test_db, departure)
+    engine = PriceAlertEngine()
+    engine.watch_saved_deals(test_db, [deal.id])
+    crud.price_watch.create_multi(test_db, rows=[
+        {"saved_deal_id": deal.id, "user_id": user.id, "kind": "flight", "key": f"R{i % 500}-X",
+         "travel_date": departure.date(), "reference_price": 500.0, "threshold": 475.0}
+        for i in range(5000)
+    ])
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(test_db.get_bind(), "before_cursor_execute", listener)
+    try:
+        created = engine.observe_hotels(
+            test_db, [{"name": "Miraflores Park", "price_per_night": p} for p in (119.0, 99.0, 150.0)],
+            location="Lima", check_in=departure,
+        )
+    finally:
+        event.remove(test_db.get_bind(), "before_cursor_execute", listener)
+
+    assert created == 1
+    assert sum(s.lstrip().upper().startswith("SELECT") for s in statements) == 1
+    assert "dropped 17.5% to 99.00 USD" in alerts_for(test_db, user)[0].message
+
+
+def test_saving_a_deal_through_the_api_creates_its_watches(test_app, test_db):
+    """Test that POST /deals saves the current user's recommendation and watches its prices."""
+    departure = datetime.datetime(2025, 9, 20)
+    # The development auth dependency always returns user 1
+    search = Search(user_id=1, destination="Cusco", departure_location="Quito",
+                    departure_date=departure, return_date=departure + datetime.timedelta(days=4))
+    test_db.add(search)
+    test_db.flush()
+    flight = Flight(search_id=search.id, airline="Andes Air", price=300.0, currency="USD")
+    hotel = Hotel(search_id=search.id, name="Casa Andina", price_per_night=90.0, currency="USD")
+    test_db.add_all([flight, hotel])
+    test_db.flush()
+    recommendation = Recommendation(search_id=search.id, flight_id=flight.id, hotel_id=hotel.id, score=75.0)
+    test_db.add(recommendation)
+    test_db.commit()
+
+    response = test_app.post("/api/v1/deals/", json={"recommendation_id": recommendation.id, "notes": "Inca trail"})
+
+    assert response.status_code == 200, response.text
+    deal = response.json()
+    assert (deal["user_id"], deal["recommendation_id"], deal["notes"]) == (1, recommendation.id, "Inca trail")
+    watches = {w.kind: w for w in test_db.query(PriceWatch).filter_by(saved_deal_id=deal["id"])}
+    assert watches["flight"].key == "QUITO-CUSCO"
+    assert watches["hotel"].reference_price == 90.0
+    assert all(watch.user_id == 1 for watch in watches.values())
+    assert test_app.post("/api/v1/deals/", json={"recommendation_id": 10_000_000}).status_code == 404
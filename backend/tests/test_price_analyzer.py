@@ -0,0 +1,78 @@
+"""
+Tests for the price analyzer's deal detection.
+"""
+import time
+
+import numpy as np
+
+from app.services.ai.price_analyzer import PriceAnalyzer
+
+
+def brute_force_deals(prices, groups, min_savings_percent=15.0, top_k=3):
+    """Reference implementation: group averages and savings one offer at a time."""
+    by_group = {}
+    for price, group in zip(prices, groups):
+        by_group.setdefault(group, []).append(price)
+    averages = {group: sum(values) / len(values) for group, values in by_group.items()}
+
+    deals = []
+    for index, (price, group) in enumerate(zip(prices, groups)):
+        savings_percent = (averages[group] - price) / averages[group] * 100
+        if savings_percent >= min_savings_percent:
+            deals.append((index, savings_percent))
+    deals.sort(key=lambda deal: deal[1], reverse=True)
+    return deals[:top_k]
+
+
+def test_detect_deals_matches_brute_force():
+    """Test that the columnar deal detection finds the same deals as a per-offer loop."""
+    rng = np.random.default_rng(7)
+    prices = rng.uniform(50, 500, 2000).round(2)
+    groups = rng.choice(["JFK|LAX", "JFK|SFO", "BOS|MIA", "ORD|SEA"], 2000)
+
+    deals = PriceAnalyzer().detect_deals(prices, groups=groups, top_k=10)
+    expected = brute_force_deals(prices.tolist(), groups.tolist(), top_k=10)
+
+    assert deals["index"].tolist() == [index for index, _ in expected]
+    assert np.allclose(deals["savings_percent"], [percent for _, percent in expected])
+    assert np.allclose(deals["avg_price"] - prices[deals["index"]], deals["savings_amount"])
+
+
+def test_detect_deals_skips_missing_prices():
+    """Test that missing prices are neither averaged nor reported as deals."""
+    deals = PriceAnalyzer().detect_deals([100.0, 100.0, np.nan, 40.0], top_k=None)
+
+    assert deals["index"].tolist() == [3]
+    assert deals["avg_price"][0] == 80.0
+
+
+def test_hotel_deals_are_compared_within_star_rating():
+    """Test that hotels are only compared with hotels of the same rounded rating."""
+    hotels = [
+        {"name": "Budget A", "price_per_night": 60.0, "rating": 2.8},
+        {"name": "Budget B", "price_per_night": 62.0, "rating": 3.1},
+        {"name": "Unrated", "price_per_night": 58.0},
+        {"name": "Grand", "price_per_night": 300.0, "rating": 5.0},
+        {"name": "Palace", "price_per_night": 200.0, "rating": 4.9},
+    ]
+
+    deals = PriceAnalyzer()._find_best_hotel_deals(hotels)
+
+    assert [deal["item"]["name"] for deal in deals] == ["Palace"]
+    assert deals[0]["avg_price"] == 250.0
+    assert "5-star" in deals[0]["explanation"]
+
+
+def test_detect_deals_handles_large_histories():
+    """Test that a 100k-row history is analyzed well within a request's time budget."""
+    rng = np.random.default_rng(3)
+    prices = rng.uniform(50, 500, 100_000)
+    routes = rng.integers(0, 500, 100_000)
+
+    started = time.perf_counter()
+    deals = PriceAnalyzer().detect_deals(prices, groups=routes, currencies=["USD"] * 100_000)
+    elapsed = time.perf_counter() - started
+
+    assert len(deals["index"]) == 3
+    assert np.all(np.diff(deals["savings_percent"]) <= 0)
+    assert elapsed < 1.0
@@ -0,0 +1,154 @@
+"""
+Tests for the robust outlier filter on scraped prices.
+"""
+import time
+
+import numpy as np
+
+from app.services.ai.records import FlightRecord, to_records
+from app.services.currency import CurrencyConverter
+from app.services.scraper.price_filter import PriceOutlierFilter, filter_flight_prices, filter_hotel_prices
+from tests.test_query_cache import as_superuser
+
+
+def usd_converter():
+    converter = CurrencyConverter(base_currency="USD", rates_path="")
+    converter.set_rates({"EUR": 0.8})
+    return converter
+
+
+def flights(prices, origin="LIS", destination="JFK", currency="USD"):
+    return [{"origin": origin, "destination": destination, "price": price, "currency": currency,
+             "flight_number": f"{origin}{i}"} for i, price in enumerate(prices)]
+
+
+def route_filter(action="drop", **kwargs):
+    return PriceOutlierFilter(price_field="price", group_key=lambda f: (f.get("origin"), f.get("destination")),
+                              action=action, currency_converter=usd_converter(), **kwargs)
+
+
+def test_outliers_are_dropped_per_route_in_both_directions():
+    """Test that a missing decimal point and a per-leg price are dropped, only within their route."""
+    batch = (flights([410.0, 395.0, 430.0, 450.0, 38.0, 420.0, 4200.0])
+             + flights([40.0, 45.0, 38.0, 52.0, 47.0], origin="LIS", destination="OPO"))
+    price_filter = route_filter()
+
+    result = price_filter.filter(batch)
+
+    assert [f["price"] for f in result] == [410.0, 395.0, 430.0, 450.0, 420.0, 40.0, 45.0, 38.0, 52.0, 47.0]
+    assert price_filter.stats() == {"checked": 12, "invalid": 0, "outliers": 2, "dropped": 2,
+                                    "flagged": 0, "clamped": 0}
+
+
+def test_flag_keeps_items_and_marks_details():
+    """Test that flagged outliers and invalid prices stay in the batch with a reason."""
+    batch = flights([410.0, 395.0, 430.0, 450.0, 420.0, 4100.0, None, 0.0])
+    batch[5]["details"] = {"source": "kayak"}
+    price_filter = route_filter("flag")
+
+    result = price_filter.filter(batch)
+
+    assert len(result) == 8
+    assert result[5]["details"]["source"] == "kayak"
+    assert result[5]["details"]["price_outlier"]["reason"] == "outlier"
+    assert result[5]["details"]["price_outlier"]["robust_z"] > 3.5
+    assert result[6]["details"]["price_outlier"]["reason"] == "invalid"
+    assert "details" not in result[0]
+    assert "details" not in batch[6]
+    assert price_filter.stats()["flagged"] == 3
+
+
+def test_clamp_moves_price_to_the_group_bound_in_item_currency():
+    """Test clamping a record to the route's upper bound, converted back to its currency."""
+    batch = to_records(flights([400.0, 410.0, 420.0, 430.0, 440.0]) + flights([8000.0], currency="EUR"),
+                       FlightRecord)
+    price_filter = route_filter("clamp")
+
+    result = price_filter.filter(batch)
+
+    clamped = result[5]
+    assert isinstance(clamped, FlightRecord)
+    assert clamped.currency == "EUR"
+    assert clamped.details["price_outlier"]["original_price"] == 8000.0
+    _, _, upper = price_filter.robust_scores(np.array([400.0, 410.0, 420.0, 430.0, 440.0, 10000.0]), [0] * 6)
+    assert np.isclose(clamped.price, upper[0] * 0.8, atol=0.01)
+    assert 400.0 * 0.8 < clamped.price < 8000.0
+    assert price_filter.stats()["clamped"] == 1
+
+
+def test_small_groups_and_identical_prices():
+    """Test that small groups are left alone and a zero MAD falls back to the mean deviation."""
+    price_filter = route_filter()
+    assert len(price_filter.filter(flights([100.0, 2000.0, 110.0]))) == 3
+
+    # More than half identical: MAD is 0, but the far price is still caught
+    result = price_filter.filter(flights([300.0] * 6 + [310.0, 3000.0]))
+    assert [f["price"] for f in result] == [300.0] * 6 + [310.0]
+
+    # All identical: nothing to compare against
+    assert len(price_filter.filter(flights([250.0] * 6))) == 6
+
+
+def test_currencies_are_compared_in_base_currency():
+    """Test that a EUR price is not an outlier among USD prices just because of its currency."""
+    batch = flights([400.0, 410.0, 420.0, 430.0, 440.0]) + flights([336.0], currency="EUR")
+    assert len(route_filter().filter(batch)) == 6
+
+
+def test_hotels_are_grouped_by_star_rating():
+    """Test the hotel filter: a 5-star price is normal among 5-star hotels, not among 2-star ones."""
+    hotels = ([{"name": f"Hostel {i}", "rating": 2.0, "price_per_night": 40.0 + i} for i in range(6)]
+              + [{"name": f"Palace {i}", "rating": 4.8, "price_per_night": 600.0 + 10 * i} for i in range(6)]
+              + [{"name": "Misfiled", "rating": 2.2, "price_per_night": 650.0}])
+
+    result = filter_hotel_prices(hotels)
+
+    assert len(result) == 12
+    assert "Misfiled" not in [h["name"] for h in result]
+
+
+def test_unparseable_ratings_are_grouped_with_3_star_hotels():
+    """Test that a non-numeric rating does not abort the batch and counts as 3 stars."""
+    hotels = ([{"name": f"Inn {i}", "rating": 3, "price_per_night": 90.0 + i} for i in range(5)]
+              + [{"name": "Unrated", "rating": "N/A", "price_per_night": 95.0},
+                 {"name": "Blank", "rating": "", "price_per_night": 900.0}])
+
+    result = filter_hotel_prices(hotels)
+
+    assert [h["name"] for h in result] == [f"Inn {i}" for i in range(5)] + ["Unrated"]
+
+
+def test_price_filter_stats_endpoint(test_app, monkeypatch):
+    """Test that the filter counters are served for flights and hotels, to superusers only."""
+    assert test_app.get("/price-filter-stats").status_code == 400
+    as_superuser(monkeypatch)
+    before = test_app.get("/price-filter-stats").json()
+    filter_flight_prices([{"origin": "AMS", "destination": "OPO", "price": 120.0 + i} for i in range(5)]
+                         + [{"origin": "AMS", "destination": "OPO", "price": 12000.0}])
+
+    response = test_app.get("/price-filter-stats")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["flights"]["checked"] == before["flights"]["checked"] + 6
+    assert data["flights"]["outliers"] == before["flights"]["outliers"] + 1
+    assert set(data["hotels"]) == {"checked", "invalid", "outliers", "dropped", "flagged", "clamped"}
+
+
+def test_large_batch_is_fast():
+    """Test that 100k prices over 1000 routes are scored in well under a second."""
+    rng = np.random.default_rng(7)
+    routes = rng.integers(0, 1000, 100_000)
+    prices = np.exp(rng.normal(5.5, 0.2, 100_000)) * (1 + routes / 100)
+    price_filter = PriceOutlierFilter(price_field="price", group_key=lambda f: f["route"],
+                                      currency_converter=usd_converter())
+    batch = [{"route": int(r), "price": float(p)} for r, p in zip(routes, prices)]
+    batch[0]["price"] *= 20
+
+    started = time.perf_counter()
+    result = price_filter.filter(batch)
+    elapsed = time.perf_counter() - started
+
+    assert batch[0] not in result
+    assert len(result) > 99_700
+    assert elapsed < 1.0
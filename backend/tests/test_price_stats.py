@@ -0,0 +1,113 @@
+"""
+Tests for running per-route and per-property price statistics.
+"""
+import datetime
+
+import numpy as np
+
+from app import crud
+from app.services.ai.price_analyzer import PriceAnalyzer
+from app.services.ai.price_stats import PriceStatsTracker, RunningPriceStats, summarize_batch
+from app.services.currency import CurrencyConverter
+
+
+def fold_batches(batches, alpha=0.2):
+    """Fold (prices, day) batches into one RunningPriceStats, as successive scrapes would."""
+    stats = RunningPriceStats()
+    for prices, day in batches:
+        summary = summarize_batch(np.zeros(len(prices), dtype=np.intp), np.asarray(prices, dtype=float),
+                                  np.full(len(prices), float(day)), alpha)
+        stats.merge(**{name: values.tolist()[0] for name, values in summary.items()})
+    return stats
+
+
+def test_running_stats_match_full_history():
+    """Test that batch-by-batch statistics equal those computed from the whole history."""
+    rng = np.random.default_rng(11)
+    batches = [(rng.uniform(200, 400, rng.integers(1, 8)) + 3 * day, 19000 + day) for day in range(20)]
+    prices = np.concatenate([p for p, _ in batches])
+    days = np.concatenate([np.full(len(p), d, dtype=float) for p, d in batches])
+
+    stats = fold_batches(batches)
+
+    expected_ewma = prices[0]
+    for price in prices[1:]:
+        expected_ewma = 0.8 * expected_ewma + 0.2 * price
+    assert stats.count == len(prices)
+    assert np.isclose(stats.mean, prices.mean())
+    assert np.isclose(stats.variance, prices.var(ddof=1))
+    assert (stats.min_price, stats.max_price) == (prices.min(), prices.max())
+    assert np.isclose(stats.slope_per_day, np.polyfit(days, prices, 1)[0])
+    assert np.isclose(stats.ewma, expected_ewma)
+    assert np.isclose(stats.correlation, np.corrcoef(days, prices)[0, 1])
+
+
+def test_single_updates_match_batches():
+    """Test that updating one price at a time gives the same result as batches."""
+    observed = datetime.datetime(2025, 3, 1)
+    stats = RunningPriceStats()
+    for day, price in enumerate([300.0, 310.0, 290.0, 330.0]):
+        stats.update(price, observed + datetime.timedelta(days=day))
+
+    expected = fold_batches([([300.0], 0), ([310.0], 1), ([290.0], 2), ([330.0], 3)])
+    assert np.isclose(stats.slope_per_day, expected.slope_per_day)
+    assert np.isclose(stats.ewma, expected.ewma)
+    assert stats.last_observed_at == observed + datetime.timedelta(days=3)
+
+
+def test_tracker_persists_per_route_and_property(test_db):
+    """Test that scrapes update stored statistics per route and property, in the base currency."""
+    converter = CurrencyConverter(base_currency="USD")
+    converter.set_rates({"EUR": 0.5}, base_currency="USD")
+    tracker = PriceStatsTracker(currency_converter=converter)
+    start = datetime.datetime(2025, 1, 1)
+
+    for day in range(10):
+        flights = [
+            {"origin": "ber", "destination": "lis", "price": 200.0 + 5 * day},
+            {"price": 100.0 + 2.5 * day, "currency": "EUR"},  # route from the search
+            {"origin": "BER", "destination": "MAD", "price": None},
+        ]
+        tracker.observe_flights(test_db, flights, origin="BER", destination="LIS",
+                                observed_at=start + datetime.timedelta(days=day))
+        tracker.observe_hotels(test_db, [{"name": "The Grand Hotel", "price_per_night": 150.0 - day}],
+                               location="Lisbon", observed_at=start + datetime.timedelta(days=day))
+
+    route = tracker.get(test_db, "flight", tracker.route_key("BER", "LIS"))
+    assert route.count == 20
+    assert np.isclose(route.mean, 222.5)
+    assert np.isclose(route.slope_per_day, 5.0)
+    assert tracker.get(test_db, "flight", "BER-MAD") is None
+
+    hotel = tracker.get(test_db, "hotel", tracker.property_key("Grand", "lisbon"))
+    assert hotel.count == 10
+    assert np.isclose(hotel.slope_per_day, -1.0)
+
+    analyzer = PriceAnalyzer()
+    assert analyzer.analyze_price_stats(route)["direction"] == "increasing"
+    assert analyzer.analyze_price_stats(hotel)["direction"] == "decreasing"
+    assert analyzer.analyze_price_stats(RunningPriceStats())["trend"] == "unknown"
+
+
+def test_tracker_merges_into_a_key_inserted_concurrently(test_db, monkeypatch):
+    """Test that a key another process inserts between the read and the write is merged into, not lost."""
+    tracker, other_process = PriceStatsTracker(), PriceStatsTracker()
+    observed = datetime.datetime(2025, 3, 1)
+    get_rows_by_keys = crud.price_stat.get_rows_by_keys
+    calls = []
+
+    def racing_get_rows_by_keys(db, **kwargs):
+        rows = get_rows_by_keys(db, **kwargs)
+        calls.append(kwargs)
+        if len(calls) == 1:
+            # Another writer stores the same new key before this one saves
+            other_process.observe(db, "flight", ["OSL-RAK"], [400.0], observed_at=observed)
+        return rows
+
+    monkeypatch.setattr(crud.price_stat, "get_rows_by_keys", racing_get_rows_by_keys)
+    tracker.observe(test_db, "flight", ["OSL-RAK"], [500.0], observed_at=observed)
+
+    assert all(kwargs["for_update"] for kwargs in calls)
+    stats = tracker.get(test_db, "flight", "OSL-RAK")
+    assert stats.count == 2
+    assert np.isclose(stats.mean, 450.0)
@@ -0,0 +1,76 @@
+"""
+Tests for the per-user query result cache.
+"""
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.main import app
+from app.services.cache import QueryCache
+
+
+def make_cache(**kwargs):
+    """Create an in-process-only cache."""
+    return QueryCache(redis_url="", **{"max_entries": 16, "ttl_seconds": 60, **kwargs})
+
+
+def test_cache_hit_and_miss():
+    """Test that repeated queries are served from the cache."""
+    cache = make_cache()
+    calls = []
+    loader = lambda: calls.append(1) or ["deal"]
+
+    assert cache.get_or_load("deals", 1, {"skip": 0, "limit": 10}, loader) == ["deal"]
+    assert cache.get_or_load("deals", 1, {"limit": 10, "skip": 0}, loader) == ["deal"]
+    assert len(calls) == 1
+
+    stats = cache.stats()["deals"]
+    assert stats["misses"] == 1
+    assert stats["local_hits"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_invalidation_is_per_user():
+    """Test that invalidating one user's results leaves other users cached."""
+    cache = make_cache()
+    calls = []
+    loader = lambda: calls.append(1) or []
+
+    cache.get_or_load("deals", 1, {}, loader)
+    cache.get_or_load("deals", 2, {}, loader)
+    cache.invalidate(["deals"], [1])
+    cache.get_or_load("deals", 1, {}, loader)
+    cache.get_or_load("deals", 2, {}, loader)
+
+    assert len(calls) == 3
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted."""
+    cache = make_cache(max_entries=2)
+    calls = []
+    loader = lambda: calls.append(1) or []
+
+    cache.get_or_load("deals", 1, {"page": 1}, loader)
+    cache.get_or_load("deals", 1, {"page": 2}, loader)
+    cache.get_or_load("deals", 1, {"page": 3}, loader)
+    cache.get_or_load("deals", 1, {"page": 1}, loader)
+
+    assert len(calls) == 4
+
+
+def as_superuser(monkeypatch):
+    """Authenticate requests as a superuser."""
+    superuser = SimpleNamespace(id=1, is_active=True, is_superuser=True)
+    monkeypatch.setitem(app.dependency_overrides, deps.get_current_active_superuser, lambda: superuser)
+
+
+def test_cache_stats_endpoint(test_app: TestClient, monkeypatch):
+    """Test the cache statistics endpoint, which only superusers may read."""
+    assert test_app.get("/cache-stats").status_code == 400
+
+    as_superuser(monkeypatch)
+    response = test_app.get("/cache-stats")
+    assert response.status_code == 200
+    assert "query_cache" in response.json()
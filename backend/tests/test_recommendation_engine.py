@@ -0,0 +1,409 @@
+"""
+Tests for the recommendation engine scoring.
+"""
+import asyncio
+import datetime
+import itertools
+import json
+import random
+import time
+
+import numpy as np
+from langchain_core.language_models.llms import LLM
+
+from app.services.ai.bundle_optimizer import BundleOptimizer
+from app.services.ai.candidate_matrix import CandidateMatrix
+from app.services.ai.pareto import dominated_mask, pareto_frontier
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.records import FlightRecord, HotelRecord, WeatherDay, to_records
+from app.services.ai.weather_index import WeatherIndex
+
+
+BASE_DATE = datetime.datetime(2025, 6, 1)
+
+
+def make_flights(count, seed=0):
+    """Create random flight data."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "airline": f"Airline {i}",
+            "price": rnd.uniform(100, 900),
+            "duration_minutes": rnd.randint(60, 900),
+            "layovers": rnd.randint(0, 2),
+            "departure_time": (BASE_DATE + datetime.timedelta(days=rnd.randint(0, 2))).isoformat(),
+            "arrival_time": (BASE_DATE + datetime.timedelta(days=rnd.randint(3, 7))).isoformat(),
+            "currency": "USD",
+        }
+        for i in range(count)
+    ]
+
+
+def make_hotels(count, seed=1):
+    """Create random hotel data."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "name": f"Hotel {i}",
+            "location": "City Center",
+            "price_per_night": rnd.uniform(50, 400),
+            "rating": rnd.choice([None, 3.5, 4.2, 5.0]),
+        }
+        for i in range(count)
+    ]
+
+
+def make_weather(days=8):
+    """Create daily weather data."""
+    conditions = ["Sunny", "Cloudy", "Light Rain", "Clear"]
+    return [
+        {
+            "date": (BASE_DATE + datetime.timedelta(days=i)).strftime("%Y-%m-%d"),
+            "temperature_high": 65 + i * 3,
+            "temperature_low": 55,
+            "precipitation_chance": (i * 13) % 100,
+            "condition": conditions[i % len(conditions)],
+        }
+        for i in range(days)
+    ]
+
+
+def test_all_pairs_are_scored():
+    """Test that every flight and hotel combination is ranked."""
+    engine = RecommendationEngine()
+    flights, hotels = make_flights(25), make_hotels(15)
+
+    recommendations = engine._generate_flight_hotel_combinations(flights, hotels, make_weather())
+
+    assert len(recommendations) == 25 * 15
+    scores = [r["score"] for r in recommendations]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_matches_full_ranking():
+    """Test that top-k selection returns the head of the full ranking."""
+    engine = RecommendationEngine()
+    flights, hotels, weather = make_flights(40), make_hotels(30), make_weather()
+
+    full = engine._generate_flight_hotel_combinations(flights, hotels, weather)
+    top = engine._generate_flight_hotel_combinations(flights, hotels, weather, top_k=7)
+
+    assert [r["score"] for r in top] == [r["score"] for r in full[:7]]
+
+
+def test_pair_scores_match_component_weights():
+    """Test that the total score is the weighted sum of the component scores."""
+    engine = RecommendationEngine()
+    recommendation = engine._generate_flight_hotel_combinations(
+        make_flights(5), make_hotels(5), make_weather(), top_k=1
+    )[0]
+
+    expected = (
+        engine.PRICE_WEIGHT * recommendation["price_score"]
+        + engine.WEATHER_WEIGHT * recommendation["weather_score"]
+        + engine.CONVENIENCE_WEIGHT * recommendation["convenience_score"]
+    )
+    assert abs(recommendation["score"] - expected) < 1e-9
+
+
+def test_weather_index_range_scores_match_brute_force():
+    """Test that prefix-sum range scores equal a per-day average."""
+    weather = make_weather(10)
+    index = WeatherIndex(weather)
+    daily = index.mean_scores(
+        np.array([index.to_day(day["date"]) for day in weather]),
+        np.array([index.to_day(day["date"]) for day in weather]),
+    )
+
+    starts, ends, expected = [], [], []
+    for start in range(-2, 12):
+        for end in range(start, 14):
+            in_range = [daily[i] for i in range(len(weather)) if start <= i <= end]
+            starts.append(index.first_day + start)
+            ends.append(index.first_day + end)
+            expected.append(sum(in_range) / len(in_range) if in_range else 0.5)
+
+    assert np.allclose(index.mean_scores(np.array(starts), np.array(ends)), expected)
+
+
+def test_weather_index_summary():
+    """Test range min/max temperatures, rainy days and predominant condition."""
+    weather = make_weather(10)
+    index = WeatherIndex(weather)
+
+    summary = index.summary(weather[2]["date"], BASE_DATE + datetime.timedelta(days=6, hours=5))
+    in_range = weather[2:7]
+    temps = [t for day in in_range for t in (day["temperature_high"], day["temperature_low"])]
+    assert summary["min_temp"] == min(temps)
+    assert summary["max_temp"] == max(temps)
+    assert summary["avg_temp"] == sum(temps) / len(temps)
+    assert summary["precipitation_days"] == sum(1 for day in in_range if day["precipitation_chance"] > 30)
+    assert summary["predominant_condition"] == "Light Rain"
+    assert summary["days"] == 5
+
+    assert index.summary("2024-01-01", "2024-01-31") is None
+    assert WeatherIndex([]).summary() is None
+
+
+def test_pareto_frontier_matches_brute_force():
+    """Test the skyline against a pairwise dominance check, including ties."""
+    rnd = np.random.default_rng(0)
+    points = np.round(rnd.random((400, 3)), 1)
+
+    frontier = set(pareto_frontier(points, block_size=32).tolist())
+    expected = {
+        i for i, p in enumerate(points)
+        if not any((q >= p).all() and (q > p).any() for q in points)
+    }
+    assert frontier == expected
+
+
+def test_pareto_mode_returns_frontier_with_metadata():
+    """Test that the weighted-sum winner is on the frontier and no member dominates another."""
+    engine = RecommendationEngine()
+    flights, hotels, weather = make_flights(40), make_hotels(30), make_weather()
+
+    result = engine.generate_pareto_frontier(flights, hotels, weather)
+    frontier = result["frontier"]
+    assert result["candidate_count"] == 40 * 30
+    assert frontier
+
+    best = engine._generate_flight_hotel_combinations(flights, hotels, weather, top_k=1)[0]
+    assert abs(frontier[0]["score"] - best["score"]) < 1e-12
+
+    vectors = np.array([[r[d] for d in engine.SCORE_DIMENSIONS] for r in frontier])
+    assert not dominated_mask(vectors, vectors).any()
+    assert all(r["dominated_count"] >= 0 for r in frontier)
+    for dimension in engine.SCORE_DIMENSIONS:
+        assert any(dimension in r["best_for"] for r in frontier)
+
+
+def with_ids(items):
+    """Give each item an ID, as rows loaded from the database have."""
+    return [dict(item, id=100 + i) for i, item in enumerate(items)]
+
+
+def test_candidate_matrix_rerank_matches_engine_ranking():
+    """Test that re-ranking with the default weights reproduces the engine's top-k."""
+    engine = RecommendationEngine()
+    flights, hotels, weather = with_ids(make_flights(30)), with_ids(make_hotels(20)), make_weather()
+
+    matrix = CandidateMatrix.from_bytes(engine.build_candidate_matrix(flights, hotels, weather).to_bytes())
+    ranked = matrix.rank({"price_score": 4, "weather_score": 4, "convenience_score": 2}, top_k=5)
+    expected = engine._generate_flight_hotel_combinations(flights, hotels, weather, top_k=5)
+
+    assert [(r["flight_id"], r["hotel_id"]) for r in ranked] == [
+        (r["flight"]["id"], r["hotel"]["id"]) for r in expected
+    ]
+    assert np.allclose([r["score"] for r in ranked], [r["score"] for r in expected], atol=1e-6)
+
+
+def test_candidate_matrix_filters():
+    """Test that filters only drop non-matching pairs."""
+    engine = RecommendationEngine()
+    flights, hotels = with_ids(make_flights(30)), with_ids(make_hotels(20))
+    matrix = engine.build_candidate_matrix(flights, hotels, make_weather())
+    flights_by_id = {f["id"]: f for f in flights}
+    hotels_by_id = {h["id"]: h for h in hotels}
+
+    ranked = matrix.rank(
+        {"price_score": 1}, top_k=1000,
+        max_total_price=1200, max_layovers=0, min_hotel_rating=4,
+    )
+    assert ranked
+    assert all(r["total_price"] <= 1200 for r in ranked)
+    assert all(flights_by_id[r["flight_id"]]["layovers"] == 0 for r in ranked)
+    assert all((hotels_by_id[r["hotel_id"]]["rating"] or 3.0) >= 4 for r in ranked)
+    assert [r["score"] for r in ranked] == sorted((r["score"] for r in ranked), reverse=True)
+
+    assert matrix.rank({"price_score": 1}, max_total_price=0) == []
+
+
+def test_records_score_like_dicts():
+    """Test that records give the same ranking as the dicts they were built from."""
+    engine = RecommendationEngine()
+    flights, hotels, weather = with_ids(make_flights(30)), with_ids(make_hotels(20)), make_weather()
+
+    expected = engine._generate_flight_hotel_combinations(flights, hotels, weather, top_k=10)
+    ranked = engine._generate_flight_hotel_combinations(
+        to_records(flights, FlightRecord), to_records(hotels, HotelRecord),
+        to_records(weather, WeatherDay), top_k=10,
+    )
+
+    assert [(r["flight"]["id"], r["hotel"]["id"], r["score"]) for r in ranked] == [
+        (r["flight"]["id"], r["hotel"]["id"], r["score"]) for r in expected
+    ]
+    assert isinstance(ranked[0]["flight"], FlightRecord)
+
+
+def test_record_conversions():
+    """Test dict round trips, parsed timestamps and dict-style access."""
+    flight = make_flights(1)[0]
+    record = FlightRecord.from_dict(flight)
+
+    assert record.departure_time == datetime.datetime.fromisoformat(flight["departure_time"])
+    assert record["airline"] == flight["airline"] and record.get("missing", 1) == 1
+    assert FlightRecord.from_dict(record.to_dict()) == record
+    assert not hasattr(record, "__dict__")
+
+
+def make_events(count, seed=2):
+    """Create random event data during the trip dates."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "title": f"Event {i}",
+            "start_date": (BASE_DATE + datetime.timedelta(hours=rnd.randint(0, 24 * 8))).isoformat(),
+            "price": rnd.choice([0.0, 15.0, 25.0, 40.0, 75.0, 120.0]),
+            "category": rnd.choice(["Music", "Arts", "Food & Drink"]),
+        }
+        for i in range(count)
+    ]
+
+
+def test_bundle_optimizer_matches_brute_force():
+    """Test that the best bundle under a budget equals exhaustive search."""
+    engine = RecommendationEngine()
+    flights, hotels, weather, events = make_flights(6), make_hotels(5), make_weather(), make_events(10)
+    budget = 1300.0
+    optimizer = BundleOptimizer(engine)
+
+    components = engine._score_components(flights, hotels, weather)
+    pair_scores = (
+        engine.PRICE_WEIGHT * components["price_score"]
+        + engine.WEATHER_WEIGHT * components["weather_score"]
+        + engine.CONVENIENCE_WEIGHT * components["convenience_score"]
+    )
+    expected = -1.0
+    for f, flight in enumerate(flights):
+        start = datetime.datetime.fromisoformat(flight["departure_time"])
+        end = datetime.datetime.fromisoformat(flight["arrival_time"])
+        during = [e for e in events if start <= datetime.datetime.fromisoformat(e["start_date"]) <= end]
+        for h in range(len(hotels)):
+            cost = components["total_price"][f, h]
+            for size in range(len(during) + 1):
+                for chosen in itertools.combinations(during, size):
+                    if cost + sum(e["price"] for e in chosen) <= budget:
+                        value = sum(1.5 if e["category"] == "Music" else 1.0 for e in chosen)
+                        expected = max(expected, pair_scores[f, h] + optimizer.EVENT_WEIGHT * value)
+
+    bundles = optimizer.optimize(flights, hotels, weather, events, budget=budget,
+                                 preferred_categories=["Music"], top_k=3)
+    assert abs(bundles[0]["bundle_score"] - expected) < 1e-9
+    assert all(b["bundle_price"] <= budget for b in bundles)
+    assert [b["bundle_score"] for b in bundles] == sorted((b["bundle_score"] for b in bundles), reverse=True)
+
+
+def test_bundle_optimizer_respects_budget():
+    """Test that nothing is returned when even the cheapest pair is over budget."""
+    engine = RecommendationEngine()
+    flights, hotels = make_flights(20), make_hotels(20)
+    cheapest = engine._score_components(flights, hotels, make_weather())["total_price"].min()
+
+    assert engine.generate_bundles({"budget": cheapest - 1}, flights, hotels, make_weather(), make_events(50)) == []
+    bundles = engine.generate_bundles({"budget": cheapest}, flights, hotels, make_weather(), make_events(50))
+    assert len(bundles) == 1
+    assert bundles[0]["total_price"] == cheapest
+    assert all(event["price"] == 0 for event in bundles[0]["events"])
+
+
+def test_budget_recommendations_score_only_their_pairs(monkeypatch):
+    """Test that budget recommendations come with proximity-aware component scores matching their score,
+    without scoring every flight and hotel pair."""
+    engine = RecommendationEngine()
+    rnd = random.Random(4)
+    flights = make_flights(10)
+    hotels = [dict(hotel, latitude=38.70 + rnd.uniform(0, 0.1), longitude=-9.14 + rnd.uniform(0, 0.1))
+              for hotel in make_hotels(8)]
+    events = [dict(event, latitude=38.71 + rnd.uniform(0, 0.02), longitude=-9.13 + rnd.uniform(0, 0.02))
+              for event in make_events(12)]
+    weather = make_weather()
+    expected = engine._score_components(flights, hotels, weather, events=events)
+    budget = float(np.median(expected["total_price"]))
+
+    def no_matrix(*args, **kwargs):
+        raise AssertionError("the full flights x hotels matrix was built")
+
+    monkeypatch.setattr(engine, "_score_components", no_matrix)
+    recommendations = engine._generate_budget_combinations({"budget": budget}, flights, hotels, weather, events,
+                                                           top_k=3)
+
+    assert len(recommendations) == 3
+    for recommendation in recommendations:
+        f, h = flights.index(recommendation["flight"]), hotels.index(recommendation["hotel"])
+        for component in ("price_score", "weather_score", "convenience_score", "total_price"):
+            assert np.isclose(recommendation[component], expected[component][f, h])
+        assert np.isclose(recommendation["score"],
+                          engine.PRICE_WEIGHT * recommendation["price_score"]
+                          + engine.WEATHER_WEIGHT * recommendation["weather_score"]
+                          + engine.CONVENIENCE_WEIGHT * recommendation["convenience_score"])
+        assert recommendation["bundle_price"] <= budget
+
+
+class SlowLLM(LLM):
+    """Fake LLM that answers after a delay, recording the peak number of parallel calls."""
+    delay: float = 0.2
+    reply: str = "LLM summary"
+    active: int = 0
+    peak: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return self.reply
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return self.reply
+
+
+def test_llm_summaries_run_concurrently_with_bound():
+    """Test that summaries are requested in parallel, never above the concurrency limit."""
+    llm = SlowLLM(delay=0.2)
+    engine = RecommendationEngine(llm_client=llm, max_concurrency=3, batch_summaries=False)
+    recommendations = engine._generate_flight_hotel_combinations(
+        make_flights(10), make_hotels(10), make_weather(), top_k=6
+    )
+
+    start = time.perf_counter()
+    asyncio.run(engine._generate_summaries(recommendations, {}))
+    elapsed = time.perf_counter() - start
+
+    assert all(r["summary"] == "LLM summary" for r in recommendations)
+    assert llm.peak == 3
+    assert elapsed < 0.2 * 6 * 0.6
+
+
+def test_llm_summary_timeout_falls_back_to_template():
+    """Test that a slow LLM call leaves the template summary in place."""
+    engine = RecommendationEngine(llm_client=SlowLLM(delay=1.0), llm_timeout=0.05, batch_summaries=False)
+    recommendations = engine._generate_flight_hotel_combinations(
+        make_flights(5), make_hotels(5), make_weather(), top_k=2
+    )
+
+    asyncio.run(engine._generate_summaries(recommendations, {}))
+
+    assert [r["summary"] for r in recommendations] == [engine._template_summary(r) for r in recommendations]
+
+
+def test_batched_llm_summaries_are_parsed_back():
+    """Test that one batched reply is split into per-recommendation summaries."""
+    llm = SlowLLM(delay=0.0, reply="```json\n" + json.dumps({"1": "First", "3": "Third"}) + "\n```")
+    engine = RecommendationEngine(llm_client=llm, batch_summaries=True)
+    recommendations = engine._generate_flight_hotel_combinations(
+        make_flights(5), make_hotels(5), make_weather(), top_k=3
+    )
+
+    asyncio.run(engine._generate_summaries(recommendations, {}))
+
+    assert recommendations[0]["summary"] == "First"
+    assert recommendations[1]["summary"] == engine._template_summary(recommendations[1])
+    assert recommendations[2]["summary"] == "Third"
+    assert RecommendationEngine._parse_batch_summaries("1. Alpha\n2) Beta", 2) == ["Alpha", "Beta"]
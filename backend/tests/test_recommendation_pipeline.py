@@ -0,0 +1,126 @@
+"""
+Tests for the recommendation stage of search processing.
+"""
+import asyncio
+import datetime
+import json
+
+import numpy as np
+
+from sqlalchemy import select
+
+from app import crud
+from app.models.flight import Flight
+from app.models.hotel import Hotel
+from app.models.packing_suggestion import PackingSuggestion
+from app.models.recommendation import Recommendation
+from app.models.search import Search
+from app.models.user import User
+from app.models.weather import Weather
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.recommendation_pipeline import generate_search_recommendations
+from tests.test_recommendation_engine import make_flights, make_hotels, make_weather
+
+
+def add_search_with_data(db, user_id=None, **search_values):
+    """Store a search with flights, hotels and weather, as ingestion would."""
+    if user_id is None:
+        user = User(email=f"pipeline-{datetime.datetime.now().timestamp()}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        user_id = user.id
+    search = Search(
+        user_id=user_id, destination="Lisbon", departure_location="Berlin", **search_values,
+        departure_date=datetime.datetime(2025, 6, 1), return_date=datetime.datetime(2025, 6, 8),
+    )
+    db.add(search)
+    db.flush()
+    for flight in make_flights(8):
+        db.add(Flight(search_id=search.id, **{
+            **flight,
+            "departure_time": datetime.datetime.fromisoformat(flight["departure_time"]),
+            "arrival_time": datetime.datetime.fromisoformat(flight["arrival_time"]),
+        }))
+    for hotel in make_hotels(6):
+        db.add(Hotel(search_id=search.id, **hotel))
+    for day in make_weather():
+        db.add(Weather(search_id=search.id, **{**day, "date": datetime.datetime.fromisoformat(day["date"])}))
+    db.commit()
+    return search
+
+
+def test_stage_stores_recommendations_and_completes_search(test_db):
+    """Test that the engine's winners are stored with their packing suggestions."""
+    search = add_search_with_data(test_db)
+
+    stored = asyncio.run(generate_search_recommendations(test_db, search.id, top_k=3))
+
+    recommendations = test_db.scalars(
+        select(Recommendation).where(Recommendation.search_id == search.id).order_by(Recommendation.id)
+    ).all()
+    assert stored == len(recommendations) == 3
+    assert [r.score for r in recommendations] == sorted((r.score for r in recommendations), reverse=True)
+
+    flight_ids = set(test_db.scalars(select(Flight.id).where(Flight.search_id == search.id)))
+    hotel_ids = set(test_db.scalars(select(Hotel.id).where(Hotel.search_id == search.id)))
+    assert all(r.flight_id in flight_ids and r.hotel_id in hotel_ids for r in recommendations)
+    assert all(r.summary for r in recommendations)
+
+    suggestions = test_db.scalars(
+        select(PackingSuggestion).where(PackingSuggestion.recommendation_id == recommendations[0].id)
+    ).all()
+    assert {s.category for s in suggestions} >= {"clothing", "documents"}
+    assert isinstance(json.loads(suggestions[0].items), list)
+
+    test_db.refresh(search)
+    assert search.status == "completed"
+
+
+def test_stage_failure_leaves_nothing_behind(test_db, monkeypatch):
+    """Test that a failure after the recommendations are inserted stores none and keeps the search processing."""
+    search = add_search_with_data(test_db)
+    inserted = []
+
+    def failing_status_update(db, *, id, obj_in):
+        # The recommendations and packing suggestions are written, but not committed, by now
+        inserted.append(db.scalars(select(Recommendation.id).where(Recommendation.search_id == id)).all())
+        raise RuntimeError("status update failed")
+
+    monkeypatch.setattr(crud.search, "update_by_id", failing_status_update)
+    try:
+        asyncio.run(generate_search_recommendations(test_db, search.id))
+    except RuntimeError:
+        # As process_search_data does before marking the search failed
+        test_db.rollback()
+
+    assert len(inserted) == 1 and inserted[0]
+    count = test_db.scalars(select(Recommendation.id).where(Recommendation.search_id == search.id)).all()
+    assert count == []
+    packing = test_db.scalars(
+        select(PackingSuggestion.id).where(PackingSuggestion.recommendation_id.in_(inserted[0]))
+    ).all()
+    assert packing == []
+    test_db.refresh(search)
+    assert search.status == "processing"
+
+
+def test_stage_keeps_recommendations_within_search_budget(test_db):
+    """Test that a search budget picks bundles that fit it instead of the best unconstrained pairs."""
+    flights, hotels = make_flights(8), make_hotels(6)
+    components = RecommendationEngine()._score_components(flights, hotels, make_weather())
+    scores = 0.4 * components["price_score"] + 0.4 * components["weather_score"] + 0.2 * components["convenience_score"]
+    totals = components["total_price"].ravel()
+    # A budget that rules out some, but not all, of the three best unconstrained pairs
+    best_totals = np.sort(totals[np.argsort(-scores.ravel())[:3]])
+    budget = float((best_totals[0] + best_totals[-1]) / 2)
+    assert best_totals[0] < budget < best_totals[-1]
+    search = add_search_with_data(test_db, budget=budget)
+
+    stored = asyncio.run(generate_search_recommendations(test_db, search.id, top_k=3))
+
+    recommendations = test_db.scalars(select(Recommendation).where(Recommendation.search_id == search.id)).all()
+    assert stored == len(recommendations) > 0
+    for recommendation in recommendations:
+        assert recommendation.details["bundle_price"] <= budget
+        assert recommendation.details["remaining_budget"] == budget - recommendation.details["bundle_price"]
+        assert recommendation.details["event_ids"] == []
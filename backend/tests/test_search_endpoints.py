@@ -0,0 +1,146 @@
+"""
+Tests for the search processing, Pareto and re-rank endpoints.
+"""
+import asyncio
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.api.api_v1.endpoints.search import process_search_data
+from app.models.recommendation import Recommendation
+from app.models.search import Search
+from app.services.cache import candidate_store
+from tests.test_recommendation_pipeline import add_search_with_data
+
+# The development auth dependency always returns user 1
+CURRENT_USER_ID = 1
+OTHER_USER_ID = 10_000
+
+
+def test_pareto_frontier_endpoint(test_app: TestClient, test_db: Session):
+    """Test that the frontier of a search's stored pairs is served, none dominating another."""
+    search = add_search_with_data(test_db, user_id=CURRENT_USER_ID, status="completed")
+
+    response = test_app.get(f"/api/v1/search/{search.id}/pareto")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["candidate_count"] == 8 * 6
+    frontier = data["frontier"]
+    assert frontier
+    points = [[pair[dimension] for dimension in data["dimensions"]] for pair in frontier]
+    for a in points:
+        assert not any(all(x >= y for x, y in zip(b, a)) and b != a for b in points)
+    assert [pair["score"] for pair in frontier] == sorted((pair["score"] for pair in frontier), reverse=True)
+    assert all(pair["flight"]["search_id"] == search.id for pair in frontier)
+
+
+def test_pareto_frontier_of_another_users_search_is_not_found(test_app: TestClient, test_db: Session):
+    """Test the ownership check of the Pareto endpoint."""
+    search = add_search_with_data(test_db, user_id=OTHER_USER_ID)
+
+    assert test_app.get(f"/api/v1/search/{search.id}/pareto").status_code == 404
+
+
+def test_pareto_frontier_waits_for_completed_search(test_app: TestClient, test_db: Session):
+    """Test that searches still processing or failed have no frontier yet."""
+    for status in ("processing", "failed"):
+        search = add_search_with_data(test_db, user_id=CURRENT_USER_ID, status=status)
+
+        response = test_app.get(f"/api/v1/search/{search.id}/pareto")
+
+        assert response.status_code == 409
+        assert status in response.json()["detail"]
+
+
+def test_rerank_waits_for_completed_search(test_app: TestClient, test_db: Session):
+    """Test that a search still processing is not re-ranked (or cached), and a completed one is."""
+    search = add_search_with_data(test_db, user_id=CURRENT_USER_ID)
+
+    response = test_app.post(f"/api/v1/search/{search.id}/rerank", json={"top_k": 3})
+    assert response.status_code == 409
+    assert candidate_store.get(search.id) is None
+
+    search.status = "completed"
+    test_db.commit()
+    response = test_app.post(f"/api/v1/search/{search.id}/rerank", json={"top_k": 3})
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert candidate_store.get(search.id) is not None
+
+
+class StubScraper:
+    """Scraper stand-in returning fixed results in the scrapers' output shape."""
+
+    def __init__(self, results):
+        self.results = results
+
+    async def _results(self, **kwargs):
+        return [dict(item) for item in self.results]
+
+    search_flights = search_hotels = get_weather_forecast = get_events = _results
+
+
+def scraped_data():
+    flights = [
+        {"airline": f"Airline {i}", "flight_number": f"AL{i}", "origin": "Vienna", "destination": "Porto",
+         "departure_time": "2031-05-01T08:00:00", "arrival_time": f"2031-05-0{4 + i % 3}T12:00:00",
+         "duration_minutes": 150 + 20 * i, "price": 180.0 + 15 * i, "currency": "USD", "layovers": i % 2,
+         "source_website": "skyscanner", "source_url": "https://www.skyscanner.com/...",
+         "details": {"cabin_class": "Economy"}}
+        for i in range(4)
+    ]
+    hotels = [
+        {"name": f"Ribeira Hotel {i}", "location": "Porto, City Center", "latitude": 41.14 + i * 0.01,
+         "longitude": -8.61, "price_per_night": 90.0 + 10 * i, "total_price": 270.0 + 30 * i, "currency": "USD",
+         "rating": 3.5 + i * 0.5, "amenities": ["wifi"], "source_website": "booking",
+         "source_url": f"https://www.booking.com/{i}", "details": {"room_type": "Double Room"}}
+        for i in range(3)
+    ]
+    weather = [
+        {"location": "Porto", "date": f"2031-05-0{day}", "temperature_high": 70 + day, "temperature_low": 55,
+         "condition": "Sunny", "precipitation_chance": 10, "humidity": 50, "wind_speed": 5,
+         "source_website": "weather_com", "details": {"uv_index": 6}}
+        for day in range(1, 8)
+    ]
+    events = [
+        {"title": "Port Wine Festival", "description": "Tasting", "location": "Porto, Downtown",
+         "latitude": 41.141, "longitude": -8.611, "start_date": "2031-05-02T18:00:00",
+         "end_date": "2031-05-02T22:00:00", "price": 25.0, "currency": "USD", "is_free": False,
+         "category": "Food", "source_website": "eventbrite", "source_url": "https://www.eventbrite.com/e/1"}
+    ]
+    return flights, hotels, weather, events
+
+
+def test_process_search_data_ingests_and_recommends(test_db: Session):
+    """Test the background task end to end: scraped data is stored and recommendations are written."""
+    params = schemas.SearchCreate(
+        destination="Porto", departure_location="Vienna",
+        departure_date=datetime.date(2031, 5, 1), return_date=datetime.date(2031, 5, 7),
+    )
+    search = Search(user_id=CURRENT_USER_ID, destination="Porto", departure_location="Vienna",
+                    departure_date=datetime.datetime(2031, 5, 1), return_date=datetime.datetime(2031, 5, 7))
+    test_db.add(search)
+    test_db.commit()
+    flights, hotels, weather, events = scraped_data()
+
+    asyncio.run(process_search_data(
+        search.id, params, StubScraper(flights), StubScraper(hotels), StubScraper(weather), StubScraper(events),
+        db=test_db,
+    ))
+
+    test_db.refresh(search)
+    assert search.status == "completed", search.error_message
+    stored_flights = crud.flight.get_rows_by_search(test_db, search_id=search.id)
+    assert len(stored_flights) == 4
+    assert stored_flights[0]["departure_time"] == datetime.datetime(2031, 5, 1, 8)
+    assert stored_flights[0]["details"] == {"cabin_class": "Economy"}
+    assert len(crud.hotel.get_rows_by_search(test_db, search_id=search.id)) == 3
+    assert len(crud.weather.get_rows_by_search(test_db, search_id=search.id)) == 7
+    assert crud.event.get_rows_by_search(test_db, search_id=search.id)[0]["title"] == "Port Wine Festival"
+    recommendations = test_db.scalars(select(Recommendation).where(Recommendation.search_id == search.id)).all()
+    assert len(recommendations) == 5
+    assert all(recommendation.summary for recommendation in recommendations)
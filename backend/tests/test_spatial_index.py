@@ -0,0 +1,73 @@
+"""
+Tests for the spatial index and the hotel-event proximity term.
+"""
+import numpy as np
+
+from app.services.ai.recommendation_engine import RecommendationEngine
+from app.services.ai.spatial_index import SpatialIndex, haversine_km, mean_distance_km
+from tests.test_recommendation_engine import make_flights, make_weather
+
+
+def test_radius_queries_match_brute_force():
+    """Test counts and pairs against a dense distance matrix, with unlocated points."""
+    rng = np.random.default_rng(0)
+    event_lat, event_lon = 38.7 + rng.random(3000) * 0.2, -9.2 + rng.random(3000) * 0.2
+    event_lat[::40] = np.nan
+    hotel_lat, hotel_lon = 38.7 + rng.random(500) * 0.2, -9.2 + rng.random(500) * 0.2
+    hotel_lat[::25] = np.nan
+
+    index = SpatialIndex(event_lat, event_lon, cell_km=0.8)
+    distances = haversine_km(hotel_lat[:, None], hotel_lon[:, None], event_lat[None, :], event_lon[None, :])
+    expected = np.nan_to_num(distances, nan=np.inf) <= 1.5
+
+    assert (index.count_within(hotel_lat, hotel_lon, 1.5) == expected.sum(axis=1)).all()
+    queries, points, found = index.pairs_within(hotel_lat, hotel_lon, 1.5)
+    assert set(zip(queries.tolist(), points.tolist())) == set(zip(*np.nonzero(expected)))
+    assert np.allclose(found, distances[queries, points])
+
+
+def test_radius_queries_work_across_the_globe():
+    """Test poles and the date line, where projected grids break down."""
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(-90, 90, 2000), rng.uniform(-180, 180, 2000)
+    lat[:2], lon[:2] = [0.0, 0.0], [179.99, -179.99]
+
+    counts = SpatialIndex(lat, lon, cell_km=400).count_within(lat[:200], lon[:200], 700)
+
+    distances = haversine_km(lat[:200, None], lon[:200, None], lat[None, :], lon[None, :])
+    assert (counts == (distances <= 700).sum(axis=1)).all()
+    assert counts[0] >= 2
+
+
+def test_mean_distance_to_chosen_events():
+    """Test the mean distance helper."""
+    distances = mean_distance_km([0.0], [0.0], [0.0, 0.0], [1.0, -1.0])
+    assert np.isclose(distances[0], haversine_km(0.0, 0.0, 0.0, 1.0))
+    assert np.isnan(mean_distance_km([0.0], [0.0], [], [])).all()
+
+
+def test_hotels_near_events_score_higher():
+    """Test that proximity feeds the convenience score, with and without chosen events."""
+    engine = RecommendationEngine()
+    hotels = [
+        {"id": 1, "name": "Far", "location": "Outskirts", "price_per_night": 100.0, "rating": 4.0,
+         "latitude": 38.80, "longitude": -9.30},
+        {"id": 2, "name": "Near", "location": "Center", "price_per_night": 100.0, "rating": 4.0,
+         "latitude": 38.71, "longitude": -9.14},
+        {"id": 3, "name": "Unknown", "location": "Center", "price_per_night": 100.0, "rating": 4.0},
+    ]
+    events = [
+        {"id": 10 + i, "title": f"Event {i}", "latitude": 38.71 + i * 0.001, "longitude": -9.14}
+        for i in range(5)
+    ] + [{"id": 20, "title": "Airport show", "latitude": 38.80, "longitude": -9.30}]
+    flights, weather = make_flights(1), make_weather()
+
+    plain = engine._score_components(flights, hotels, weather)["convenience_score"][0]
+    nearby = engine._score_components(flights, hotels, weather, events=events)["convenience_score"][0]
+    chosen = engine._score_components(
+        flights, hotels, weather, events=events, chosen_event_ids=[20]
+    )["convenience_score"][0]
+
+    assert nearby[1] > nearby[0]
+    assert nearby[2] == plain[2]
+    assert chosen[0] > chosen[1]
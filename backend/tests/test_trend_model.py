@@ -0,0 +1,126 @@
+"""
+Tests for the batched price trend model and its scheduled job.
+"""
+import datetime
+import time
+
+import numpy as np
+
+from app import crud
+from app.models.flight import Flight
+from app.models.search import Search
+from app.services.ai.price_analyzer import PriceAnalyzer
+from app.services.ai.trend_model import PriceTrendJob, fit_price_trends
+
+
+def make_series(rng, routes, observations, span_days=400):
+    """Prices with a per-route trend, weekend premium and annual cycle, plus noise."""
+    codes = np.repeat(np.arange(routes), observations)
+    days = 19000 + rng.uniform(0, span_days, codes.size)
+    slopes = rng.normal(0, 0.5, routes)
+    weekend = np.isin(np.floor(days + 3).astype(int) % 7, [5, 6])
+    prices = (300 + slopes[codes] * (days - 19000) + 25 * weekend
+              + 40 * np.sin(2 * np.pi * days / 365.25) + rng.normal(0, 5, codes.size))
+    return codes, days, prices, slopes
+
+
+def test_batched_fit_matches_per_route_least_squares():
+    """Test that the stacked fit gives each route the slope of its own least-squares fit."""
+    rng = np.random.default_rng(5)
+    codes, days, prices, slopes = make_series(rng, routes=20, observations=80)
+
+    result = fit_price_trends(codes, days, prices)
+
+    for route in range(20):
+        mask = codes == route
+        d = days[mask]
+        dow = np.floor(d + 3).astype(int) % 7
+        x = np.column_stack([np.ones(d.size), d] + [dow == k for k in range(1, 7)]
+                            + [np.sin(2 * np.pi * d / 365.25), np.cos(2 * np.pi * d / 365.25)])
+        expected = np.linalg.lstsq(x.astype(float), prices[mask], rcond=None)[0][1]
+        assert np.isclose(result["slope_per_day"][route], expected)
+    covered = (result["slope_ci_low"] < slopes) & (slopes < result["slope_ci_high"])
+    assert covered.sum() >= 17  # 95% intervals
+    assert result["fitted"].all()
+    assert result["forecast"].shape == (20, 14)
+
+
+def test_short_series_drop_terms_and_tiny_series_are_skipped():
+    """Test that series too short for some terms still get a trend and tiny ones are not fitted."""
+    codes = np.array([0] * 6 + [1] * 2)
+    days = np.array([0, 1, 2, 3, 4, 5, 0, 1], dtype=float) + 19000
+    prices = np.array([100, 102, 104, 106, 108, 110, 50, 60], dtype=float)
+
+    result = fit_price_trends(codes, days, prices, forecast_days=3)
+
+    assert result["fitted"].tolist() == [True, False]
+    assert np.isclose(result["slope_per_day"][0], 2.0)
+    assert np.allclose(result["forecast"][0], [112, 114, 116])
+    assert np.isnan(result["slope_per_day"][1])
+
+
+def test_thousands_of_routes_fit_in_one_batch():
+    """Test that fitting thousands of routes at once stays fast."""
+    codes, days, prices, _ = make_series(np.random.default_rng(9), routes=3000, observations=60)
+
+    started = time.perf_counter()
+    result = fit_price_trends(codes, days, prices)
+    elapsed = time.perf_counter() - started
+
+    assert result["fitted"].sum() == 3000
+    assert elapsed < 5.0
+
+
+def test_job_stores_trends_served_by_key(test_db):
+    """Test that the job fits stored flight history and replaces earlier results."""
+    search = Search(destination="Nairobi", departure_location="Oslo",
+                    departure_date=datetime.datetime(2025, 6, 1), return_date=datetime.datetime(2025, 6, 8))
+    test_db.add(search)
+    test_db.flush()
+    start = datetime.datetime(2025, 1, 1)
+    for day in range(30):
+        test_db.add(Flight(search_id=search.id, price=200.0 + 2 * day, currency="USD",
+                           created_at=start + datetime.timedelta(days=day)))
+    test_db.commit()
+
+    job = PriceTrendJob(forecast_days=7)
+    now = start + datetime.timedelta(days=31)
+    assert job.run(test_db, now=now)["flight"] >= 1
+    job.run(test_db, now=now)
+
+    trend = crud.price_trend.get_by_key(test_db, kind="flight", key="OSLO-NAIROBI")
+    assert trend.observations == 30
+    assert np.isclose(trend.slope_per_day, 2.0)
+    assert len(trend.forecast) == 7
+    assert trend.forecast[0]["date"] == "2025-01-31"
+    assert test_db.query(type(trend)).filter_by(kind="flight", key="OSLO-NAIROBI").count() == 1
+
+
+def test_analyze_price_trends_uses_regression():
+    """Test that ad-hoc trend analysis fits a slope with a confidence interval."""
+    history = [{"date": f"2025-03-{day:02d}", "price": 300 + 3 * day + (day % 2)} for day in range(1, 21)]
+
+    analysis = PriceAnalyzer().analyze_price_trends(history)
+
+    assert analysis["direction"] == "increasing"
+    assert analysis["slope_ci"][0] < 3 < analysis["slope_ci"][1]
+    assert analysis["confidence"] > 0.99
+
+
+def test_price_history_is_stamped_at_insert_time(test_db):
+    """Test that each scraped flight gets its own scrape time rather than the module import time."""
+    assert Flight.__table__.c.created_at.default.is_callable
+    search = Search(destination="Tbilisi", departure_location="Riga",
+                    departure_date=datetime.datetime(2025, 9, 1), return_date=datetime.datetime(2025, 9, 8))
+    test_db.add(search)
+    test_db.flush()
+    before = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+    for price in (210.0, 190.0):
+        test_db.add(Flight(search_id=search.id, origin="RIX", destination="TBS", price=price, currency="USD"))
+        test_db.commit()
+        time.sleep(0.01)
+
+    history = [row for row in crud.flight.get_price_history(test_db, since=before) if row["origin"] == "RIX"]
+    assert [row["price"] for row in history] == [210.0, 190.0]
+    assert before <= history[0]["observed_at"] < history[1]["observed_at"]